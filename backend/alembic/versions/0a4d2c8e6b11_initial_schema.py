@@ -0,0 +1,90 @@
+"""initial schema
+
+Revision ID: 0a4d2c8e6b11
+Revises: 
+Create Date: 2026-10-18 09:00:00.000000
+
+建立用户、课程和教学内容表（引入迁移之前由 create_all 建立的结构），后续迁移都以此为起点。
+已有这些表的数据库不要执行本迁移，先执行 `alembic stamp 0a4d2c8e6b11` 再 `alembic upgrade head`。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0a4d2c8e6b11'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+CONTENT_TABLES = ['course_objectives', 'course_syllabi', 'course_materials']
+
+
+def _timestamps():
+    return [
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    ]
+
+
+def upgrade() -> None:
+    op.create_table(
+        'users',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=50), nullable=False),
+        sa.Column('email', sa.String(length=100), nullable=False),
+        sa.Column('password', sa.String(length=255), nullable=False),
+        sa.Column('role', sa.String(length=20), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_users_id'), 'users', ['id'], unique=False)
+    op.create_index(op.f('ix_users_username'), 'users', ['username'], unique=True)
+    op.create_index(op.f('ix_users_email'), 'users', ['email'], unique=True)
+
+    op.create_table(
+        'courses',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=255), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('teacher_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=50), nullable=True),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['teacher_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_courses_id'), 'courses', ['id'], unique=False)
+    op.create_index(op.f('ix_courses_title'), 'courses', ['title'], unique=False)
+
+    op.create_table(
+        'course_objectives',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('course_id', sa.Integer(), nullable=False),
+        sa.Column('course_content', sa.Text(), nullable=True),
+        sa.Column('teaching_target', sa.Text(), nullable=True),
+        sa.Column('content', sa.Text(), nullable=True),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(['course_id'], ['courses.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    for table in ['course_syllabi', 'course_materials']:
+        op.create_table(
+            table,
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('course_id', sa.Integer(), nullable=False),
+            sa.Column('content', sa.Text(), nullable=False),
+            *_timestamps(),
+            sa.ForeignKeyConstraint(['course_id'], ['courses.id']),
+            sa.PrimaryKeyConstraint('id')
+        )
+    for table in CONTENT_TABLES:
+        op.create_index(op.f(f'ix_{table}_id'), table, ['id'], unique=False)
+        op.create_index(op.f(f'ix_{table}_course_id'), table, ['course_id'], unique=False)
+
+
+def downgrade() -> None:
+    for table in reversed(CONTENT_TABLES):
+        op.drop_table(table)
+    op.drop_table('courses')
+    op.drop_table('users')
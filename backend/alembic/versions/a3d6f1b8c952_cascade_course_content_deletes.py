@@ -0,0 +1,39 @@
+"""cascade course content deletes
+
+Revision ID: a3d6f1b8c952
+Revises: f5c8d2e7a041
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d6f1b8c952'
+down_revision = 'f5c8d2e7a041'
+branch_labels = None
+depends_on = None
+
+TABLES = ['course_objectives', 'course_syllabi', 'course_materials']
+
+
+def _replace_foreign_keys(on_delete: str) -> None:
+    # 先在迁移事务中以 NOT VALID 替换约束，只短暂持有 ACCESS EXCLUSIVE 锁；
+    # 提交后再逐表校验已有行，VALIDATE 只需 SHARE UPDATE EXCLUSIVE 锁，校验期间不阻塞读写
+    for table in TABLES:
+        name = f'{table}_course_id_fkey'
+        op.execute(
+            f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}, '
+            f'ADD CONSTRAINT {name} FOREIGN KEY (course_id) REFERENCES courses (id) {on_delete} NOT VALID'
+        )
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.execute(f'ALTER TABLE {table} VALIDATE CONSTRAINT {table}_course_id_fkey')
+
+
+def upgrade() -> None:
+    _replace_foreign_keys('ON DELETE CASCADE')
+
+
+def downgrade() -> None:
+    _replace_foreign_keys('')
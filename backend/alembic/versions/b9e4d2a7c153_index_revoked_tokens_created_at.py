@@ -0,0 +1,25 @@
+"""index revoked_tokens created_at
+
+Revision ID: b9e4d2a7c153
+Revises: c7e2a9d4b316
+Create Date: 2026-10-18 22:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9e4d2a7c153'
+down_revision = 'c7e2a9d4b316'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 各进程按 created_at 增量同步吊销记录
+    op.create_index(op.f('ix_revoked_tokens_created_at'), 'revoked_tokens', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_revoked_tokens_created_at'), table_name='revoked_tokens')
@@ -0,0 +1,40 @@
+"""add course pagination indexes
+
+Revision ID: c41e7a9d2f15
+Revises: 8b2d4e6f1a93
+Create Date: 2026-10-18 14:20:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41e7a9d2f15'
+down_revision = '8b2d4e6f1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY 不能在事务中执行，建索引期间不阻塞课程表写入
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_courses_created_at_id', 'courses', ['created_at', 'id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_courses_teacher_id_created_at_id', 'courses', ['teacher_id', 'created_at', 'id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_courses_teacher_id_created_at_id', table_name='courses',
+            postgresql_concurrently=True, if_exists=True
+        )
+        op.drop_index(
+            'ix_courses_created_at_id', table_name='courses',
+            postgresql_concurrently=True, if_exists=True
+        )
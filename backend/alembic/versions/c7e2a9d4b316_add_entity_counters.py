@@ -0,0 +1,31 @@
+"""add entity counters
+
+Revision ID: c7e2a9d4b316
+Revises: a3d6f1b8c952
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2a9d4b316'
+down_revision = 'a3d6f1b8c952'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 计数器在首次对账后才会被读取，这里只建表
+    op.create_table(
+        'entity_counters',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('slot', sa.SmallInteger(), nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('name', 'slot'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('entity_counters')
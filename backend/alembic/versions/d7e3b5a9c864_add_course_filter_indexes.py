@@ -0,0 +1,40 @@
+"""add course filter indexes
+
+Revision ID: d7e3b5a9c864
+Revises: c41e7a9d2f15
+Create Date: 2026-10-18 15:05:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7e3b5a9c864'
+down_revision = 'c41e7a9d2f15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY 不能在事务中执行，建索引期间不阻塞课程表写入
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_courses_status_created_at_id', 'courses', ['status', 'created_at', 'id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_courses_teacher_id_status_created_at_id', 'courses', ['teacher_id', 'status', 'created_at', 'id'],
+            unique=False, postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_courses_teacher_id_status_created_at_id', table_name='courses',
+            postgresql_concurrently=True, if_exists=True
+        )
+        op.drop_index(
+            'ix_courses_status_created_at_id', table_name='courses',
+            postgresql_concurrently=True, if_exists=True
+        )
@@ -0,0 +1,37 @@
+"""add course search indexes
+
+Revision ID: e2a9c6f4b317
+Revises: d7e3b5a9c864
+Create Date: 2026-10-18 16:10:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a9c6f4b317'
+down_revision = 'd7e3b5a9c864'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # CONCURRENTLY 不能在事务中执行，建索引期间不阻塞课程表写入
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_courses_title_trgm', 'courses', ['title'], unique=False,
+            postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'},
+            postgresql_concurrently=True, if_not_exists=True
+        )
+        op.create_index(
+            'ix_courses_description_trgm', 'courses', ['description'], unique=False,
+            postgresql_using='gin', postgresql_ops={'description': 'gin_trgm_ops'},
+            postgresql_concurrently=True, if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_courses_description_trgm', table_name='courses', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_courses_title_trgm', table_name='courses', postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,25 @@
+"""add course version
+
+Revision ID: f5c8d2e7a041
+Revises: e2a9c6f4b317
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f5c8d2e7a041'
+down_revision = 'e2a9c6f4b317'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # 常量默认值只写入表定义，不重写已有行
+    op.add_column('courses', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('courses', 'version')
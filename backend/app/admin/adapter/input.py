@@ -1,19 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.uow import UnitOfWorkRoute
 from app.admin.application.schema import (
     AdminLoginRequest, AdminLoginResponse, UserCreateRequest, 
     UserUpdateRequest, UserResponse, DashboardStats
 )
 from app.admin.application.service import AdminService
 from app.admin.adapter.repository import SQLAlchemyAdminRepository
-from app.core.exceptions import NotFoundException, UnauthorizedException
+from app.core.exceptions import NotFoundException, UnauthorizedException, RateLimitException
+from app.core.helpers.rate_limit import client_ip, login_limiter
+from app.core.helpers.serialization import json_response
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/admin", tags=["admin"])
+router = APIRouter(prefix="/admin", tags=["admin"], route_class=UnitOfWorkRoute)
 
 def get_admin_repo(db: AsyncSession = Depends(get_db)):
     return SQLAlchemyAdminRepository(db)
@@ -21,10 +24,19 @@ def get_admin_repo(db: AsyncSession = Depends(get_db)):
 def get_admin_service(repo = Depends(get_admin_repo)):
     return AdminService(repo)
 
+def get_admin_read_repo(db: AsyncSession = Depends(get_read_db)):
+    return SQLAlchemyAdminRepository(db)
+
+def get_admin_read_service(repo = Depends(get_admin_read_repo)):
+    return AdminService(repo)
+
 @router.post("/login", response_model=AdminLoginResponse)
-async def admin_login(login_data: AdminLoginRequest, service = Depends(get_admin_service)):
+async def admin_login(login_data: AdminLoginRequest, request: Request, service = Depends(get_admin_service)):
     try:
+        await login_limiter.check(login_data.username, client_ip(request))
         return await service.login(login_data)
+    except RateLimitException as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except UnauthorizedException as e:
         raise HTTPException(status_code=401, detail=str(e))
     except Exception as e:
@@ -32,7 +44,7 @@ async def admin_login(login_data: AdminLoginRequest, service = Depends(get_admin
         raise HTTPException(status_code=500, detail="登录失败")
 
 @router.get("/statistics/dashboard", response_model=DashboardStats)
-async def get_dashboard_stats(service = Depends(get_admin_service)):
+async def get_dashboard_stats(service = Depends(get_admin_read_service)):
     try:
         return await service.get_dashboard_stats()
     except Exception as e:
@@ -40,10 +52,9 @@ async def get_dashboard_stats(service = Depends(get_admin_service)):
         raise HTTPException(status_code=500, detail="获取统计数据失败")
 
 @router.get("/list", response_model=list[UserResponse])
-async def get_user_list(service = Depends(get_admin_service)):
+async def get_user_list(service = Depends(get_admin_read_service)):
     try:
-        users = await service.get_all_users()
-        return users
+        return json_response(await service.get_all_users())
     except Exception as e:
         logger.error(f"获取用户列表失败: {e}")
         raise HTTPException(status_code=500, detail="获取用户列表失败")
@@ -67,7 +78,7 @@ async def delete_user(user_id: int, service = Depends(get_admin_service)):
         raise HTTPException(status_code=500, detail="删除用户失败")
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user_info(user_id: int, service = Depends(get_admin_service)):
+async def get_user_info(user_id: int, service = Depends(get_admin_read_service)):
     try:
         return await service.get_user_by_id(user_id)
     except NotFoundException as e:
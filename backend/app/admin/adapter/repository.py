@@ -1,17 +1,31 @@
 from app.admin.domain.repository import AdminRepository
 from app.models.user import User
 from app.models.course import Course
+from app.core.config import settings
+from app.core.helpers.counters import (
+    USERS, COURSES, add_counts, course_counts, read_counts, user_counts
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import func
+from sqlalchemy import delete, func, case, inspect, true
+
+# 仪表板用到的计数器：用户总数、教师数、管理员数、课程总数、进行中的课程数
+TEACHERS = f"{USERS}.role.teacher"
+ADMINS = f"{USERS}.role.admin"
+ACTIVE_COURSES = f"{COURSES}.status.active"
+DASHBOARD_COUNTERS = (USERS, TEACHERS, ADMINS, COURSES, ACTIVE_COURSES)
 
 class SQLAlchemyAdminRepository(AdminRepository):
     def __init__(self, db: AsyncSession):
         self.db = db
     
     async def get_all_users(self):
-        result = await self.db.execute(select(User))
-        return result.scalars().all()
+        # 只查询列表需要的列并直接返回 Row，status 与 User.status 的取值一致
+        status = case((User.is_active.is_(False), "inactive"), else_="active").label("status")
+        result = await self.db.execute(
+            select(User.id, User.username, User.email, User.role, status, User.created_at).order_by(User.id)
+        )
+        return result.all()
     
     async def get_user_by_id(self, user_id: int):
         result = await self.db.execute(select(User).where(User.id == user_id))
@@ -19,30 +33,36 @@ class SQLAlchemyAdminRepository(AdminRepository):
     
     async def create_user(self, user: User):
         self.db.add(user)
-        await self.db.commit()
-        await self.db.refresh(user)
+        await self.db.flush()
+        await add_counts(self.db, user_counts(user.role))
         return user
     
     async def update_user(self, user: User):
-        await self.db.commit()
-        await self.db.refresh(user)
+        role = inspect(user).attrs.role.history
+        # eager_defaults：UPDATE ... RETURNING 带回 updated_at
+        await self.db.flush()
+        if role.deleted and role.added and role.deleted[0] != role.added[0]:
+            await add_counts(self.db, user_counts(role.deleted[0], -1), user_counts(role.added[0]))
         return user
     
     async def delete_user(self, user_id: int):
-        user = await self.get_user_by_id(user_id)
-        if user:
-            await self.db.delete(user)
-            await self.db.commit()
+        """一条 DELETE ... RETURNING 删除用户，返回被删用户的用户名、邮箱和角色，不存在时返回 None"""
+        result = await self.db.execute(
+            delete(User).where(User.id == user_id).returning(User.username, User.email, User.role)
+        )
+        row = result.one_or_none()
+        if row is not None:
+            await add_counts(self.db, user_counts(row.role, -1))
+        return row
     
     async def get_dashboard_stats(self):
-        # 用户统计
-        total_users = await self.db.scalar(select(func.count(User.id)))
-        teacher_count = await self.db.scalar(select(func.count(User.id)).where(User.role == "teacher"))
-        admin_count = await self.db.scalar(select(func.count(User.id)).where(User.role == "admin"))
-        
-        # 课程统计
-        total_courses = await self.db.scalar(select(func.count(Course.id)))
-        active_courses = await self.db.scalar(select(func.count(Course.id)).where(Course.status == "active"))
+        """开启计数器时按主键读取计数器；未开启或计数器尚未对账时用一条聚合查询实时统计"""
+        counts = await read_counts(self.db, DASHBOARD_COUNTERS) if settings.ENTITY_COUNTERS_ENABLED else None
+        if counts is None:
+            counts = await self._count_dashboard()
+        total_users, teacher_count, admin_count, total_courses, active_courses = (
+            counts[name] for name in DASHBOARD_COUNTERS
+        )
         
         return {
             "userStats": {
@@ -57,4 +77,18 @@ class SQLAlchemyAdminRepository(AdminRepository):
                 "approvedCount": active_courses or 0,
                 "rejectedCount": 0
             }
-        } 
+        }
+    
+    async def _count_dashboard(self):
+        """COUNT(*) FILTER (WHERE ...) 一次扫描各表得到全部统计，两张表的结果在同一条语句中返回"""
+        users = select(
+            func.count().label(USERS),
+            func.count().filter(User.role == "teacher").label(TEACHERS),
+            func.count().filter(User.role == "admin").label(ADMINS),
+        ).select_from(User).subquery()
+        courses = select(
+            func.count().label(COURSES),
+            func.count().filter(Course.status == "active").label(ACTIVE_COURSES),
+        ).select_from(Course).subquery()
+        result = await self.db.execute(select(users, courses).select_from(users.join(courses, true())))
+        return dict(result.one()._mapping)
@@ -1,5 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List
+from datetime import datetime
 
 class AdminLoginRequest(BaseModel):
     username: str
@@ -25,8 +26,8 @@ class UserResponse(BaseModel):
     username: str
     email: str
     role: str
-    status: str
-    created_at: Optional[str] = None
+    status: str  # active, inactive（由 is_active 得出）
+    created_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
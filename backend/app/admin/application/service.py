@@ -1,12 +1,25 @@
 from app.admin.domain.repository import AdminRepository
-from app.admin.application.schema import AdminLoginRequest, UserCreateRequest, UserUpdateRequest
+from app.admin.application.schema import AdminLoginRequest, UserCreateRequest, UserUpdateRequest, UserResponse
 from app.models.user import User
 from app.core.exceptions import NotFoundException, UnauthorizedException
+from app.core.helpers.principal import invalidate_user_principals
+from app.core.helpers.identity_cache import mark_taken, release
+from app.core.uow import on_commit
+from app.core.helpers.serialization import validate_list
+from app.core.helpers.read_cache import LocalCacheBackend, ReadThroughCache
+from app.core.config import settings
 import hashlib
 import jwt
 import os
 from datetime import datetime, timedelta
 
+# 仪表板统计短时缓存：统计允许数秒的延迟，不随写操作失效；并发未命中只统计一次
+dashboard_cache = ReadThroughCache(
+    "dashboard",
+    LocalCacheBackend("dashboard", maxsize=1, ttl=settings.DASHBOARD_CACHE_TTL),
+    ttl=settings.DASHBOARD_CACHE_TTL,
+)
+
 class AdminService:
     def __init__(self, repo: AdminRepository):
         self.repo = repo
@@ -48,7 +61,7 @@ class AdminService:
     async def get_all_users(self):
         """获取所有用户"""
         users = await self.repo.get_all_users()
-        return users
+        return validate_list(UserResponse, users)
     
     async def get_user_by_id(self, user_id: int):
         """根据ID获取用户"""
@@ -65,7 +78,9 @@ class AdminService:
             password=self._hash_password(user_data.password),
             role=user_data.role
         )
-        return await self.repo.create_user(user)
+        created = await self.repo.create_user(user)
+        on_commit(lambda: mark_taken(username=created.username, email=created.email))
+        return created
     
     async def update_user(self, user_id: int, user_data: UserUpdateRequest):
         """更新用户"""
@@ -73,6 +88,7 @@ class AdminService:
         if not user:
             raise NotFoundException(f"用户 {user_id} 不存在")
         
+        old_username, old_email = user.username, user.email
         if user_data.username:
             user.username = user_data.username
         if user_data.email:
@@ -80,17 +96,36 @@ class AdminService:
         if user_data.role:
             user.role = user_data.role
         
-        return await self.repo.update_user(user)
+        updated = await self.repo.update_user(user)
+        
+        def refresh_caches():
+            invalidate_user_principals(user_id)
+            if updated.username != old_username:
+                release(username=old_username)
+            if updated.email != old_email:
+                release(email=old_email)
+            mark_taken(username=updated.username, email=updated.email)
+        
+        # 事务提交后再失效缓存，避免并发请求在提交前重新缓存旧数据
+        on_commit(refresh_caches)
+        return updated
     
     async def delete_user(self, user_id: int):
         """删除用户"""
-        user = await self.repo.get_user_by_id(user_id)
+        user = await self.repo.delete_user(user_id)
         if not user:
             raise NotFoundException(f"用户 {user_id} 不存在")
         
-        await self.repo.delete_user(user_id)
+        def refresh_caches():
+            invalidate_user_principals(user_id)
+            release(username=user.username, email=user.email)
+        
+        on_commit(refresh_caches)
         return {"message": "用户删除成功"}
     
     async def get_dashboard_stats(self):
-        """获取仪表板统计数据"""
-        return await self.repo.get_dashboard_stats() 
+        """获取仪表板统计数据，DASHBOARD_CACHE_TTL 秒内重复请求直接返回缓存"""
+        if settings.DASHBOARD_CACHE_TTL <= 0:
+            return await self.repo.get_dashboard_stats()
+        return await dashboard_cache.get_or_load("stats", self.repo.get_dashboard_stats)
+
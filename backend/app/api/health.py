@@ -0,0 +1,59 @@
+import asyncio
+import logging
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
+from app.core.config import settings
+from app.core.database import engine, pool_stats, replica_router
+from app.core.helpers.metrics import registry
+from app.core.lifespan import lifecycle
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(tags=["health"])
+
+async def _ping_primary():
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+@router.get("/health/live")
+async def liveness():
+    """存活检查：进程能处理请求即可"""
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+async def readiness():
+    """就绪检查：预热完成、主库可用且连接池未饱和，否则返回 503 让负载均衡摘除本实例"""
+    if not lifecycle.ready:
+        return JSONResponse(status_code=503, content={"status": "draining" if lifecycle.draining else "starting"})
+    
+    pools = pool_stats()
+    primary = pools["primary"]
+    if primary["saturated"] and primary["waiters"] > 0:
+        database = "saturated"
+    else:
+        try:
+            await asyncio.wait_for(_ping_primary(), timeout=settings.HEALTH_CHECK_TIMEOUT)
+            database = "ok"
+        except Exception as e:
+            logger.warning(f"就绪检查失败: {e}")
+            database = "unavailable"
+
+    ready = database == "ok"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "unavailable",
+            "database": database,
+            "replicas": {
+                "configured": len(replica_router.replicas),
+                "healthy": len(replica_router.healthy_replicas()),
+            },
+            "pools": pools,
+        },
+    )
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus 文本格式的进程内指标"""
+    return PlainTextResponse(registry.render_prometheus(), media_type="text/plain; version=0.0.4")
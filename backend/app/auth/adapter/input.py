@@ -1,17 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
-from app.auth.application.schema import LoginRequest, LoginResponse, RegisterRequest, RegisterResponse
+from app.core.uow import UnitOfWorkRoute
+from app.auth.application.schema import (
+    LoginRequest, LoginResponse, RegisterRequest, RegisterResponse,
+    RefreshRequest, RefreshResponse, LogoutRequest,
+    AvailabilityRequest, AvailabilityResponse
+)
+from typing import Optional
 from app.auth.application.service import AuthService
 from app.auth.adapter.repository import SQLAlchemyAuthRepository
-from app.core.exceptions import UnauthorizedException, ValidationException
+from app.core.exceptions import UnauthorizedException, ValidationException, ServiceUnavailableException, RateLimitException
+from app.core.helpers.rate_limit import client_ip, login_limiter
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/auth", tags=["auth"])
+router = APIRouter(prefix="/auth", tags=["auth"], route_class=UnitOfWorkRoute)
 security = HTTPBearer()
 
 def get_auth_repo(db: AsyncSession = Depends(get_db)):
@@ -21,12 +28,17 @@ def get_auth_service(repo = Depends(get_auth_repo)):
     return AuthService(repo)
 
 @router.post("/login", response_model=LoginResponse)
-async def login(login_data: LoginRequest, service = Depends(get_auth_service)):
+async def login(login_data: LoginRequest, request: Request, service = Depends(get_auth_service)):
     """用户登录"""
     try:
+        await login_limiter.check(login_data.email, client_ip(request))
         return await service.login(login_data.username, login_data.email, login_data.password)
+    except RateLimitException as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
     except UnauthorizedException as e:
         raise HTTPException(status_code=401, detail=str(e))
+    except ServiceUnavailableException as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"登录失败: {e}")
         raise HTTPException(status_code=500, detail="登录失败")
@@ -38,10 +50,21 @@ async def register(register_data: RegisterRequest, service = Depends(get_auth_se
         return await service.register(register_data)
     except ValidationException as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except ServiceUnavailableException as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         logger.error(f"注册失败: {e}")
         raise HTTPException(status_code=500, detail="注册失败")
 
+@router.post("/check-availability", response_model=AvailabilityResponse)
+async def check_availability(request: AvailabilityRequest, service = Depends(get_auth_service)):
+    """批量检查用户名/邮箱是否可用"""
+    try:
+        return await service.check_availability(request.usernames, request.emails)
+    except Exception as e:
+        logger.error(f"检查可用性失败: {e}")
+        raise HTTPException(status_code=500, detail="检查可用性失败")
+
 @router.get("/check-username/{username}")
 async def check_username_available(username: str, service = Depends(get_auth_service)):
     """检查用户名是否可用"""
@@ -62,12 +85,30 @@ async def check_email_available(email: str, service = Depends(get_auth_service))
         logger.error(f"检查邮箱失败: {e}")
         raise HTTPException(status_code=500, detail="检查邮箱失败")
 
+@router.post("/refresh", response_model=RefreshResponse)
+async def refresh_token(refresh_data: RefreshRequest, service = Depends(get_auth_service)):
+    """使用刷新令牌换发访问令牌"""
+    try:
+        return await service.refresh(refresh_data.refreshToken)
+    except UnauthorizedException as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    except Exception as e:
+        logger.error(f"刷新令牌失败: {e}")
+        raise HTTPException(status_code=500, detail="刷新令牌失败")
+
 @router.post("/logout")
-async def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def logout(
+    logout_data: Optional[LogoutRequest] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    service = Depends(get_auth_service)
+):
     """用户登出"""
     try:
-        # 这里可以实现token黑名单等逻辑
+        refresh_token = logout_data.refreshToken if logout_data else None
+        await service.logout(credentials.credentials, refresh_token)
         return {"message": "登出成功"}
+    except UnauthorizedException as e:
+        raise HTTPException(status_code=401, detail=str(e))
     except Exception as e:
         logger.error(f"登出失败: {e}")
         raise HTTPException(status_code=500, detail="登出失败")
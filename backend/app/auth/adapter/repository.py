@@ -1,8 +1,13 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, func, or_, any_, bindparam, String
+from sqlalchemy.dialects.postgresql import insert, ARRAY
+from datetime import datetime, timezone
 from app.auth.domain.repository import AuthRepository
+from app.auth.application.exception import DuplicateUserException
+from app.core.helpers.counters import add_counts, user_counts
 from app.models.user import User
-from typing import Optional, Dict, Any
+from app.models.refresh_token import RefreshToken
+from typing import Optional, Dict, Any, Tuple, List, Set
 
 class SQLAlchemyAuthRepository(AuthRepository):
     def __init__(self, db: AsyncSession):
@@ -29,10 +34,79 @@ class SQLAlchemyAuthRepository(AuthRepository):
         )
         return result.scalar_one_or_none()
     
+    async def get_taken_identities(self, usernames: List[str], emails: List[str]) -> Tuple[Set[str], Set[str]]:
+        """一次查询批量判断用户名/邮箱是否已被占用，只读取这两列"""
+        if not usernames and not emails:
+            return set(), set()
+        result = await self.db.execute(
+            select(User.username, User.email).where(or_(
+                User.username == any_(bindparam("usernames", usernames, type_=ARRAY(String))),
+                User.email == any_(bindparam("emails", emails, type_=ARRAY(String)))
+            ))
+        )
+        taken_usernames, taken_emails = set(), set()
+        wanted_usernames, wanted_emails = set(usernames), set(emails)
+        for username, email in result.all():
+            if username in wanted_usernames:
+                taken_usernames.add(username)
+            if email in wanted_emails:
+                taken_emails.add(email)
+        return taken_usernames, taken_emails
+    
     async def create_user(self, user_data: Dict[str, Any]) -> User:
-        """创建用户"""
-        user = User(**user_data)
-        self.db.add(user)
-        await self.db.commit()
-        await self.db.refresh(user)
-        return user 
+        """创建用户，单条 INSERT ... ON CONFLICT DO NOTHING RETURNING 完成唯一性校验"""
+        result = await self.db.execute(
+            insert(User)
+            .values(**user_data)
+            .on_conflict_do_nothing()
+            .returning(User)
+        )
+        user = result.scalar_one_or_none()
+        if user is None:
+            # DO NOTHING 不会使事务失效，可在同一事务内查明冲突字段
+            raise DuplicateUserException(await self._conflicting_field(user_data))
+        await add_counts(self.db, user_counts(user.role))
+        return user
+    
+    async def _conflicting_field(self, user_data: Dict[str, Any]) -> str:
+        """插入被唯一约束拦截时，判断冲突的是用户名还是邮箱"""
+        result = await self.db.execute(
+            select(User.username).where(
+                or_(User.username == user_data["username"], User.email == user_data["email"])
+            )
+        )
+        usernames = result.scalars().all()
+        return "username" if user_data["username"] in usernames else "email"
+    
+    async def create_refresh_token(self, token_data: Dict[str, Any]) -> RefreshToken:
+        """保存刷新令牌"""
+        token = RefreshToken(**token_data)
+        self.db.add(token)
+        await self.db.flush()
+        return token
+    
+    async def get_refresh_token_with_user(self, token_hash: str) -> Optional[Tuple[RefreshToken, User]]:
+        """根据令牌哈希获取刷新令牌及其用户（加行锁，防止并发轮换）"""
+        result = await self.db.execute(
+            select(RefreshToken, User)
+            .join(User, User.id == RefreshToken.user_id)
+            .where(RefreshToken.token_hash == token_hash)
+            .with_for_update(of=RefreshToken)
+        )
+        return result.one_or_none()
+    
+    async def rotate_refresh_token(self, old_token: RefreshToken, new_token_data: Dict[str, Any]) -> RefreshToken:
+        """将旧令牌标记为已轮换并保存新令牌（同一事务）"""
+        old_token.rotated_at = datetime.now(timezone.utc)
+        token = RefreshToken(**new_token_data)
+        self.db.add(token)
+        await self.db.flush()
+        return token
+    
+    async def revoke_refresh_family(self, family_id: str):
+        """吊销同一族的全部刷新令牌，随工作单元提交"""
+        await self.db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=func.now())
+        )
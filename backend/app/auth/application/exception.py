@@ -0,0 +1,7 @@
+from app.core.exceptions import ValidationException
+
+class DuplicateUserException(ValidationException):
+    """用户名或邮箱唯一约束冲突"""
+    def __init__(self, field: str):
+        self.field = field
+        super().__init__("用户名已存在" if field == "username" else "邮箱已存在") 
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import Optional, List, Dict
 
 class LoginRequest(BaseModel):
     username: str
@@ -11,6 +11,7 @@ class LoginResponse(BaseModel):
     userId: int
     username: str
     role: str
+    refreshToken: Optional[str] = None
     message: str = "登录成功"
 
 class RegisterRequest(BaseModel):
@@ -27,4 +28,22 @@ class UserInfo(BaseModel):
     id: int
     username: str
     email: str
-    role: str 
\ No newline at end of file
+    role: str
+
+class RefreshRequest(BaseModel):
+    refreshToken: str
+
+class RefreshResponse(BaseModel):
+    token: str
+    refreshToken: str
+
+class LogoutRequest(BaseModel):
+    refreshToken: Optional[str] = None
+
+class AvailabilityRequest(BaseModel):
+    usernames: List[str] = Field(default_factory=list, max_length=50)
+    emails: List[str] = Field(default_factory=list, max_length=50)
+
+class AvailabilityResponse(BaseModel):
+    usernames: Dict[str, bool]
+    emails: Dict[str, bool]
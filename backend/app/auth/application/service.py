@@ -1,24 +1,38 @@
 from app.auth.domain.repository import AuthRepository
-from app.auth.application.schema import LoginRequest, LoginResponse, RegisterRequest, RegisterResponse, UserInfo
-from app.core.exceptions import UnauthorizedException, ValidationException
-from app.core.helpers.token import create_access_token, verify_token
-from passlib.context import CryptContext
+from app.auth.application.schema import (
+    LoginRequest, LoginResponse, RegisterRequest, RegisterResponse, UserInfo,
+    RefreshResponse, AvailabilityResponse
+)
+from app.auth.application.exception import DuplicateUserException
+from app.core.config import settings
+from app.core.exceptions import UnauthorizedException
+from app.core.helpers.metrics import registry
+from app.core.helpers.identity_cache import mark_taken, remember, is_username_taken, is_email_taken
+from app.core.helpers.token import create_access_token, verify_token, create_refresh_token, hash_refresh_token
+from app.core.helpers.password import password_hasher
+from app.core.helpers.principal import get_cached_principal, cache_principal, invalidate_token
+from app.core.helpers.revocation import revocation_list
+from app.core.uow import commit_on_failure, on_commit
+from datetime import datetime, timedelta, timezone
+from typing import Optional, List
 import logging
+import uuid
 
 logger = logging.getLogger(__name__)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+refresh_counter = registry.counter("auth_refresh_total", "刷新令牌换发次数")
+refresh_reuse_counter = registry.counter("auth_refresh_reuse_total", "检测到的刷新令牌重复使用次数")
 
 class AuthService:
     def __init__(self, repo: AuthRepository):
         self.repo = repo
     
-    def _verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        """验证密码"""
-        return pwd_context.verify(plain_password, hashed_password)
+    async def _verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        """验证密码（在哈希执行器中运行）"""
+        return await password_hasher.verify(plain_password, hashed_password)
     
-    def _get_password_hash(self, password: str) -> str:
-        """生成密码哈希"""
-        return pwd_context.hash(password)
+    async def _get_password_hash(self, password: str) -> str:
+        """生成密码哈希（在哈希执行器中运行）"""
+        return await password_hasher.hash(password)
     
     async def login(self, username: str, email: str, password: str) -> LoginResponse:
         """用户登录"""
@@ -32,31 +46,85 @@ class AuthService:
             raise UnauthorizedException("用户名、邮箱或密码错误")
         
         # 验证密码
-        if not self._verify_password(password, user.password):
+        if not await self._verify_password(password, user.password):
             raise UnauthorizedException("用户名、邮箱或密码错误")
         
         # 生成JWT token
         token = create_access_token(data={"sub": str(user.id), "role": user.role})
+        refresh_token = await self._issue_refresh_token(user.id)
         
         return LoginResponse(
             token=token,
             userId=user.id,
             username=user.username,
-            role=user.role
+            role=user.role,
+            refreshToken=refresh_token
+        )
+    
+    async def _issue_refresh_token(self, user_id: int) -> str:
+        """登录时创建新的刷新令牌族"""
+        now = datetime.now(timezone.utc)
+        refresh_token = create_refresh_token()
+        await self.repo.create_refresh_token({
+            "user_id": user_id,
+            "token_hash": hash_refresh_token(refresh_token),
+            "family_id": uuid.uuid4().hex,
+            "expires_at": now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+            "session_expires_at": now + timedelta(days=settings.REFRESH_SESSION_MAX_DAYS),
+        })
+        return refresh_token
+    
+    async def refresh(self, refresh_token: str) -> RefreshResponse:
+        """用刷新令牌换发访问令牌，不涉及密码校验"""
+        row = await self.repo.get_refresh_token_with_user(hash_refresh_token(refresh_token))
+        if not row:
+            raise UnauthorizedException("无效的刷新令牌")
+        stored, user = row
+        
+        # 已轮换的令牌再次出现，说明令牌可能泄露，吊销整个令牌族
+        if stored.rotated_at is not None:
+            refresh_reuse_counter.inc()
+            logger.warning(f"检测到刷新令牌重复使用: user_id={stored.user_id}, family={stored.family_id}")
+            await self.repo.revoke_refresh_family(stored.family_id)
+            # 请求随后以 401 失败，吊销仍须提交
+            commit_on_failure()
+            raise UnauthorizedException("刷新令牌已失效，请重新登录")
+        
+        now = datetime.now(timezone.utc)
+        if stored.revoked_at is not None or stored.expires_at <= now or user.is_active is False:
+            raise UnauthorizedException("刷新令牌已失效，请重新登录")
+        
+        # 滑动续期，但不超过会话绝对过期时间
+        new_refresh_token = create_refresh_token()
+        await self.repo.rotate_refresh_token(stored, {
+            "user_id": user.id,
+            "token_hash": hash_refresh_token(new_refresh_token),
+            "family_id": stored.family_id,
+            "expires_at": min(now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS), stored.session_expires_at),
+            "session_expires_at": stored.session_expires_at,
+        })
+        refresh_counter.inc()
+        
+        return RefreshResponse(
+            token=create_access_token(data={"sub": str(user.id), "role": user.role}),
+            refreshToken=new_refresh_token
         )
     
     async def register(self, register_data: RegisterRequest) -> RegisterResponse:
         """用户注册"""
-        # 检查用户名是否已存在
-        if await self.repo.get_user_by_username(register_data.username):
-            raise ValidationException("用户名已存在")
-        
-        # 检查邮箱是否已存在
-        if await self.repo.get_user_by_email(register_data.email):
-            raise ValidationException("邮箱已存在")
+        # 缓存提示可能已被占用时，先用一次只读两列的查询确认，确实被占用则省去一次 bcrypt；
+        # 缓存可能已过时（其他进程删除或改名），不能单凭缓存拒绝
+        if is_username_taken(register_data.username) or is_email_taken(register_data.email):
+            usernames, emails = [register_data.username], [register_data.email]
+            taken_usernames, taken_emails = await self.repo.get_taken_identities(usernames, emails)
+            remember(usernames, emails, taken_usernames, taken_emails)
+            if taken_usernames:
+                raise DuplicateUserException("username")
+            if taken_emails:
+                raise DuplicateUserException("email")
         
-        # 创建用户
-        hashed_password = self._get_password_hash(register_data.password)
+        # 用户名、邮箱的唯一性由数据库约束保证，冲突时仓库抛出 DuplicateUserException
+        hashed_password = await self._get_password_hash(register_data.password)
         user_data = {
             "username": register_data.username,
             "email": register_data.email,
@@ -64,38 +132,85 @@ class AuthService:
             "role": register_data.role
         }
         
-        await self.repo.create_user(user_data)
+        try:
+            await self.repo.create_user(user_data)
+        except DuplicateUserException as e:
+            mark_taken(**{e.field: user_data[e.field]})
+            raise
+        on_commit(lambda: mark_taken(username=register_data.username, email=register_data.email))
         
         return RegisterResponse(
             success=True,
             message="注册成功"
         )
     
+    async def check_availability(self, usernames: List[str], emails: List[str]) -> AvailabilityResponse:
+        """
+        批量检查用户名/邮箱是否可用，所有候选值一次查询数据库。
+        占用缓存可能过时，不据此判定，只用查询结果刷新它，供注册时提示
+        """
+        usernames = list(dict.fromkeys(usernames))
+        emails = list(dict.fromkeys(emails))
+        taken_usernames, taken_emails = await self.repo.get_taken_identities(usernames, emails)
+        remember(usernames, emails, taken_usernames, taken_emails)
+        
+        return AvailabilityResponse(
+            usernames={u: u not in taken_usernames for u in usernames},
+            emails={e: e not in taken_emails for e in emails}
+        )
+    
     async def check_username_available(self, username: str) -> bool:
         """检查用户名是否可用"""
-        user = await self.repo.get_user_by_username(username)
-        return user is None
+        result = await self.check_availability([username], [])
+        return result.usernames[username]
     
     async def check_email_available(self, email: str) -> bool:
         """检查邮箱是否可用"""
-        user = await self.repo.get_user_by_email(email)
-        return user is None
+        result = await self.check_availability([], [email])
+        return result.emails[email]
     
     async def get_current_user(self, token: str) -> UserInfo:
         """获取当前用户信息"""
+        cached = get_cached_principal(token)
+        if cached is not None:
+            jti, user_info = cached
+            if await revocation_list.is_revoked(jti):
+                invalidate_token(token)
+                raise UnauthorizedException("无效的token")
+            return user_info
+        
         try:
             payload = verify_token(token)
+            if await revocation_list.is_revoked(payload.get("jti")):
+                raise UnauthorizedException("无效的token")
             user_id = int(payload.get("sub"))
             user = await self.repo.get_user_by_id(user_id)
             
             if not user:
                 raise UnauthorizedException("用户不存在")
             
-            return UserInfo(
+            user_info = UserInfo(
                 id=user.id,
                 username=user.username,
                 email=user.email,
                 role=user.role
             )
+            cache_principal(token, payload, user_info, user.id)
+            return user_info
         except Exception as e:
-            raise UnauthorizedException("无效的token") 
+            raise UnauthorizedException("无效的token")
+    
+    async def logout(self, token: str, refresh_token: Optional[str] = None):
+        """用户登出，吊销访问令牌直至其过期，并吊销对应的刷新令牌族"""
+        try:
+            payload = verify_token(token)
+        except ValueError:
+            raise UnauthorizedException("无效的token")
+        
+        await revocation_list.revoke(payload.get("jti"), float(payload.get("exp", 0)))
+        invalidate_token(token)
+        
+        if refresh_token:
+            row = await self.repo.get_refresh_token_with_user(hash_refresh_token(refresh_token))
+            if row and str(row[0].user_id) == str(payload.get("sub")):
+                await self.repo.revoke_refresh_family(row[0].family_id)
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 class AuthRepository(ABC):
     """认证模块仓库接口"""
@@ -19,7 +19,32 @@ class AuthRepository(ABC):
         """根据ID获取用户"""
         pass
     
+    @abstractmethod
+    async def get_taken_identities(self, usernames: List[str], emails: List[str]):
+        """批量查询已被占用的用户名和邮箱，返回 (用户名集合, 邮箱集合)"""
+        pass
+    
     @abstractmethod
     async def create_user(self, user_data: Dict[str, Any]):
-        """创建用户"""
-        pass 
+        """创建用户，用户名或邮箱冲突时抛出 DuplicateUserException"""
+        pass
+    
+    @abstractmethod
+    async def create_refresh_token(self, token_data: Dict[str, Any]):
+        """保存刷新令牌"""
+        pass
+    
+    @abstractmethod
+    async def get_refresh_token_with_user(self, token_hash: str):
+        """根据令牌哈希获取刷新令牌及其用户（加行锁）"""
+        pass
+    
+    @abstractmethod
+    async def rotate_refresh_token(self, old_token, new_token_data: Dict[str, Any]):
+        """将旧令牌标记为已轮换并保存新令牌"""
+        pass
+    
+    @abstractmethod
+    async def revoke_refresh_family(self, family_id: str):
+        """吊销同一族的全部刷新令牌"""
+        pass
@@ -0,0 +1,170 @@
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableException
+from app.core.helpers.metrics import registry
+
+class OverloadedException(ServiceUnavailableException):
+    """准入控制拒绝请求"""
+    def __init__(self, message: str, reason: str, retry_after: int):
+        self.reason = reason
+        self.retry_after = retry_after
+        super().__init__(message)
+
+class AdmissionController:
+    """
+    并发准入控制：最多 max_concurrency 个请求同时执行，其余按优先级（数值小者优先）排队。
+    队列有长度上限和等待期限；队列已满时，优先级更高的请求会挤掉队尾优先级最低的请求。
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float, retry_after: float = 1.0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.in_flight = 0
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+        self._in_flight_gauge = registry.gauge("admission_in_flight", "正在执行的请求数")
+        self._queue_gauge = registry.gauge("admission_queue_depth", "排队等待执行的请求数")
+
+    def _reject(self, reason: str) -> OverloadedException:
+        registry.counter("admission_rejected_total", "准入控制拒绝的请求数", {"reason": reason}).inc()
+        return OverloadedException("服务繁忙，请稍后重试", reason, self.retry_after)
+
+    def _update_gauges(self):
+        self._in_flight_gauge.set(self.in_flight)
+        self._queue_gauge.set(len(self._queue))
+
+    async def acquire(self, priority: int = 1):
+        """获取执行名额，排队超时或被挤出时抛出 OverloadedException"""
+        if self.in_flight < self.max_concurrency and not self._queue:
+            self.in_flight += 1
+            self._update_gauges()
+            return
+
+        if len(self._queue) >= self.max_queue:
+            worst = max(self._queue, default=None)
+            if worst is None or worst[0] <= priority:
+                raise self._reject("queue_full")
+            # 挤掉队列中优先级最低、最晚到达的请求
+            self._queue.remove(worst)
+            heapq.heapify(self._queue)
+            worst[2].set_exception(self._reject("evicted"))
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), future)
+        heapq.heappush(self._queue, entry)
+        self._update_gauges()
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                # 超时的同时已被分配名额
+                return
+            self._discard(entry)
+            raise self._reject("timeout")
+        except BaseException:
+            if future.done() and not future.cancelled() and future.exception() is None:
+                self.release()
+            else:
+                self._discard(entry)
+            raise
+        finally:
+            registry.histogram("admission_wait_seconds", "请求排队等待时间", {"priority": str(priority)}).observe(
+                time.perf_counter() - start
+            )
+
+    def _discard(self, entry):
+        if entry in self._queue:
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+        if not entry[2].done():
+            entry[2].cancel()
+        self._update_gauges()
+
+    def release(self):
+        """释放名额，直接移交给优先级最高的排队请求"""
+        while self._queue:
+            _, _, future = heapq.heappop(self._queue)
+            if not future.done():
+                future.set_result(None)
+                self._update_gauges()
+                return
+        self.in_flight -= 1
+        self._update_gauges()
+
+class AdmissionControlMiddleware:
+    """
+    ASGI 中间件：对访问数据库的请求做准入控制，超载时直接返回 503 和 Retry-After，
+    避免请求在连接池里等待 pool_timeout 后才失败。
+    priorities 为 路径前缀 -> 优先级，按最长前缀匹配；exempt_paths 中的前缀不受限制。
+    """
+
+    def __init__(self, app, controller: AdmissionController, priorities: Optional[Dict[str, int]] = None,
+                 default_priority: int = 1, exempt_paths: Tuple[str, ...] = ()):
+        self.app = app
+        self.controller = controller
+        self.priorities = sorted((priorities or {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self.default_priority = default_priority
+        self.exempt_paths = tuple(exempt_paths)
+
+    def priority_for(self, path: str) -> int:
+        for prefix, priority in self.priorities:
+            if path.startswith(prefix):
+                return priority
+        return self.default_priority
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") == "OPTIONS" or self._is_exempt(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(self.priority_for(scope["path"]))
+        except OverloadedException as e:
+            await self._send_overloaded(send, str(e), e.retry_after)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+    def _is_exempt(self, path: str) -> bool:
+        return path == "/" or any(path.startswith(prefix) for prefix in self.exempt_paths)
+
+    async def _send_overloaded(self, send, message: str, retry_after: int):
+        body = json.dumps({"detail": message}, ensure_ascii=False).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+def parse_priorities(value: str) -> Dict[str, int]:
+    """解析 "/auth/login:0,/admin/list:2" 形式的配置"""
+    priorities = {}
+    for item in value.split(","):
+        if ":" in item:
+            prefix, priority = item.rsplit(":", 1)
+            priorities[prefix.strip()] = int(priority)
+    return priorities
+
+admission_controller = AdmissionController(
+    max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+    retry_after=settings.ADMISSION_RETRY_AFTER,
+)
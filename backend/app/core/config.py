@@ -11,8 +11,112 @@ class Settings:
     POSTGRES_HOST = os.getenv("POSTGRES_HOST", "localhost")
     POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
     
+    # 连接池配置（秒）；POOL_RECYCLE 为 -1 时不回收
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+    
+    HEALTH_CHECK_TIMEOUT = float(os.getenv("HEALTH_CHECK_TIMEOUT", "2"))
+    
+    # 准入控制：每个进程同时执行的请求数（默认等于连接池容量）、排队上限与排队期限（秒）
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "True").lower() == "true"
+    ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "50"))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+    ADMISSION_RETRY_AFTER = float(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+    # 路径前缀:优先级，数值越小越先执行；未匹配的路径使用默认优先级
+    ADMISSION_PRIORITIES = os.getenv(
+        "ADMISSION_PRIORITIES",
+        "/auth/login:0,/auth/me:0,/auth/refresh:0,/admin/list:2,/admin/statistics:2"
+    )
+    ADMISSION_DEFAULT_PRIORITY = int(os.getenv("ADMISSION_DEFAULT_PRIORITY", "1"))
+    ADMISSION_EXEMPT_PATHS = tuple(
+        p.strip() for p in os.getenv("ADMISSION_EXEMPT_PATHS", "/health,/metrics,/docs,/redoc,/openapi.json").split(",")
+        if p.strip()
+    )
+    
+    # 启动预热与优雅关闭（秒）
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "True").lower() == "true"
+    WARMUP_POOL_CONNECTIONS = int(os.getenv("WARMUP_POOL_CONNECTIONS", "5"))
+    WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "10"))
+    SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "20"))
+    
+    # 课程列表分页：默认/最大每页条数，带筛选条件时计数的上限
+    COURSE_PAGE_SIZE = int(os.getenv("COURSE_PAGE_SIZE", "20"))
+    COURSE_MAX_PAGE_SIZE = int(os.getenv("COURSE_MAX_PAGE_SIZE", "100"))
+    COURSE_COUNT_CAP = int(os.getenv("COURSE_COUNT_CAP", "10000"))
+    COURSE_BULK_DELETE_MAX = int(os.getenv("COURSE_BULK_DELETE_MAX", "1000"))  # 管理员批量删除每次最多的课程数
+    # 课程导入每批写入的行数（同时是导出时每次从游标取的行数）、导入响应中最多返回的错误条数
+    COURSE_BULK_BATCH_SIZE = int(os.getenv("COURSE_BULK_BATCH_SIZE", "500"))
+    COURSE_IMPORT_MAX_ERRORS = int(os.getenv("COURSE_IMPORT_MAX_ERRORS", "100"))
+    # 非 PostgreSQL 数据库上课程搜索使用进程内索引，每隔多少秒整表重建一次以看到其他 worker 的写入（0 不重建）
+    COURSE_SEARCH_INDEX_REFRESH = float(os.getenv("COURSE_SEARCH_INDEX_REFRESH", "300"))
+    
+    # 课程读缓存配置（秒）：memory 为进程内 LRU，redis 为多进程共享（使用 REDIS_URL）。
+    # 进程内缓存不会被其他 worker 的写操作失效，默认只在 redis 时开启；memory 只适合单 worker
+    COURSE_CACHE_BACKEND = os.getenv("COURSE_CACHE_BACKEND", "memory")  # memory, redis
+    COURSE_CACHE_ENABLED = (os.getenv("COURSE_CACHE_ENABLED") or str(COURSE_CACHE_BACKEND == "redis")).lower() == "true"
+    COURSE_CACHE_SIZE = int(os.getenv("COURSE_CACHE_SIZE", "10000"))
+    COURSE_CACHE_TTL = float(os.getenv("COURSE_CACHE_TTL", "60"))
+    
+    # 仪表板统计：实体计数器表（写事务提交前累加、定期对账，秒）及统计结果缓存（秒）
+    ENTITY_COUNTERS_ENABLED = os.getenv("ENTITY_COUNTERS_ENABLED", "False").lower() == "true"
+    ENTITY_COUNTER_SLOTS = int(os.getenv("ENTITY_COUNTER_SLOTS", "8"))
+    ENTITY_COUNTER_RECONCILE_INTERVAL = float(os.getenv("ENTITY_COUNTER_RECONCILE_INTERVAL", "3600"))
+    DASHBOARD_CACHE_TTL = float(os.getenv("DASHBOARD_CACHE_TTL", "10"))
+    
     # JWT配置
     SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here")
+    ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
+    REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))  # 滑动过期
+    REFRESH_SESSION_MAX_DAYS = int(os.getenv("REFRESH_SESSION_MAX_DAYS", "30"))  # 会话绝对上限
+    
+    # 密码哈希配置
+    PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")  # thread, process
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+    PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64"))
+    
+    # 当前用户缓存配置（秒）
+    PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+    
+    # 登录限流配置（突发容量、每分钟补充数）
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # memory, redis
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+    LOGIN_IDENTITY_BURST = float(os.getenv("LOGIN_IDENTITY_BURST", "5"))
+    LOGIN_IDENTITY_PER_MINUTE = float(os.getenv("LOGIN_IDENTITY_PER_MINUTE", "5"))
+    LOGIN_IP_BURST = float(os.getenv("LOGIN_IP_BURST", "20"))
+    LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", "30"))
+    # 受信任的反向代理（逗号分隔的 IP 或网段）：只有直连方在其中时才从 X-Forwarded-For 取客户端 IP；
+    # 为空时一律使用直连地址，部署在代理之后须配置，否则所有请求共用代理 IP 的限流桶
+    TRUSTED_PROXIES = [p.strip() for p in os.getenv("TRUSTED_PROXIES", "").split(",") if p.strip()]
+    
+    # 已占用用户名/邮箱缓存配置（秒）
+    IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "50000"))
+    IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "300"))
+    
+    # 令牌吊销配置
+    TOKEN_REVOCATION_BACKEND = os.getenv("TOKEN_REVOCATION_BACKEND", "memory")  # memory, sql, redis
+    TOKEN_REVOCATION_BLOOM_CAPACITY = int(os.getenv("TOKEN_REVOCATION_BLOOM_CAPACITY", "100000"))
+    TOKEN_REVOCATION_COMPACT_INTERVAL = float(os.getenv("TOKEN_REVOCATION_COMPACT_INTERVAL", "60"))
+    # 各进程从存储同步其他进程吊销记录的间隔（秒），即其他进程吊销的令牌在本进程中最长仍可用的时间
+    TOKEN_REVOCATION_SYNC_INTERVAL = float(os.getenv("TOKEN_REVOCATION_SYNC_INTERVAL", "5"))
+    
+    # Redis配置（为空时使用进程内替身）
+    REDIS_URL = os.getenv("REDIS_URL", "")
+    
+    # SQL 日志配置：SQL_ECHO 输出全部语句及参数，否则只记录慢查询和抽样语句
+    SQL_ECHO = os.getenv("SQL_ECHO", "False").lower() == "true"
+    SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "200"))
+    SQL_LOG_SAMPLE_RATE = float(os.getenv("SQL_LOG_SAMPLE_RATE", "0"))
+    
+    # 只读副本配置：逗号分隔的完整连接串，为空时读请求使用主库
+    DATABASE_READ_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_READ_REPLICA_URLS", "").split(",") if url.strip()]
+    READ_REPLICA_STRATEGY = os.getenv("READ_REPLICA_STRATEGY", "round_robin")  # round_robin, least_connections
+    READ_REPLICA_HEALTH_INTERVAL = float(os.getenv("READ_REPLICA_HEALTH_INTERVAL", "10"))
+    READ_YOUR_WRITES_WINDOW = float(os.getenv("READ_YOUR_WRITES_WINDOW", "5"))  # 写入后固定读主库的秒数
     
     # 其他配置
     DEBUG = os.getenv("DEBUG", "True").lower() == "true"
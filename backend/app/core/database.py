@@ -1,21 +1,231 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
-from .config import DATABASE_URL
-
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,
-    pool_size=20,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_pre_ping=True
-)
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncContextManager, Callable, Dict, List, Optional
+from fastapi import Request
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from .config import DATABASE_URL, settings
+from .instrumentation import sql_instrumentation
+from .pool import InstrumentedAsyncPool
+from .helpers.cache import TTLCache
+from .helpers.metrics import registry
+from .helpers.rate_limit import client_ip
+from .helpers.token import peek_subject
+from .uow import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+def _create_engine(url: str, label: str) -> AsyncEngine:
+    new_engine = create_async_engine(
+        url,
+        echo=settings.SQL_ECHO,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING
+    )
+    new_engine.pool.label = label
+    sql_instrumentation.attach(new_engine)
+    return new_engine
+
+engine = _create_engine(DATABASE_URL, "primary")
+read_engines: List[AsyncEngine] = [
+    _create_engine(url, f"replica{i}") for i, url in enumerate(settings.DATABASE_READ_REPLICA_URLS)
+]
+
+def all_engines() -> List[AsyncEngine]:
+    return [engine] + read_engines
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """各连接池当前状态，键为 primary、replica0 ..."""
+    return {e.pool.label: e.pool.stats() for e in all_engines()}
+
+registry.register_collector(lambda: [e.pool.export_metrics() for e in all_engines()])
+
 AsyncSessionLocal = sessionmaker(
     bind=engine,
     class_=AsyncSession,
     expire_on_commit=False
 )
+ReadSessionLocal = sessionmaker(
+    class_=AsyncSession,
+    expire_on_commit=False
+)
+
+class ReplicaRouter:
+    """
+    只读副本路由：按轮询或最少连接选择健康副本，全部不可用时回退主库。
+    同一用户写入后的短时间内固定读主库，保证读到自己的写入。
+    """
+
+    def __init__(self, primary: AsyncEngine, replicas: List[AsyncEngine], strategy: str = "round_robin",
+                 health_interval: float = 10.0, pin_window: float = 5.0):
+        if strategy not in ("round_robin", "least_connections"):
+            raise ValueError(f"不支持的副本选择策略: {strategy}")
+        self.primary = primary
+        self.replicas = replicas
+        self.strategy = strategy
+        self.health_interval = health_interval
+        self._unhealthy = {}  # 副本 -> 下次允许重试的时间
+        self._round_robin = itertools.count()
+        self._pins = TTLCache("read_your_writes", maxsize=100000, ttl=pin_window)
+        self._next_check = time.monotonic() + health_interval
+        self._check_task: Optional[asyncio.Task] = None
+
+        for replica in replicas:
+            event.listen(replica.sync_engine, "handle_error", self._make_error_handler(replica))
+
+    def _make_error_handler(self, replica: AsyncEngine):
+        def handle_error(exception_context):
+            if exception_context.is_disconnect or exception_context.connection is None:
+                self.mark_unhealthy(replica)
+        return handle_error
+
+    def pin(self, key: Optional[str]):
+        """写入后固定该用户读主库"""
+        if key:
+            self._pins.set(key, True)
+
+    def is_pinned(self, key: Optional[str]) -> bool:
+        return bool(key) and self._pins.get(key, False, record=False)
+
+    def mark_unhealthy(self, replica: AsyncEngine):
+        if replica not in self._unhealthy:
+            logger.warning(f"只读副本不可用，暂时摘除: {replica.url.host}")
+        self._unhealthy[replica] = time.monotonic() + self.health_interval
+
+    def healthy_replicas(self) -> List[AsyncEngine]:
+        return [replica for replica in self.replicas if replica not in self._unhealthy]
+
+    def choose(self, key: Optional[str] = None) -> AsyncEngine:
+        """为只读请求选择引擎"""
+        self._maybe_check_health()
+        if not self.replicas:
+            return self._route(self.primary, "no_replica")
+        if self.is_pinned(key):
+            return self._route(self.primary, "pinned")
+        candidates = self.healthy_replicas()
+        if not candidates:
+            return self._route(self.primary, "fallback")
+        if self.strategy == "least_connections":
+            replica = min(candidates, key=lambda r: r.pool.checkedout())
+        else:
+            replica = candidates[next(self._round_robin) % len(candidates)]
+        return self._route(replica, "replica")
+
+    def _route(self, target: AsyncEngine, reason: str) -> AsyncEngine:
+        registry.counter("db_read_routing_total", "只读请求路由次数", {"reason": reason}).inc()
+        return target
+
+    async def check_health(self):
+        """对所有副本执行 SELECT 1，恢复或摘除副本"""
+        for replica in self.replicas:
+            try:
+                async with replica.connect() as conn:
+                    await asyncio.wait_for(conn.execute(text("SELECT 1")), timeout=self.health_interval)
+                if self._unhealthy.pop(replica, None) is not None:
+                    logger.info(f"只读副本已恢复: {replica.url.host}")
+            except Exception as e:
+                logger.warning(f"只读副本健康检查失败: {replica.url.host}: {e}")
+                self.mark_unhealthy(replica)
+
+    def _maybe_check_health(self):
+        if not self.replicas or time.monotonic() < self._next_check:
+            return
+        if self._check_task is not None and not self._check_task.done():
+            return
+        self._next_check = time.monotonic() + self.health_interval
+        try:
+            self._check_task = asyncio.get_running_loop().create_task(self.check_health())
+        except RuntimeError:
+            pass
+
+    async def aclose(self):
+        """关闭时取消进行中的健康检查"""
+        if self._check_task is not None and not self._check_task.done():
+            self._check_task.cancel()
+            await asyncio.gather(self._check_task, return_exceptions=True)
+        self._check_task = None
+
+replica_router = ReplicaRouter(
+    engine,
+    read_engines,
+    strategy=settings.READ_REPLICA_STRATEGY,
+    health_interval=settings.READ_REPLICA_HEALTH_INTERVAL,
+    pin_window=settings.READ_YOUR_WRITES_WINDOW,
+)
 
-async def get_db():
+def request_client_key(request: Request) -> Optional[str]:
+    """用于读写一致性的调用方标识：优先令牌中的用户，其次客户端 IP"""
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        subject = peek_subject(authorization[7:])
+        if subject:
+            return f"user:{subject}"
+    ip = client_ip(request)
+    return f"ip:{ip}" if ip else None
+
+@event.listens_for(Session, "after_commit")
+def _pin_after_commit(session: Session):
+    """提交写事务后固定该调用方读主库"""
+    if session.info.pop("wrote", False):
+        replica_router.pin(session.info.get("client_key"))
+
+@event.listens_for(Session, "after_flush")
+def _mark_wrote(session: Session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(Session, "after_rollback")
+def _clear_wrote(session: Session):
+    session.info.pop("wrote", None)
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["wrote"] = True
+
+async def get_db(request: Request = None):
+    """请求级会话，由工作单元统一提交"""
     async with AsyncSessionLocal() as session:
-        yield session 
+        uow = UnitOfWork(session).bind()
+        if request is not None:
+            session.info["client_key"] = request_client_key(request)
+            request.state.uow = uow
+        try:
+            yield session
+        except Exception:
+            await uow.fail()
+            raise
+        else:
+            # 未使用 UnitOfWorkRoute 的路由在此兜底提交（此时响应已发出）
+            await uow.commit()
+
+@asynccontextmanager
+async def read_session(request: Optional[Request] = None):
+    """只读会话，可能路由到只读副本"""
+    key = request_client_key(request) if request is not None else None
+    target = replica_router.choose(key)
+    if target is engine:
+        async with AsyncSessionLocal() as session:
+            yield session
+    else:
+        async with ReadSessionLocal(bind=target) as session:
+            yield session
+
+async def get_read_db(request: Request = None):
+    """只读请求使用的会话，可能路由到只读副本"""
+    async with read_session(request) as session:
+        yield session
+
+def get_read_session_factory(request: Request = None) -> Callable[[], AsyncContextManager[AsyncSession]]:
+    """
+    流式响应使用的只读会话工厂。新版 FastAPI 在发送流式响应体之前就执行 yield 依赖的清理，
+    get_read_db 的会话此时已关闭，响应体生成器须在其中自行打开和关闭会话
+    """
+    return lambda: read_session(request)
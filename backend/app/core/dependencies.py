@@ -0,0 +1,94 @@
+import time
+from typing import Any, Dict, Optional
+from fastapi import Depends, HTTPException, Request, Response
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db
+from app.core.helpers.metrics import registry
+from app.core.helpers.revocation import revocation_list
+from app.core.helpers.token import verify_token
+from app.models.user import User
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+_decode_seconds = registry.histogram("auth_token_decode_seconds", "令牌解码耗时")
+_lookup_seconds = registry.histogram("auth_user_lookup_seconds", "当前用户查询耗时")
+
+def _record_timing(request: Request, response: Response, name: str, seconds: float):
+    """记录到 request.state 并通过 Server-Timing 响应头暴露"""
+    timings = getattr(request.state, "auth_timing", None)
+    if timings is None:
+        timings = request.state.auth_timing = {}
+    timings[name] = seconds
+    response.headers.append("Server-Timing", f"{name};dur={seconds * 1000:.2f}")
+
+def get_bearer_token(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> str:
+    """提取 Bearer 令牌"""
+    if credentials is None:
+        raise HTTPException(status_code=401, detail="未提供认证信息")
+    return credentials.credentials
+
+async def get_token_payload(
+    request: Request,
+    response: Response,
+    token: str = Depends(get_bearer_token)
+) -> Dict[str, Any]:
+    """解码令牌，同一请求内只解码一次"""
+    payload = getattr(request.state, "token_payload", None)
+    if payload is not None:
+        return payload
+
+    start = time.perf_counter()
+    try:
+        payload = verify_token(token)
+        revoked = await revocation_list.is_revoked(payload.get("jti"))
+    except ValueError as e:
+        raise HTTPException(status_code=401, detail=str(e))
+    finally:
+        elapsed = time.perf_counter() - start
+        _decode_seconds.observe(elapsed)
+        _record_timing(request, response, "auth-decode", elapsed)
+
+    if revoked:
+        raise HTTPException(status_code=401, detail="令牌已失效")
+
+    request.state.token_payload = payload
+    return payload
+
+async def get_current_user(
+    request: Request,
+    response: Response,
+    payload: Dict[str, Any] = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """加载当前用户，同一请求内只查询一次"""
+    user = getattr(request.state, "current_user", None)
+    if user is not None:
+        return user
+
+    try:
+        user_id = int(payload.get("sub"))
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="无效的令牌")
+
+    start = time.perf_counter()
+    try:
+        user = await db.get(User, user_id)
+    finally:
+        elapsed = time.perf_counter() - start
+        _lookup_seconds.observe(elapsed)
+        _record_timing(request, response, "auth-lookup", elapsed)
+
+    if user is None or user.is_active is False:
+        raise HTTPException(status_code=401, detail="用户不存在")
+
+    request.state.current_user = user
+    return user
+
+def require_role(*roles: str):
+    """要求当前用户具有指定角色之一，否则返回 403"""
+    async def dependency(user: User = Depends(get_current_user)) -> User:
+        if user.role not in roles:
+            raise HTTPException(status_code=403, detail="权限不足")
+        return user
+    return dependency
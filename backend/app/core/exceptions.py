@@ -9,4 +9,16 @@ class UnauthorizedException(AppException):
     pass
 
 class ValidationException(AppException):
-    pass 
+    pass
+
+class ServiceUnavailableException(AppException):
+    pass
+
+class RateLimitException(AppException):
+    def __init__(self, message: str, retry_after: int = 1):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class PreconditionFailedException(AppException):
+    """条件请求的前提（If-Match 等）不成立"""
+    pass
@@ -0,0 +1,103 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Set
+from app.core.helpers.metrics import registry
+
+_MISSING = object()
+
+class TTLCache:
+    """进程内 LRU 缓存，条目带过期时间，支持按标签批量失效"""
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 60.0, clock=time.monotonic):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._tags: Dict[Hashable, Set[Hashable]] = {}
+
+        labels = {"cache": name}
+        self._hits = registry.counter("cache_hits_total", "缓存命中次数", labels)
+        self._misses = registry.counter("cache_misses_total", "缓存未命中次数", labels)
+        self._evictions = registry.counter("cache_evictions_total", "因容量淘汰的条目数", labels)
+        self._expirations = registry.counter("cache_expirations_total", "因过期移除的条目数", labels)
+        self._size = registry.gauge("cache_size", "当前缓存条目数", labels)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING, record=False) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None, record: bool = True) -> Any:
+        """读取缓存，命中时刷新 LRU 顺序"""
+        entry = self._data.get(key)
+        if entry is not None:
+            value, expires_at, _ = entry
+            if expires_at > self._clock():
+                self._data.move_to_end(key)
+                if record:
+                    self._hits.inc()
+                return value
+            self._remove(key)
+            self._expirations.inc()
+        if record:
+            self._misses.inc()
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, tags: Iterable[Hashable] = ()):
+        """写入缓存，ttl 为空时使用默认过期时间"""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        if key in self._data:
+            self._remove(key)
+        tags = tuple(tags)
+        self._data[key] = (value, self._clock() + ttl, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while len(self._data) > self.maxsize:
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self._evictions.inc()
+        self._size.set(len(self._data))
+
+    def delete(self, key: Hashable):
+        """删除单个条目"""
+        if key in self._data:
+            self._remove(key)
+            self._size.set(len(self._data))
+
+    def invalidate_tag(self, tag: Hashable) -> int:
+        """删除带有指定标签的所有条目，返回删除数量"""
+        keys = self._tags.pop(tag, set())
+        for key in list(keys):
+            self._remove(key)
+        self._size.set(len(self._data))
+        return len(keys)
+
+    def clear(self):
+        """清空缓存"""
+        self._data.clear()
+        self._tags.clear()
+        self._size.set(0)
+
+    def stats(self) -> Dict[str, float]:
+        """返回命中/未命中/淘汰统计"""
+        return {
+            "hits": self._hits.value,
+            "misses": self._misses.value,
+            "evictions": self._evictions.value,
+            "expirations": self._expirations.value,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+    def _remove(self, key: Hashable):
+        _, _, tags = self._data.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
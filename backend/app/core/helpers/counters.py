@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterable, Mapping, Optional
+from weakref import WeakKeyDictionary
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.helpers.metrics import registry
+from app.core.uow import UnitOfWork, current_uow
+from app.models.course import Course
+from app.models.entity_counter import EntityCounter
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+USERS = "users"
+COURSES = "courses"
+# 最近一次对账的时间（Unix 秒），没有或过旧时计数器不可信
+RECONCILED_AT = "_reconciled_at"
+
+def user_counts(role: Optional[str], delta: int = 1) -> Dict[str, int]:
+    """一个用户对应的计数器增量：总数和所属角色"""
+    counts = {USERS: delta}
+    if role:
+        counts[f"{USERS}.role.{role}"] = delta
+    return counts
+
+def course_counts(status: Optional[str], delta: int = 1) -> Dict[str, int]:
+    """一门课程对应的计数器增量：总数和所处状态"""
+    counts = {COURSES: delta}
+    if status:
+        counts[f"{COURSES}.status.{status}"] = delta
+    return counts
+
+# 各工作单元尚未写入的增量，提交前一次写入
+_pending: "WeakKeyDictionary[UnitOfWork, Counter]" = WeakKeyDictionary()
+
+async def add_counts(session: AsyncSession, *deltas: Mapping[str, int]):
+    """
+    登记计数器增量，未开启 ENTITY_COUNTERS_ENABLED 时不做任何事。
+    在工作单元中时合并到提交前的一条语句里，缩短计数器行锁的持有时间；否则立即写入当前事务
+    """
+    if not settings.ENTITY_COUNTERS_ENABLED:
+        return
+    total = Counter()
+    for delta in deltas:
+        total.update(delta)
+    if not any(total.values()):
+        return
+    uow = current_uow()
+    if uow is None or uow.completed or uow.session is not session:
+        await apply_counts(session, total)
+        return
+    pending = _pending.get(uow)
+    if pending is None:
+        pending = _pending[uow] = Counter()
+
+        async def flush():
+            await apply_counts(session, _pending.pop(uow, {}))
+
+        uow.before_commit(flush)
+    pending.update(total)
+
+@contextmanager
+def discard_counts_on_error():
+    """包住保存点：块内出错回滚时，一并撤销块内登记、尚未写入的增量（已写入的随保存点回滚）"""
+    uow = current_uow()
+    before = Counter(_pending.get(uow, ())) if uow is not None else None
+    try:
+        yield
+    except BaseException:
+        pending = _pending.get(uow) if uow is not None else None
+        if pending is not None:
+            pending.clear()
+            pending.update(before)
+        raise
+
+def _upsert(dialect: str):
+    insert_ = (postgresql if dialect == "postgresql" else sqlite).insert(EntityCounter)
+    return insert_.on_conflict_do_update(
+        index_elements=[EntityCounter.name, EntityCounter.slot],
+        set_={"value": EntityCounter.value + insert_.excluded.value},
+    )
+
+async def apply_counts(session: AsyncSession, deltas: Mapping[str, int]):
+    """INSERT ... ON CONFLICT DO UPDATE 一条语句累加全部增量，落在随机的同一槽位上"""
+    deltas = {name: value for name, value in deltas.items() if value}
+    if not deltas:
+        return
+    slot = random.randrange(settings.ENTITY_COUNTER_SLOTS)
+    # 按名称排序，并发事务以相同顺序锁行，避免死锁
+    rows = [{"name": name, "slot": slot, "value": deltas[name]} for name in sorted(deltas)]
+    await session.execute(_upsert(session.bind.dialect.name).values(rows))
+
+async def read_counts(session: AsyncSession, names: Iterable[str]) -> Optional[Dict[str, int]]:
+    """
+    读取若干计数器（按主键读取各槽位，与表大小无关）。
+    超过两个对账周期没有对账时返回 None（如关闭计数器一段时间后再开启，期间的写入没有计入）
+    """
+    names = list(names)
+    result = await session.execute(
+        select(EntityCounter.name, func.sum(EntityCounter.value))
+        .where(EntityCounter.name.in_([*names, RECONCILED_AT]))
+        .group_by(EntityCounter.name)
+    )
+    values = {name: int(value) for name, value in result.all()}
+    reconciled_at = values.pop(RECONCILED_AT, None)
+    if reconciled_at is None or time.time() - reconciled_at > 2 * settings.ENTITY_COUNTER_RECONCILE_INTERVAL:
+        return None
+    return {name: values.get(name, 0) for name in names}
+
+async def count_rows(session: AsyncSession) -> Dict[str, int]:
+    """按角色、状态分组统计用户和课程，得到全部计数器的实际值"""
+    counts = Counter()
+    for column, counter in ((User.role, user_counts), (Course.status, course_counts)):
+        result = await session.execute(select(column, func.count()).group_by(column))
+        for value, count in result.all():
+            counts.update(counter(value, count))
+    return dict(counts)
+
+async def reconcile_counts(session: AsyncSession) -> Optional[Dict[str, int]]:
+    """
+    按实际行数重写计数器，返回各计数器的偏差（实际值 - 计数器值）；其他进程正在对账时跳过并返回 None。
+    PostgreSQL 上以 EXCLUSIVE 模式锁住计数器表后再统计：已写入增量的事务须先提交，锁才能拿到，
+    其行已计入统计；尚未写入增量的事务会等到对账提交后再累加，也不会重复计数。
+    持锁期间写事务的提交会等待统计完成，对账周期不宜过短
+    """
+    if session.bind.dialect.name == "postgresql":
+        if not await session.scalar(text("SELECT pg_try_advisory_xact_lock(hashtext('entity_counters'))")):
+            return None
+        await session.execute(text("LOCK TABLE entity_counters IN EXCLUSIVE MODE"))
+    actual = await count_rows(session)
+    result = await session.execute(
+        select(EntityCounter.name, func.sum(EntityCounter.value))
+        .where(EntityCounter.name != RECONCILED_AT)
+        .group_by(EntityCounter.name)
+    )
+    stored = {name: int(value) for name, value in result.all()}
+    drift = {name: actual.get(name, 0) - stored.get(name, 0) for name in set(actual) | set(stored)}
+    await session.execute(delete(EntityCounter))
+    await session.execute(insert(EntityCounter), [
+        *({"name": name, "slot": 0, "value": value} for name, value in actual.items()),
+        {"name": RECONCILED_AT, "slot": 0, "value": int(time.time())},
+    ])
+    return {name: value for name, value in drift.items() if value}
+
+class CounterReconciler:
+    """后台定期对账，启动后立即执行第一次"""
+
+    def __init__(self, session_factory, interval: float):
+        self.session_factory = session_factory
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def reconcile(self) -> Optional[Dict[str, int]]:
+        async with self.session_factory() as session:
+            drift = await reconcile_counts(session)
+            await session.commit()
+        outcome = "skipped" if drift is None else "drift" if drift else "ok"
+        registry.counter("entity_counter_reconcile_total", "计数器对账次数", {"outcome": outcome}).inc()
+        if drift:
+            logger.warning(f"计数器与实际行数不一致，已校正: {drift}")
+        return drift
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await self.reconcile()
+            except Exception as e:
+                registry.counter("entity_counter_reconcile_total", "计数器对账次数", {"outcome": "error"}).inc()
+                logger.error(f"计数器对账失败: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def aclose(self):
+        """关闭时取消对账任务"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+counter_reconciler = CounterReconciler(AsyncSessionLocal, settings.ENTITY_COUNTER_RECONCILE_INTERVAL)
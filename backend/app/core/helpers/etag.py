@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
+from fastapi import Response
+
+# 响应因用户而异，只允许浏览器私有缓存，且每次使用前须用 If-None-Match 重新验证
+CACHE_CONTROL = "private, no-cache"
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+def make_etag(*parts: Any) -> str:
+    """由资源标识和版本号生成强 ETag，如 "12-3" """
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+def timestamp_etag(resource_id: Any, modified_at: datetime) -> str:
+    """由资源 id 和最后修改时间（微秒）生成强 ETag"""
+    if modified_at.tzinfo is None:
+        modified_at = modified_at.replace(tzinfo=timezone.utc)
+    return make_etag(resource_id, (modified_at - _EPOCH) // timedelta(microseconds=1))
+
+def parse_etag_list(header: Optional[str]) -> Optional[List[str]]:
+    """
+    解析 If-Match / If-None-Match 头，返回去掉引号的实体标签列表。
+    未携带时返回 None，"*" 原样保留；弱标签（W/ 前缀）保留前缀，由调用方决定是否参与比较。
+    """
+    if header is None:
+        return None
+    tags = []
+    for item in header.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        weak = item.startswith("W/")
+        value = item[2:] if weak else item
+        if value != "*":
+            value = value.strip('"')
+        tags.append(f"W/{value}" if weak else value)
+    return tags
+
+def versions_for(tags: List[str], resource_id: Any) -> List[int]:
+    """取出属于该资源的强标签中的版本号（If-Match 只做强比较，弱标签和格式不符的标签忽略）"""
+    versions = []
+    for tag in tags:
+        if tag.startswith("W/"):
+            continue
+        prefix, _, version = tag.rpartition("-")
+        if prefix == str(resource_id) and version.isdigit():
+            versions.append(int(version))
+    return versions
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 判定：弱比较（忽略 W/ 前缀），"*" 匹配任何已存在的表示"""
+    tags = parse_etag_list(if_none_match)
+    if not tags:
+        return False
+    current = etag.strip('"')
+    return any(tag == "*" or tag.removeprefix("W/") == current for tag in tags)
+
+def set_etag(response: Response, etag: Optional[str]):
+    """设置 ETag 和缓存策略；etag 为 None（资源不存在）时不设置"""
+    if etag:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
+
+def not_modified(etag: str) -> Response:
+    """304 响应，不带响应体"""
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
@@ -0,0 +1,44 @@
+from typing import Iterable, Optional, Set
+from app.core.config import settings
+from app.core.helpers.cache import TTLCache
+
+# 已被占用的用户名/邮箱。缓存是进程内的，其他进程删除用户或改名后不会失效，
+# 只能作为「可能已被占用」的提示：据此拒绝之前须先查询数据库确认
+taken_identity_cache = TTLCache(
+    "taken_identity",
+    maxsize=settings.IDENTITY_CACHE_SIZE,
+    ttl=settings.IDENTITY_CACHE_TTL,
+)
+
+def mark_taken(username: Optional[str] = None, email: Optional[str] = None):
+    """记录已被占用的用户名/邮箱"""
+    if username:
+        taken_identity_cache.set(("username", username), True)
+    if email:
+        taken_identity_cache.set(("email", email), True)
+
+def release(username: Optional[str] = None, email: Optional[str] = None):
+    """用户被删除或改名后释放旧的用户名/邮箱"""
+    if username:
+        taken_identity_cache.delete(("username", username))
+    if email:
+        taken_identity_cache.delete(("email", email))
+
+def is_username_taken(username: str) -> bool:
+    return taken_identity_cache.get(("username", username), False)
+
+def is_email_taken(email: str) -> bool:
+    return taken_identity_cache.get(("email", email), False)
+
+def remember(usernames: Iterable[str], emails: Iterable[str], taken_usernames: Set[str], taken_emails: Set[str]):
+    """按一次数据库查询的结果更新缓存：查到的记为已占用，查询了但未查到的释放（可能已被其他进程释放）"""
+    for username in usernames:
+        if username in taken_usernames:
+            mark_taken(username=username)
+        else:
+            release(username=username)
+    for email in emails:
+        if email in taken_emails:
+            mark_taken(email=email)
+        else:
+            release(email=email)
@@ -0,0 +1,110 @@
+import fnmatch
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+
+class LocalRedis:
+    """
+    进程内的 Redis 替身，实现 redis.asyncio 客户端的常用子集。
+    用于测试和单进程部署；多进程部署时请配置 REDIS_URL 使用真实 Redis。
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._data: Dict[str, Tuple[Any, Optional[float]]] = {}
+
+    def _alive(self, name: str):
+        entry = self._data.get(name)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= self._clock():
+            del self._data[name]
+            return None
+        return entry
+
+    async def get(self, name: str):
+        entry = self._alive(name)
+        return entry[0] if entry else None
+
+    async def set(self, name: str, value: Any, ex: Optional[float] = None, nx: bool = False):
+        if nx and self._alive(name):
+            return None
+        expires_at = self._clock() + ex if ex is not None else None
+        self._data[name] = (value, expires_at)
+        return True
+
+    async def exists(self, *names: str) -> int:
+        return sum(1 for name in names if self._alive(name))
+
+    async def delete(self, *names: str) -> int:
+        removed = 0
+        for name in names:
+            if self._alive(name):
+                del self._data[name]
+                removed += 1
+        return removed
+
+    async def incr(self, name: str, amount: int = 1) -> int:
+        entry = self._alive(name)
+        value, expires_at = entry if entry else (0, None)
+        value = int(value) + amount
+        self._data[name] = (value, expires_at)
+        return value
+
+    async def expire(self, name: str, seconds: float) -> bool:
+        entry = self._alive(name)
+        if not entry:
+            return False
+        self._data[name] = (entry[0], self._clock() + seconds)
+        return True
+
+    async def ttl(self, name: str) -> float:
+        entry = self._alive(name)
+        if not entry:
+            return -2
+        if entry[1] is None:
+            return -1
+        return entry[1] - self._clock()
+
+    def _zset(self, name: str) -> Dict[str, float]:
+        entry = self._alive(name)
+        return entry[0] if entry else {}
+
+    async def zadd(self, name: str, mapping: Dict[str, float]) -> int:
+        entry = self._alive(name)
+        zset, expires_at = entry if entry else ({}, None)
+        added = sum(1 for member in mapping if member not in zset)
+        zset.update({member: float(score) for member, score in mapping.items()})
+        self._data[name] = (zset, expires_at)
+        return added
+
+    async def zrangebyscore(self, name: str, min: Union[float, str], max: Union[float, str]) -> List[str]:
+        low, high = float(min), float(max)
+        members = sorted(self._zset(name).items(), key=lambda item: (item[1], item[0]))
+        return [member for member, score in members if low <= score <= high]
+
+    async def zremrangebyscore(self, name: str, min: Union[float, str], max: Union[float, str]) -> int:
+        low, high = float(min), float(max)
+        zset = self._zset(name)
+        removed = [member for member, score in zset.items() if low <= score <= high]
+        for member in removed:
+            del zset[member]
+        return len(removed)
+
+    async def scan_iter(self, match: Optional[str] = None) -> AsyncIterator[str]:
+        for name in list(self._data):
+            if self._alive(name) and (match is None or fnmatch.fnmatchcase(name, match)):
+                yield name
+
+    async def flushdb(self):
+        self._data.clear()
+
+def create_redis_client(url: Optional[str]):
+    """配置了 REDIS_URL 且安装了 redis 包时返回真实客户端，否则返回进程内替身"""
+    if url:
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("已配置 REDIS_URL，但未安装 redis 包")
+        return redis.from_url(url, decode_responses=True)
+    return LocalRedis()
@@ -0,0 +1,157 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 默认直方图桶（秒）
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelKey:
+    return tuple(sorted((labels or {}).items()))
+
+class Counter:
+    """单调递增计数器"""
+    def __init__(self, name: str, description: str = "", labels: LabelKey = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+class Gauge:
+    """可增可减的瞬时值"""
+    def __init__(self, name: str, description: str = "", labels: LabelKey = ()):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.value = 0
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+class Histogram:
+    """分桶直方图，记录耗时等分布"""
+    def __init__(self, name: str, description: str = "", labels: LabelKey = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self):
+        """统计代码块耗时"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+    def quantile(self, q: float) -> float:
+        """按桶上界估算分位数"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, self.bucket_counts):
+            seen += bucket_count
+            if seen >= target:
+                return bound
+        return float("inf")
+
+class MetricsRegistry:
+    """进程内指标注册表"""
+    def __init__(self):
+        self._metrics: Dict[Tuple[str, LabelKey], object] = {}
+        self._collectors: List[Callable[[], None]] = []
+
+    def register_collector(self, collector: Callable[[], None]):
+        """登记采集回调，导出前调用以刷新瞬时值（如连接池状态）"""
+        self._collectors.append(collector)
+
+    def _get_or_create(self, cls, name: str, description: str, labels, **kwargs):
+        key = (name, _label_key(labels))
+        metric = self._metrics.get(key)
+        if metric is None:
+            metric = cls(name, description, key[1], **kwargs)
+            self._metrics[key] = metric
+        return metric
+
+    def counter(self, name: str, description: str = "", labels: Optional[Dict[str, str]] = None) -> Counter:
+        return self._get_or_create(Counter, name, description, labels)
+
+    def gauge(self, name: str, description: str = "", labels: Optional[Dict[str, str]] = None) -> Gauge:
+        return self._get_or_create(Gauge, name, description, labels)
+
+    def histogram(self, name: str, description: str = "", labels: Optional[Dict[str, str]] = None,
+                  buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, description, labels, buckets=buckets)
+
+    def collect(self):
+        """返回当前所有指标对象"""
+        for collector in self._collectors:
+            collector()
+        return list(self._metrics.values())
+
+    def snapshot(self) -> Dict[str, object]:
+        """导出指标快照，便于调试或 JSON 输出"""
+        result = {}
+        for metric in self.collect():
+            label_text = ",".join(f"{k}={v}" for k, v in metric.labels)
+            key = f"{metric.name}{{{label_text}}}" if label_text else metric.name
+            if isinstance(metric, Histogram):
+                result[key] = {"count": metric.count, "sum": metric.sum}
+            else:
+                result[key] = metric.value
+        return result
+
+    def render_prometheus(self) -> str:
+        """按 Prometheus 文本格式导出"""
+        lines = []
+        described = set()
+        for metric in sorted(self.collect(), key=lambda m: m.name):
+            if metric.name not in described:
+                described.add(metric.name)
+                kind = {Counter: "counter", Gauge: "gauge", Histogram: "histogram"}[type(metric)]
+                if metric.description:
+                    lines.append(f"# HELP {metric.name} {metric.description}")
+                lines.append(f"# TYPE {metric.name} {kind}")
+            if isinstance(metric, Histogram):
+                cumulative = 0
+                for bound, bucket_count in zip(metric.buckets, metric.bucket_counts):
+                    cumulative += bucket_count
+                    lines.append(f"{metric.name}_bucket{_format_labels(metric.labels, le=repr(float(bound)))} {cumulative}")
+                lines.append(f"{metric.name}_bucket{_format_labels(metric.labels, le='+Inf')} {metric.count}")
+                lines.append(f"{metric.name}_sum{_format_labels(metric.labels)} {metric.sum}")
+                lines.append(f"{metric.name}_count{_format_labels(metric.labels)} {metric.count}")
+            else:
+                lines.append(f"{metric.name}{_format_labels(metric.labels)} {metric.value}")
+        return "\n".join(lines) + "\n"
+
+def _format_labels(labels: LabelKey, **extra: str) -> str:
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+registry = MetricsRegistry()
@@ -0,0 +1,22 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List
+from app.core.exceptions import ValidationException
+
+def encode_cursor(*values: Any) -> str:
+    """把排序键编码为不透明的游标，datetime 以 ISO 格式保存"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """解析游标，格式不正确时抛出 ValidationException"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValidationException("无效的分页游标")
+    if not isinstance(values, list):
+        raise ValidationException("无效的分页游标")
+    return values
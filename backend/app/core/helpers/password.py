@@ -0,0 +1,95 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+from passlib.context import CryptContext
+from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableException
+from app.core.helpers.metrics import registry
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+def hash_password(password: str) -> str:
+    """生成密码哈希（同步版本，在执行器中运行）"""
+    return pwd_context.hash(password)
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """验证密码（同步版本，在执行器中运行）"""
+    return pwd_context.verify(plain_password, hashed_password)
+
+def _timed_call(fn, *args):
+    """在工作线程/进程内执行并返回纯计算耗时"""
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+class PasswordHasher:
+    """有界的 bcrypt 执行器，避免哈希计算阻塞事件循环"""
+
+    def __init__(self, kind: str = "thread", max_workers: int = 4, max_queue: int = 64):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"不支持的执行器类型: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+
+        self._pending_gauge = registry.gauge("password_hash_pending", "排队及执行中的哈希任务数")
+        self._rejected = registry.counter("password_hash_rejected_total", "因队列已满被拒绝的哈希任务数")
+
+    @property
+    def queue_depth(self) -> int:
+        """等待空闲工作者的任务数"""
+        return max(0, self._pending - self.max_workers)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="password-hash"
+                )
+        return self._executor
+
+    async def _run(self, op: str, fn, *args):
+        if self._pending >= self.max_workers + self.max_queue:
+            self._rejected.inc()
+            raise ServiceUnavailableException("服务繁忙，请稍后重试")
+
+        self._pending += 1
+        self._pending_gauge.set(self._pending)
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, compute = await loop.run_in_executor(self._get_executor(), _timed_call, fn, *args)
+        finally:
+            self._pending -= 1
+            self._pending_gauge.set(self._pending)
+
+        total = time.perf_counter() - start
+        labels = {"op": op}
+        registry.histogram("password_hash_seconds", "哈希调用总耗时（含排队）", labels).observe(total)
+        registry.histogram("password_hash_wait_seconds", "哈希任务排队耗时", labels).observe(max(0.0, total - compute))
+        return result
+
+    async def hash(self, password: str) -> str:
+        """异步生成密码哈希"""
+        return await self._run("hash", hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """异步验证密码"""
+        return await self._run("verify", verify_password, plain_password, hashed_password)
+
+    def shutdown(self, wait: bool = True):
+        """关闭执行器"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+password_hasher = PasswordHasher(
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
@@ -0,0 +1,44 @@
+import hashlib
+import time
+from typing import Any, Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.helpers.cache import TTLCache
+
+# 已验证令牌 -> 当前用户信息；多进程部署时各进程独立，依赖 TTL 兜底一致性
+principal_cache = TTLCache(
+    "principal",
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+)
+
+def token_cache_key(token: str) -> str:
+    """令牌哈希，避免在内存中以明文作为键"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+def _user_tag(user_id: int) -> str:
+    return f"user:{user_id}"
+
+def get_cached_principal(token: str) -> Optional[Tuple[Optional[str], Any]]:
+    """读取已缓存的 (jti, 用户信息)"""
+    return principal_cache.get(token_cache_key(token))
+
+def cache_principal(token: str, payload: Dict[str, Any], principal: Any, user_id: int):
+    """缓存用户信息，过期时间取令牌 exp 与配置 TTL 的较小值"""
+    ttl = None
+    exp = payload.get("exp")
+    if exp is not None:
+        ttl = float(exp) - time.time()
+    principal_cache.set(
+        token_cache_key(token),
+        (payload.get("jti"), principal),
+        ttl=ttl,
+        tags=(_user_tag(user_id),),
+    )
+
+def invalidate_token(token: str):
+    """使单个令牌的缓存失效"""
+    principal_cache.delete(token_cache_key(token))
+
+def invalidate_user_principals(user_id: int) -> int:
+    """用户被修改或删除时，清除其所有令牌的缓存"""
+    return principal_cache.invalidate_tag(_user_tag(user_id))
@@ -0,0 +1,136 @@
+import ipaddress
+import math
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple, Union
+from fastapi import Request
+from app.core.config import settings
+from app.core.exceptions import RateLimitException
+from app.core.helpers.local_redis import create_redis_client
+from app.core.helpers.metrics import registry
+
+class BucketBackend(ABC):
+    """令牌桶存储接口"""
+
+    @abstractmethod
+    async def take(self, key: str, capacity: float, refill_rate: float) -> Tuple[bool, float]:
+        """尝试取出一个令牌，返回 (是否允许, 需等待的秒数)"""
+        pass
+
+class InMemoryBucketBackend(BucketBackend):
+    """进程内令牌桶，超过 max_keys 时按 LRU 淘汰"""
+
+    def __init__(self, max_keys: int = 100000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._evictions = registry.counter("rate_limit_bucket_evictions_total", "因容量淘汰的令牌桶数")
+
+    async def take(self, key: str, capacity: float, refill_rate: float) -> Tuple[bool, float]:
+        now = self._clock()
+        tokens, updated = self._buckets.pop(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill_rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+            self._evictions.inc()
+
+        retry_after = 0.0 if allowed else (1 - tokens) / refill_rate
+        return allowed, retry_after
+
+class RedisBucketBackend(BucketBackend):
+    """
+    多进程共享的限流存储（Redis 或 LocalRedis）。
+    用 INCR + EXPIRE 的固定窗口近似令牌桶：窗口长度为补满一桶所需的时间，窗口内最多 capacity 次。
+    """
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def take(self, key: str, capacity: float, refill_rate: float) -> Tuple[bool, float]:
+        window = max(1, math.ceil(capacity / refill_rate))
+        name = f"{self.prefix}{key}"
+        count = await self.client.incr(name)
+        if count == 1:
+            await self.client.expire(name, window)
+        if count <= capacity:
+            return True, 0.0
+        ttl = await self.client.ttl(name)
+        return False, float(ttl if ttl and ttl > 0 else window)
+
+class RateLimiter:
+    """按作用域（如 identity、ip）区分的令牌桶限流器"""
+
+    def __init__(self, name: str, backend: BucketBackend):
+        self.name = name
+        self.backend = backend
+
+    async def hit(self, scope: str, key: Optional[str], capacity: float, per_minute: float):
+        """消耗一个令牌，超限时抛出 RateLimitException"""
+        if not key or capacity <= 0 or per_minute <= 0:
+            return
+        labels = {"limiter": self.name, "scope": scope}
+        allowed, retry_after = await self.backend.take(f"{self.name}:{scope}:{key}", capacity, per_minute / 60)
+        if not allowed:
+            registry.counter("rate_limit_rejected_total", "被限流拒绝的请求数", labels).inc()
+            raise RateLimitException("尝试次数过多，请稍后再试", retry_after=max(1, math.ceil(retry_after)))
+        registry.counter("rate_limit_allowed_total", "通过限流的请求数", labels).inc()
+
+class LoginRateLimiter(RateLimiter):
+    """登录限流：同时按账号和客户端 IP 计数，在任何数据库或哈希操作之前调用"""
+
+    async def check(self, identity: Optional[str], ip: Optional[str]):
+        await self.hit("ip", ip, settings.LOGIN_IP_BURST, settings.LOGIN_IP_PER_MINUTE)
+        await self.hit(
+            "identity", identity.lower() if identity else None,
+            settings.LOGIN_IDENTITY_BURST, settings.LOGIN_IDENTITY_PER_MINUTE
+        )
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+def parse_networks(values: Iterable[str]) -> List[Network]:
+    """把 IP 或网段字符串解析为网段列表，单个 IP 视为 /32（IPv6 为 /128）"""
+    return [ipaddress.ip_network(value, strict=False) for value in values]
+
+def _trusted(address: str, networks: List[Network]) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+_trusted_proxies = parse_networks(settings.TRUSTED_PROXIES)
+
+def client_ip(request: Request, trusted_proxies: Optional[List[Network]] = None) -> Optional[str]:
+    """
+    请求的客户端 IP。直连方是受信任的代理时，从 X-Forwarded-For 末尾向前跳过受信任的代理，
+    返回第一个不受信任的地址（更靠前的条目可由客户端伪造，不予采信）；否则返回直连地址
+    """
+    networks = _trusted_proxies if trusted_proxies is None else trusted_proxies
+    peer = request.client.host if request.client else None
+    if peer is None or not networks or not _trusted(peer, networks):
+        return peer
+    hops = [hop.strip() for value in request.headers.getlist("x-forwarded-for") for hop in value.split(",")]
+    address = peer
+    for hop in reversed([hop for hop in hops if hop]):
+        address = hop
+        if not _trusted(hop, networks):
+            break
+    return address
+
+def create_bucket_backend(backend: str) -> BucketBackend:
+    """按配置创建限流存储"""
+    if backend == "memory":
+        return InMemoryBucketBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+    if backend == "redis":
+        return RedisBucketBackend(create_redis_client(settings.REDIS_URL))
+    raise ValueError(f"不支持的限流存储类型: {backend}")
+
+login_limiter = LoginRateLimiter("login", create_bucket_backend(settings.RATE_LIMIT_BACKEND))
+
@@ -0,0 +1,217 @@
+import asyncio
+import json
+import math
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+from app.core.config import settings
+from app.core.helpers.cache import TTLCache
+from app.core.helpers.local_redis import create_redis_client
+from app.core.helpers.metrics import registry
+
+class CacheBackend(ABC):
+    """
+    读缓存存储接口。值为可 JSON 序列化的普通数据（dict/list），None 表示未命中。
+    命名空间用「代数」失效：键中带有命名空间当前代数，递增代数即令该命名空间下的旧键全部失效，
+    旧键随 TTL 自然过期。
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Any:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: float):
+        pass
+
+    @abstractmethod
+    async def delete(self, *keys: str):
+        pass
+
+    @abstractmethod
+    async def generation(self, namespace: str) -> int:
+        pass
+
+    @abstractmethod
+    async def bump_generation(self, namespace: str):
+        pass
+
+    @abstractmethod
+    async def clear(self):
+        pass
+
+class LocalCacheBackend(CacheBackend):
+    """进程内 LRU 缓存，只在单进程内有效"""
+
+    def __init__(self, name: str, maxsize: int = 10000, ttl: float = 60.0, clock=time.monotonic):
+        self._cache = TTLCache(name, maxsize=maxsize, ttl=ttl, clock=clock)
+        self._generations: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Any:
+        # 命中率由 ReadThroughCache 统一统计
+        return self._cache.get(key, record=False)
+
+    async def set(self, key: str, value: Any, ttl: float):
+        self._cache.set(key, value, ttl=ttl)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._cache.delete(key)
+
+    async def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    async def bump_generation(self, namespace: str):
+        self._generations[namespace] = self._generations.get(namespace, 0) + 1
+
+    async def clear(self):
+        self._cache.clear()
+        self._generations.clear()
+
+class RedisCacheBackend(CacheBackend):
+    """多进程共享的缓存（Redis 或 LocalRedis），值以 JSON 存储，代数用 INCR 维护"""
+
+    def __init__(self, client, prefix: str = "cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Any:
+        raw = await self.client.get(f"{self.prefix}{key}")
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: float):
+        await self.client.set(f"{self.prefix}{key}", json.dumps(value), ex=max(1, math.ceil(ttl)))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.client.delete(*(f"{self.prefix}{key}" for key in keys))
+
+    async def generation(self, namespace: str) -> int:
+        return int(await self.client.get(f"{self.prefix}gen:{namespace}") or 0)
+
+    async def bump_generation(self, namespace: str):
+        await self.client.incr(f"{self.prefix}gen:{namespace}")
+
+    async def clear(self):
+        keys = [key async for key in self.client.scan_iter(match=f"{self.prefix}*")]
+        if keys:
+            await self.client.delete(*keys)
+
+class _LoadFailed(Exception):
+    """首个加载者失败，等待同一键的请求各自重新加载"""
+
+class ReadThroughCache:
+    """
+    读穿透缓存：未命中时调用 loader 读库并回填。
+    - 防击穿：同一进程内同一键只有一个 loader 在执行，其余请求等待其结果
+    - 防写回旧值：加载期间发生过失效，或仍在失效后的稳定期内（只读副本可能尚未追上），结果不回填
+    - TTL 随机浮动 ±jitter，避免同一批键同时过期
+    """
+
+    def __init__(self, name: str, backend: CacheBackend, ttl: float = 60.0, jitter: float = 0.1,
+                 settle: float = 0.0, clock=time.monotonic):
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.jitter = jitter
+        self.settle = settle
+        self._clock = clock
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._invalidations = 0
+        self._settled_at = 0.0
+
+        labels = {"cache": name}
+        self._hits = registry.counter("read_cache_hits_total", "读缓存命中次数", labels)
+        self._misses = registry.counter("read_cache_misses_total", "读缓存未命中（读库）次数", labels)
+        self._coalesced = registry.counter("read_cache_coalesced_total", "等待同键加载结果、未读库的次数", labels)
+        self._invalidated = registry.counter("read_cache_invalidations_total", "失效操作次数", labels)
+        self._hit_ratio = registry.gauge("read_cache_hit_ratio", "未读库的请求占比", labels)
+        registry.register_collector(self._collect)
+
+    async def key_for(self, key: str, namespace: Optional[str] = None) -> str:
+        """带上命名空间当前代数的完整键"""
+        if namespace is None:
+            return key
+        return f"{namespace}:{await self.backend.generation(namespace)}:{key}"
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]],
+                          namespace: Optional[str] = None) -> Any:
+        """读取缓存，未命中时加载并回填；loader 返回 None（如记录不存在）时不缓存"""
+        key = await self.key_for(key, namespace)
+        value = await self.backend.get(key)
+        if value is not None:
+            self._hits.inc()
+            return value
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            try:
+                value = await asyncio.shield(pending)
+                self._coalesced.inc()
+                return value
+            except _LoadFailed:
+                pass
+            self._misses.inc()
+            return await loader()
+
+        self._misses.inc()
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        invalidations = self._invalidations
+        try:
+            value = await loader()
+            if value is not None and invalidations == self._invalidations and self._clock() >= self._settled_at:
+                await self.backend.set(key, value, self._jittered_ttl())
+        except BaseException:
+            future.set_exception(_LoadFailed())
+            # 没有等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    async def invalidate(self, keys: Iterable[str] = (), namespaces: Iterable[str] = ()):
+        """删除指定键并使命名空间失效"""
+        self._invalidations += 1
+        self._settled_at = self._clock() + self.settle
+        self._invalidated.inc()
+        keys = tuple(keys)
+        if keys:
+            await self.backend.delete(*keys)
+        for namespace in namespaces:
+            await self.backend.bump_generation(namespace)
+
+    async def clear(self):
+        """清空缓存（测试和运维使用）"""
+        self._invalidations += 1
+        await self.backend.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """返回命中/未命中/合并请求统计及命中率"""
+        self._collect()
+        return {
+            "hits": self._hits.value,
+            "misses": self._misses.value,
+            "coalesced": self._coalesced.value,
+            "invalidations": self._invalidated.value,
+            "hit_ratio": self._hit_ratio.value,
+        }
+
+    def _jittered_ttl(self) -> float:
+        return self.ttl * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _collect(self):
+        served = self._hits.value + self._coalesced.value
+        total = served + self._misses.value
+        self._hit_ratio.set(served / total if total else 0.0)
+
+def create_cache_backend(backend: str, name: str, maxsize: int, ttl: float) -> CacheBackend:
+    """按配置创建读缓存存储"""
+    if backend == "memory":
+        return LocalCacheBackend(name, maxsize=maxsize, ttl=ttl)
+    if backend == "redis":
+        return RedisCacheBackend(create_redis_client(settings.REDIS_URL), prefix=f"cache:{name}:")
+    raise ValueError(f"不支持的缓存存储类型: {backend}")
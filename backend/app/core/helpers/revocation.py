@@ -0,0 +1,352 @@
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import List, Optional
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.helpers.local_redis import create_redis_client
+from app.core.helpers.metrics import registry
+from app.models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+class BloomFilter:
+    """布隆过滤器：判定为不存在时一定不存在"""
+
+    def __init__(self, capacity: int = 100000, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / self.capacity * math.log(2))))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+class RevocationStore(ABC):
+    """已吊销令牌的持久化存储接口"""
+
+    @abstractmethod
+    async def add(self, jti: str, expires_at: float):
+        """记录吊销，expires_at 为令牌过期的 Unix 时间戳"""
+        pass
+
+    @abstractmethod
+    async def contains(self, jti: str) -> bool:
+        """判断令牌是否已吊销"""
+        pass
+
+    @abstractmethod
+    async def purge_expired(self) -> int:
+        """清理已过期的记录，返回清理数量"""
+        pass
+
+    @abstractmethod
+    async def active_jtis(self) -> List[str]:
+        """返回仍在有效期内的吊销记录"""
+        pass
+
+    @abstractmethod
+    async def revoked_since(self, since: float) -> List[str]:
+        """返回 since（Unix 时间戳）之后写入、仍在有效期内的吊销记录，供各进程增量同步过滤器"""
+        pass
+
+class InMemoryRevocationStore(RevocationStore):
+    """进程内存储，适用于单进程部署和测试"""
+
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._entries = {}
+        self._revoked_at = {}
+
+    async def add(self, jti: str, expires_at: float):
+        self._entries[jti] = expires_at
+        self._revoked_at.setdefault(jti, self._clock())
+
+    async def contains(self, jti: str) -> bool:
+        expires_at = self._entries.get(jti)
+        return expires_at is not None and expires_at > self._clock()
+
+    async def purge_expired(self) -> int:
+        now = self._clock()
+        expired = [jti for jti, expires_at in self._entries.items() if expires_at <= now]
+        for jti in expired:
+            del self._entries[jti]
+            del self._revoked_at[jti]
+        return len(expired)
+
+    async def active_jtis(self) -> List[str]:
+        now = self._clock()
+        return [jti for jti, expires_at in self._entries.items() if expires_at > now]
+
+    async def revoked_since(self, since: float) -> List[str]:
+        now = self._clock()
+        return [
+            jti for jti, revoked_at in self._revoked_at.items()
+            if revoked_at >= since and self._entries[jti] > now
+        ]
+
+class SQLRevocationStore(RevocationStore):
+    """基于 revoked_tokens 表的存储，多进程共享"""
+
+    def __init__(self, session_factory):
+        self.session_factory = session_factory
+
+    async def add(self, jti: str, expires_at: float):
+        async with self.session_factory() as session:
+            await session.execute(
+                insert(RevokedToken)
+                .values(jti=jti, expires_at=datetime.fromtimestamp(expires_at, tz=timezone.utc))
+                .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+            )
+            await session.commit()
+
+    async def contains(self, jti: str) -> bool:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(RevokedToken.jti).where(
+                    RevokedToken.jti == jti,
+                    RevokedToken.expires_at > datetime.now(timezone.utc)
+                )
+            )
+            return result.scalar_one_or_none() is not None
+
+    async def purge_expired(self) -> int:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                delete(RevokedToken).where(RevokedToken.expires_at <= datetime.now(timezone.utc))
+            )
+            await session.commit()
+            return result.rowcount or 0
+
+    async def active_jtis(self) -> List[str]:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(RevokedToken.jti).where(RevokedToken.expires_at > datetime.now(timezone.utc))
+            )
+            return list(result.scalars().all())
+
+    async def revoked_since(self, since: float) -> List[str]:
+        # created_at 由数据库写入，与本进程时钟的偏差由调用方的重叠窗口吸收
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(RevokedToken.jti).where(
+                    RevokedToken.created_at >= datetime.fromtimestamp(since, tz=timezone.utc),
+                    RevokedToken.expires_at > datetime.now(timezone.utc)
+                )
+            )
+            return list(result.scalars().all())
+
+class RedisRevocationStore(RevocationStore):
+    """
+    基于 Redis（或 LocalRedis 替身）的存储，依赖键 TTL 自动过期。
+    另用一个以吊销时间为分数的有序集合记录吊销日志，供增量同步；日志保留 log_retention 秒，
+    落后更久的进程在下次整理时全量重建
+    """
+
+    def __init__(self, client, prefix: str = "revoked:", log_key: str = "revocation-log",
+                 log_retention: float = 3600.0):
+        self.client = client
+        self.prefix = prefix
+        self.log_key = log_key
+        self.log_retention = log_retention
+
+    async def add(self, jti: str, expires_at: float):
+        now = time.time()
+        ttl = expires_at - now
+        if ttl > 0:
+            await self.client.set(f"{self.prefix}{jti}", 1, ex=max(1, math.ceil(ttl)))
+            await self.client.zadd(self.log_key, {jti: now})
+
+    async def contains(self, jti: str) -> bool:
+        return bool(await self.client.exists(f"{self.prefix}{jti}"))
+
+    async def purge_expired(self) -> int:
+        # 吊销记录的过期由 Redis 负责，这里只截断吊销日志
+        await self.client.zremrangebyscore(self.log_key, "-inf", time.time() - self.log_retention)
+        return 0
+
+    async def active_jtis(self) -> List[str]:
+        return [key[len(self.prefix):] async for key in self.client.scan_iter(match=f"{self.prefix}*")]
+
+    async def revoked_since(self, since: float) -> List[str]:
+        # 日志中的条目可能已过期，加入过滤器也只会多一次存储查询
+        return list(await self.client.zrangebyscore(self.log_key, since, "+inf"))
+
+class TokenRevocationList:
+    """
+    令牌吊销列表。
+    先查询进程内布隆过滤器，未命中即判定未吊销，不访问存储；
+    命中后再查询存储以排除误判。过滤器是进程级的，每隔 sync_interval 秒
+    从存储增量拉取其他进程写入的吊销记录，因此其他进程吊销的令牌在本进程中
+    最多仍可用约 sync_interval 秒（加上一次同步查询的耗时）；本进程吊销的立即生效。
+    每隔 compact_interval 秒清理过期记录并从存储全量重建过滤器。
+    """
+
+    # 增量同步时回看的秒数，吸收进程间时钟偏差和提交延迟
+    sync_overlap = 5.0
+
+    def __init__(self, store: RevocationStore, capacity: int = 100000,
+                 error_rate: float = 0.001, compact_interval: float = 60.0,
+                 sync_interval: float = 5.0):
+        self.store = store
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.compact_interval = compact_interval
+        self.sync_interval = sync_interval
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._next_compact = time.monotonic() + compact_interval
+        self._compact_task: Optional[asyncio.Task] = None
+        self._revoked_during_compact: Optional[List[str]] = None
+        # 尚未同步过时首次同步拉取全部记录，启动时由预热完成
+        self._synced_until: Optional[float] = None
+        self._next_sync = 0.0
+        self._sync_task: Optional[asyncio.Task] = None
+
+        self._bloom_negative = registry.counter("token_revocation_bloom_negative_total", "布隆过滤器直接判定未吊销的次数")
+        self._store_lookups = registry.counter("token_revocation_store_lookups_total", "需要查询存储的次数")
+        self._false_positives = registry.counter("token_revocation_false_positive_total", "布隆过滤器误判次数")
+        self._synced = registry.counter("token_revocation_synced_total", "从存储同步到本进程过滤器的吊销记录数")
+
+    async def revoke(self, jti: Optional[str], expires_at: float):
+        """吊销令牌直至其过期"""
+        if not jti or expires_at <= time.time():
+            return
+        await self.store.add(jti, expires_at)
+        self._bloom.add(jti)
+        if self._revoked_during_compact is not None:
+            self._revoked_during_compact.append(jti)
+        self._maybe_sync()
+        self._maybe_compact()
+
+    async def is_revoked(self, jti: Optional[str]) -> bool:
+        """判断令牌是否已吊销"""
+        self._maybe_sync()
+        self._maybe_compact()
+        if not jti:
+            return False
+        if jti not in self._bloom:
+            self._bloom_negative.inc()
+            return False
+        self._store_lookups.inc()
+        revoked = await self.store.contains(jti)
+        if not revoked:
+            self._false_positives.inc()
+        return revoked
+
+    async def compact(self) -> int:
+        """清理过期记录并重建布隆过滤器"""
+        self._revoked_during_compact = []
+        try:
+            purged = await self.store.purge_expired()
+            jtis = await self.store.active_jtis()
+            # 整理期间新吊销的令牌可能不在快照中，需要一并加入
+            self._rebuild(jtis + self._revoked_during_compact)
+        finally:
+            self._revoked_during_compact = None
+        return purged
+
+    async def sync(self) -> int:
+        """把其他进程在上次同步之后写入的吊销记录加入过滤器，返回新加入的数量"""
+        started = time.time()
+        self._next_sync = time.monotonic() + self.sync_interval
+        since = 0.0 if self._synced_until is None else self._synced_until - self.sync_overlap
+        jtis = await self.store.revoked_since(since)
+        added = 0
+        for jti in jtis:
+            if jti not in self._bloom:
+                self._bloom.add(jti)
+                added += 1
+        # 与 revoke 相同：整理进行中时快照可能不含这些记录
+        if self._revoked_during_compact is not None:
+            self._revoked_during_compact.extend(jtis)
+        self._synced_until = started
+        self._synced.inc(added)
+        return added
+
+    def _rebuild(self, jtis: List[str]):
+        bloom = BloomFilter(max(self.capacity, len(jtis) * 2), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        self._bloom = bloom
+
+    def _maybe_compact(self):
+        if time.monotonic() < self._next_compact:
+            return
+        if self._compact_task is not None and not self._compact_task.done():
+            return
+        self._next_compact = time.monotonic() + self.compact_interval
+        try:
+            self._compact_task = asyncio.get_running_loop().create_task(self._run_compact())
+        except RuntimeError:
+            pass
+
+    def _maybe_sync(self):
+        if time.monotonic() < self._next_sync:
+            return
+        if self._sync_task is not None and not self._sync_task.done():
+            return
+        self._next_sync = time.monotonic() + self.sync_interval
+        try:
+            self._sync_task = asyncio.get_running_loop().create_task(self._run_sync())
+        except RuntimeError:
+            pass
+
+    async def aclose(self):
+        """关闭时取消进行中的同步和整理任务"""
+        for task in (self._sync_task, self._compact_task):
+            if task is not None and not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._sync_task = None
+        self._compact_task = None
+
+    async def _run_sync(self):
+        try:
+            await self.sync()
+        except Exception as e:
+            logger.error(f"吊销列表同步失败: {e}")
+
+    async def _run_compact(self):
+        try:
+            purged = await self.compact()
+            if purged:
+                logger.info(f"清理过期吊销记录 {purged} 条")
+        except Exception as e:
+            logger.error(f"吊销列表整理失败: {e}")
+
+def create_revocation_store(backend: str) -> RevocationStore:
+    """按配置创建吊销存储"""
+    if backend == "memory":
+        return InMemoryRevocationStore()
+    if backend == "sql":
+        return SQLRevocationStore(AsyncSessionLocal)
+    if backend == "redis":
+        return RedisRevocationStore(create_redis_client(settings.REDIS_URL))
+    raise ValueError(f"不支持的吊销存储类型: {backend}")
+
+revocation_list = TokenRevocationList(
+    create_revocation_store(settings.TOKEN_REVOCATION_BACKEND),
+    capacity=settings.TOKEN_REVOCATION_BLOOM_CAPACITY,
+    compact_interval=settings.TOKEN_REVOCATION_COMPACT_INTERVAL,
+    sync_interval=settings.TOKEN_REVOCATION_SYNC_INTERVAL,
+)
@@ -0,0 +1,47 @@
+from functools import lru_cache
+from typing import Any, Iterable, List, Optional, Type
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时退回标准库 json
+    orjson = None
+
+class FastJSONResponse(JSONResponse):
+    """安装了 orjson 时用其渲染 JSON，否则与 JSONResponse 相同"""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content)
+
+@lru_cache(maxsize=None)
+def type_adapter(tp: Any) -> TypeAdapter:
+    """按类型缓存 TypeAdapter，避免每次请求重新构建校验器"""
+    return TypeAdapter(tp)
+
+def validate_list(model: Type[BaseModel], rows: Iterable[Any]) -> List[BaseModel]:
+    """
+    将查询结果一次性校验为响应模型列表。
+    Row / namedtuple 先按字段名转为 dict（比 _asdict() 和按属性读取都快得多），ORM 对象按属性读取。
+    同一列表中的 Row 来自同一查询，字段名只取一次。
+    """
+    items, row_type, fields = [], None, None
+    for row in rows:
+        if type(row) is not row_type:
+            row_type = type(row)
+            fields = getattr(row, "_fields", None)
+        items.append(dict(zip(fields, row)) if fields is not None else row)
+    return type_adapter(List[model]).validate_python(items, from_attributes=True)
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[dict] = None) -> FastJSONResponse:
+    """
+    直接渲染已校验的响应模型（或其列表），跳过 FastAPI 按 response_model 的再次校验和 jsonable_encoder。
+    response_model 仍保留在路由上用于生成接口文档。
+    """
+    if isinstance(content, BaseModel):
+        content = content.model_dump(mode="json")
+    elif isinstance(content, list) and content and isinstance(content[0], BaseModel):
+        content = type_adapter(List[type(content[0])]).dump_python(content, mode="json")
+    return FastJSONResponse(content, status_code=status_code, headers=headers)
@@ -0,0 +1,107 @@
+import codecs
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Sequence, Tuple
+from app.core.exceptions import ValidationException
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时退回标准库 json
+    orjson = None
+
+# 单条记录（一行 NDJSON 或一条可能跨行的 CSV 记录）的最大长度，防止没有换行的上传占满内存
+MAX_RECORD_CHARS = 1 << 20
+
+# 逐条读取上传内容时产出的 (起始行号, 记录字段, 错误信息)，解析失败时记录为 None
+Record = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """
+    把字节流按行切分，产出 (行号, 行内容)，行内容保留行尾换行符。
+    增量解码，跨块截断的多字节字符和行都能正确拼接；开头的 UTF-8 BOM 会被去掉
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer, line_no = "", 0
+    try:
+        async for chunk in chunks:
+            buffer += decoder.decode(chunk)
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                line_no += 1
+                yield line_no, line + "\n"
+            if len(buffer) > MAX_RECORD_CHARS:
+                raise ValidationException(f"第 {line_no + 1} 行过长")
+        buffer += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise ValidationException(f"第 {line_no + 1} 行不是有效的 UTF-8 编码")
+    if buffer:
+        yield line_no + 1, buffer
+
+async def read_csv_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    """
+    逐条解析带表头的 CSV，空单元格视为 None。
+    引号内的换行会让一条记录跨多行，按引号是否配对判断记录是否结束
+    """
+    header, pending, start = None, "", 0
+    async for line_no, line in iter_lines(chunks):
+        if not pending:
+            start = line_no
+        pending += line
+        if pending.count('"') % 2:
+            if len(pending) > MAX_RECORD_CHARS:
+                raise ValidationException(f"第 {start} 行起的记录过长")
+            continue
+        text, pending = pending, ""
+        if not text.strip():
+            continue
+        try:
+            values = next(csv.reader([text]))
+        except csv.Error as e:
+            yield start, None, f"CSV 格式错误: {e}"
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield start, None, f"列数为 {len(values)}，与表头的 {len(header)} 列不一致"
+            continue
+        yield start, {name: value if value != "" else None for name, value in zip(header, values)}, None
+    if pending:
+        yield start, None, "CSV 格式错误: 引号未闭合"
+
+async def read_ndjson_records(chunks: AsyncIterator[bytes]) -> AsyncIterator[Record]:
+    """逐行解析 NDJSON，每个非空行须为一个 JSON 对象"""
+    async for line_no, line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            value = json.loads(line)
+        except ValueError:
+            yield line_no, None, "JSON 格式错误"
+            continue
+        if not isinstance(value, dict):
+            yield line_no, None, "每行须为一个 JSON 对象"
+            continue
+        yield line_no, value, None
+
+def _text(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+def encode_csv(rows: Iterable[Sequence[Any]]) -> str:
+    """把一批行编码为 CSV 文本，None 写为空单元格，datetime 写为 ISO 格式"""
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerows([_text(value) for value in row] for row in rows)
+    return output.getvalue()
+
+def encode_ndjson(columns: List[str], rows: Iterable[Sequence[Any]]) -> str:
+    """把一批行编码为 NDJSON 文本，每行一个以列名为键的对象"""
+    if orjson is not None:
+        # orjson 原生支持 datetime，输出为 RFC 3339 格式
+        return "".join(orjson.dumps(dict(zip(columns, row))).decode() + "\n" for row in rows)
+    return "".join(
+        json.dumps({column: _text(value) for column, value in zip(columns, row)}, ensure_ascii=False) + "\n"
+        for row in rows
+    )
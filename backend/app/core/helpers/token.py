@@ -1,12 +1,15 @@
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
+import hashlib
+import secrets
+import uuid
 import jwt
 from app.core.config import settings
 
 # JWT配置
 SECRET_KEY = settings.SECRET_KEY
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+ACCESS_TOKEN_EXPIRE_MINUTES = settings.ACCESS_TOKEN_EXPIRE_MINUTES
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None):
     """创建访问令牌"""
@@ -16,7 +19,7 @@ def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta]
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -35,4 +38,21 @@ def get_user_id_from_token(token: str) -> Optional[int]:
         user_id = payload.get("sub")
         return int(user_id) if user_id else None
     except (ValueError, TypeError):
-        return None 
+        return None
+
+def peek_subject(token: str) -> Optional[str]:
+    """不校验签名读取 sub，仅用于路由等非鉴权场景"""
+    try:
+        payload = jwt.decode(token, options={"verify_signature": False})
+    except jwt.InvalidTokenError:
+        return None
+    subject = payload.get("sub")
+    return str(subject) if subject is not None else None
+
+def create_refresh_token() -> str:
+    """生成不透明的刷新令牌"""
+    return secrets.token_urlsafe(32)
+
+def hash_refresh_token(token: str) -> str:
+    """刷新令牌只以哈希形式存储"""
+    return hashlib.sha256(token.encode()).hexdigest()
@@ -0,0 +1,99 @@
+import logging
+import os
+import random
+import sys
+import time
+from functools import lru_cache
+from typing import Optional
+from sqlalchemy import event
+from app.core.config import settings
+from app.core.helpers.metrics import registry
+
+logger = logging.getLogger("app.sql")
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_THIS_FILE = os.path.abspath(__file__)
+
+def _iter_frames(frame):
+    """遍历调用栈；异步驱动下 SQL 在子 greenlet 中执行，需要继续遍历父 greenlet 的栈"""
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+    try:
+        import greenlet
+    except ImportError:
+        return
+    parent = greenlet.getcurrent().parent
+    while parent is not None:
+        frame = parent.gr_frame
+        while frame is not None:
+            yield frame
+            frame = frame.f_back
+        parent = parent.parent
+
+@lru_cache(maxsize=4096)
+def _app_module(code) -> Optional[str]:
+    """代码对象属于业务代码时返回其模块名，否则返回 None；按代码对象缓存，遍历栈时每帧只需一次字典查找"""
+    filename = code.co_filename
+    if filename.startswith(_APP_DIR) and filename != _THIS_FILE:
+        return os.path.splitext(os.path.basename(filename))[0]
+    return None
+
+def find_caller() -> str:
+    """定位发起 SQL 的业务代码（通常是仓库方法），形如 SQLAlchemyCourseRepository.get_course_by_id"""
+    for frame in _iter_frames(sys._getframe(1)):
+        module = _app_module(frame.f_code)
+        if module is not None:
+            owner = frame.f_locals.get("self")
+            prefix = type(owner).__name__ if owner is not None else module
+            return f"{prefix}.{frame.f_code.co_name}"
+    return "unknown"
+
+class SQLInstrumentation:
+    """
+    基于引擎事件的 SQL 观测：记录每条语句的耗时和行数，只输出慢查询或抽样语句。
+    调用方需遍历调用栈才能确定，只在语句确定要输出时才查找
+    """
+
+    def __init__(self, slow_threshold_ms: float = 200.0, sample_rate: float = 0.0):
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.sample_rate = sample_rate
+
+    def attach(self, engine):
+        """挂载到引擎，支持同步引擎和 AsyncEngine"""
+        target = getattr(engine, "sync_engine", engine)
+        event.listen(target, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(target, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(target, "handle_error", self._handle_error)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        rowcount = getattr(cursor, "rowcount", -1)
+        self.record(statement, elapsed, rowcount)
+
+    def _handle_error(self, exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+        registry.counter("sql_errors_total", "执行失败的 SQL 语句数").inc()
+
+    def record(self, statement: str, elapsed: float, rowcount: int, caller: Optional[str] = None):
+        registry.histogram("sql_statement_seconds", "SQL 语句耗时").observe(elapsed)
+        if rowcount is not None and rowcount >= 0:
+            registry.counter("sql_rows_total", "SQL 语句影响或返回的行数").inc(rowcount)
+
+        if elapsed >= self.slow_threshold:
+            caller = caller or find_caller()
+            registry.counter("sql_slow_statements_total", "慢查询数", {"method": caller}).inc()
+            logger.warning(f"慢查询 {elapsed * 1000:.1f}ms [{caller}] rows={rowcount}: {statement}")
+        elif self.sample_rate and random.random() < self.sample_rate:
+            caller = caller or find_caller()
+            logger.info(f"SQL {elapsed * 1000:.1f}ms [{caller}] rows={rowcount}: {statement}")
+
+sql_instrumentation = SQLInstrumentation(
+    slow_threshold_ms=settings.SQL_SLOW_QUERY_MS,
+    sample_rate=settings.SQL_LOG_SAMPLE_RATE,
+)
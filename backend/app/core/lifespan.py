@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from app.core.admission import admission_controller
+from app.core.config import settings
+from app.core.database import ReadSessionLocal, all_engines, replica_router
+from app.core.helpers.counters import counter_reconciler
+from app.core.helpers.metrics import registry
+from app.core.helpers.password import password_hasher
+from app.core.helpers.revocation import revocation_list
+
+logger = logging.getLogger(__name__)
+
+class Lifecycle:
+    """进程生命周期状态，供就绪检查使用"""
+
+    def __init__(self):
+        self.ready = False
+        self.draining = False
+
+lifecycle = Lifecycle()
+
+async def warm_pool(engine: AsyncEngine, connections: int):
+    """同时打开若干连接，归还后留在池中供首批请求使用"""
+    async def open_one():
+        conn = await engine.connect()
+        try:
+            await conn.execute(text("SELECT 1"))
+        except BaseException:
+            await conn.close()
+            raise
+        return conn
+
+    count = min(connections, engine.pool.size())
+    results = await asyncio.gather(*(open_one() for _ in range(count)), return_exceptions=True)
+    for result in results:
+        if not isinstance(result, BaseException):
+            await result.close()
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        raise errors[0]
+
+async def warm_queries(engine: AsyncEngine):
+    """用哨兵参数执行热点查询，填充语句编译缓存和驱动的预处理语句缓存"""
+    from app.auth.adapter.repository import SQLAlchemyAuthRepository
+    from app.course.adapter.repository import SQLAlchemyCourseRepository
+    from app.teacher.adapter.repository import SQLAlchemyTeacherRepository
+    from app.models.user import User
+
+    async with ReadSessionLocal(bind=engine) as session:
+        auth_repo = SQLAlchemyAuthRepository(session)
+        await auth_repo.get_user_by_email("")
+        await auth_repo.get_user_by_id(0)
+        await auth_repo.get_taken_identities([""], [""])
+        await auth_repo.get_refresh_token_with_user("")
+        await session.get(User, 0)
+
+        course_repo = SQLAlchemyCourseRepository(session)
+        await course_repo.get_course_by_id(0)
+        await course_repo.list_courses(limit=1, filters={"teacher_id": 0})
+        await course_repo.list_courses(limit=1, filters={"teacher_id": 0, "status": "active"})
+        await course_repo.list_courses(limit=1, after=(datetime.now(timezone.utc), 0))
+        await course_repo.search_courses("warmup", limit=1)
+
+        teacher_repo = SQLAlchemyTeacherRepository(session)
+        await teacher_repo.get_course_objective(0)
+        await teacher_repo.get_course_syllabus(0)
+        await teacher_repo.get_course_material(0)
+        await session.rollback()
+
+async def warm_password_hasher():
+    """每个工作者各计算一次哈希，加载 bcrypt 后端并创建线程/进程"""
+    await asyncio.gather(*(password_hasher.hash("warmup") for _ in range(password_hasher.max_workers)))
+
+def warm_serializers(app: FastAPI):
+    """生成 OpenAPI 文档，并序列化热点响应模型、构建列表接口的 TypeAdapter"""
+    from app.admin.application.schema import UserResponse
+    from app.auth.application.schema import LoginResponse, UserInfo
+    from app.course.application.schema import CourseResponse
+    from app.core.helpers.serialization import validate_list
+    from app.user.application.schema import UserRead
+
+    app.openapi()
+    now = datetime.now(timezone.utc)
+    UserInfo(id=0, username="warmup", email="warmup@example.com", role="teacher").model_dump_json()
+    LoginResponse(token="warmup", userId=0, username="warmup", role="teacher").model_dump_json()
+    CourseResponse(id=0, title="warmup", teacher_id=0, status="active", created_at=now).model_dump_json()
+    for model in (CourseResponse, UserResponse, UserRead):
+        validate_list(model, [])
+
+async def _step(name: str, coro):
+    """执行单个预热步骤；失败只记录日志，不阻止启动（数据库可用性由就绪检查负责）"""
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(coro, timeout=settings.WARMUP_TIMEOUT)
+        logger.info(f"预热 {name} 完成，耗时 {(time.perf_counter() - start) * 1000:.0f}ms")
+    except Exception as e:
+        logger.warning(f"预热 {name} 失败: {e!r}")
+    finally:
+        registry.histogram("startup_warmup_seconds", "启动预热各步骤耗时", {"step": name}).observe(
+            time.perf_counter() - start
+        )
+
+async def warm_up(app: FastAPI):
+    for engine in all_engines():
+        label = engine.pool.label
+        await _step(f"pool:{label}", warm_pool(engine, settings.WARMUP_POOL_CONNECTIONS))
+        await _step(f"queries:{label}", warm_queries(engine))
+    await _step("password_hasher", warm_password_hasher())
+    await _step("revocation_list", revocation_list.sync())
+    await _step("serializers", asyncio.to_thread(warm_serializers, app))
+
+async def drain(timeout: float):
+    """等待进行中的请求完成"""
+    deadline = time.monotonic() + timeout
+    while admission_controller.in_flight > 0 and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    if admission_controller.in_flight > 0:
+        logger.warning(f"关闭时仍有 {admission_controller.in_flight} 个请求未完成")
+
+async def shutdown():
+    lifecycle.ready = False
+    lifecycle.draining = True
+    await drain(settings.SHUTDOWN_DRAIN_TIMEOUT)
+    await counter_reconciler.aclose()
+    await replica_router.aclose()
+    await revocation_list.aclose()
+    for engine in all_engines():
+        await engine.dispose()
+    await asyncio.to_thread(password_hasher.shutdown, True)
+    logger.info("已释放数据库连接和哈希执行器")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """启动时预热，完成后才报告就绪并开始计数器对账；关闭时排空请求并释放资源"""
+    lifecycle.ready = False
+    lifecycle.draining = False
+    if settings.WARMUP_ENABLED:
+        await warm_up(app)
+    if settings.ENTITY_COUNTERS_ENABLED:
+        # 启动后立即对账一次，之后每 ENTITY_COUNTER_RECONCILE_INTERVAL 秒一次
+        counter_reconciler.start()
+    lifecycle.ready = True
+    try:
+        yield
+    finally:
+        await shutdown()
@@ -0,0 +1,86 @@
+import time
+from typing import Any, Dict
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.helpers.metrics import registry
+
+# 获取连接等待时间的直方图桶（秒），覆盖到 pool_timeout 的量级
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """
+    带观测的连接池：记录获取连接的等待时间、超时次数、等待者数量和连接年龄。
+    通过 create_async_engine(poolclass=InstrumentedAsyncPool) 使用，label 区分主库和各副本。
+    """
+
+    label = "primary"
+
+    def __init__(self, creator, *args, **kwargs):
+        super().__init__(creator, *args, **kwargs)
+        self.waiters = 0
+        self._connected_at: Dict[int, float] = {}
+        event.listen(self, "connect", self._on_connect)
+        event.listen(self, "close", self._on_close)
+        event.listen(self, "close_detached", self._on_close_detached)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.label = self.label
+        return pool
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self._connected_at[id(dbapi_connection)] = time.monotonic()
+
+    def _on_close(self, dbapi_connection, connection_record):
+        self._connected_at.pop(id(dbapi_connection), None)
+
+    def _on_close_detached(self, dbapi_connection):
+        self._connected_at.pop(id(dbapi_connection), None)
+
+    def _do_get(self):
+        labels = {"pool": self.label}
+        self.waiters += 1
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            registry.counter("db_pool_checkout_timeouts_total", "获取连接超时次数", labels).inc()
+            raise
+        finally:
+            self.waiters -= 1
+            registry.histogram(
+                "db_pool_checkout_wait_seconds", "获取连接的等待时间", labels, buckets=WAIT_BUCKETS
+            ).observe(time.perf_counter() - start)
+
+    def stats(self) -> Dict[str, Any]:
+        """连接池当前状态"""
+        now = time.monotonic()
+        ages = [now - connected_at for connected_at in self._connected_at.values()]
+        wait = registry.histogram("db_pool_checkout_wait_seconds", labels={"pool": self.label}, buckets=WAIT_BUCKETS)
+        checked_out = self.checkedout()
+        capacity = self.size() + self._max_overflow
+        return {
+            "size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": checked_out,
+            "idle": self.checkedin(),
+            "overflow": max(0, self.overflow()),
+            "waiters": self.waiters,
+            "saturated": capacity > 0 and checked_out >= capacity,
+            "connections": len(ages),
+            "oldest_connection_age": round(max(ages), 3) if ages else 0.0,
+            "checkout_wait_p50": wait.quantile(0.5),
+            "checkout_wait_p99": wait.quantile(0.99),
+        }
+
+    def export_metrics(self):
+        """把连接池状态写入指标注册表"""
+        labels = {"pool": self.label}
+        stats = self.stats()
+        registry.gauge("db_pool_size", "连接池常驻连接数", labels).set(stats["size"])
+        registry.gauge("db_pool_checked_out", "已借出的连接数", labels).set(stats["checked_out"])
+        registry.gauge("db_pool_overflow", "超出常驻数量的溢出连接数", labels).set(stats["overflow"])
+        registry.gauge("db_pool_waiters", "正在等待连接的请求数", labels).set(stats["waiters"])
+        registry.gauge("db_pool_oldest_connection_age_seconds", "最老连接的存活时间", labels).set(
+            stats["oldest_connection_age"]
+        )
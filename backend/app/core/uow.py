@@ -0,0 +1,132 @@
+import inspect
+import logging
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, List, Optional
+from fastapi import HTTPException, Request
+from fastapi.routing import APIRoute
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+_current_uow: ContextVar[Optional["UnitOfWork"]] = ContextVar("current_uow", default=None)
+
+class UnitOfWork:
+    """
+    工作单元：一次请求对应一个事务。
+    仓库只 flush 不提交，请求处理成功后统一提交，失败时回滚。
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+        self.completed = False
+        # 请求失败时是否仍提交（见 commit_on_failure）
+        self.keep_on_failure = False
+        self._callbacks: List[Callable[[], Any]] = []
+        self._before_commit: List[Callable[[], Awaitable[Any]]] = []
+
+    def bind(self):
+        """设为当前上下文的工作单元，供 on_commit 使用"""
+        _current_uow.set(self)
+        return self
+
+    def on_commit(self, callback: Callable[[], Any]):
+        """登记提交成功后执行的回调（如缓存失效），回滚时丢弃；回调可以是协程函数"""
+        self._callbacks.append(callback)
+
+    def before_commit(self, callback: Callable[[], Awaitable[Any]]):
+        """登记提交前在同一事务中执行的协程函数（如累加计数器），出错时不提交，由调用方回滚"""
+        self._before_commit.append(callback)
+
+    async def commit(self):
+        if self.completed:
+            return
+        before, self._before_commit = self._before_commit, []
+        for callback in before:
+            await callback()
+        self.completed = True
+        await self.session.commit()
+        callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                result = callback()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"提交后回调执行失败: {e}")
+
+    async def fail(self):
+        """请求失败时结束工作单元：通常回滚；登记过 commit_on_failure 时改为提交，在错误响应发出之前持久化"""
+        if self.keep_on_failure:
+            await self.commit()
+        else:
+            await self.rollback()
+
+    async def rollback(self):
+        if self.completed:
+            return
+        self.completed = True
+        self._callbacks.clear()
+        self._before_commit.clear()
+        await self.session.rollback()
+
+def current_uow() -> Optional[UnitOfWork]:
+    return _current_uow.get()
+
+def on_commit(callback: Callable[[], None]):
+    """当前请求提交后执行回调；不在工作单元中（如脚本、单元测试）时立即执行"""
+    uow = _current_uow.get()
+    if uow is None or uow.completed:
+        callback()
+    else:
+        uow.on_commit(callback)
+
+async def on_commit_async(callback: Callable[[], Awaitable[Any]]):
+    """on_commit 的异步版本：不在工作单元中时立即等待回调完成"""
+    uow = _current_uow.get()
+    if uow is None or uow.completed:
+        await callback()
+    else:
+        uow.on_commit(callback)
+
+def commit_on_failure():
+    """
+    当前请求随后失败（如以 401 拒绝）时仍提交已执行的写入，用于拒绝请求本身就需要持久化的操作，
+    如检测到刷新令牌重复使用时吊销令牌族。不在工作单元中时不做处理
+    """
+    uow = _current_uow.get()
+    if uow is not None:
+        uow.keep_on_failure = True
+
+class UnitOfWorkRoute(APIRoute):
+    """
+    在响应发送前提交请求的工作单元。
+    yield 依赖的清理代码要到响应发送之后才执行，若在 get_db 中提交，
+    提交失败时客户端已经收到成功响应。
+    """
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request):
+            try:
+                response = await handler(request)
+            except Exception:
+                uow = getattr(request.state, "uow", None)
+                if uow is not None:
+                    await uow.fail()
+                raise
+
+            uow = getattr(request.state, "uow", None)
+            if uow is not None:
+                if response.status_code >= 400:
+                    await uow.fail()
+                else:
+                    try:
+                        await uow.commit()
+                    except Exception as e:
+                        logger.error(f"事务提交失败: {e}")
+                        await uow.session.rollback()
+                        raise HTTPException(status_code=500, detail="数据保存失败")
+            return response
+
+        return route_handler
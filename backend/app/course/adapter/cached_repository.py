@@ -0,0 +1,160 @@
+import json
+from collections import namedtuple
+from datetime import datetime
+from typing import Any, AsyncIterator, Collection, Dict, List, Optional, Sequence, Tuple
+from app.core.config import settings
+from app.core.helpers.read_cache import ReadThroughCache, create_cache_backend
+from app.core.uow import on_commit_async
+from app.course.domain.repository import CourseRepository
+from app.models.course import Course
+
+_COLUMNS = [column.key for column in Course.__table__.columns]
+_DATETIME_COLUMNS = {"created_at", "updated_at"}
+# 列表缓存命中时返回的只读行，与 SQLAlchemyCourseRepository.list_courses 返回的 Row 字段相同
+CourseRow = namedtuple("CourseRow", _COLUMNS)
+
+course_cache = ReadThroughCache(
+    "course",
+    create_cache_backend(settings.COURSE_CACHE_BACKEND, "course",
+                         maxsize=settings.COURSE_CACHE_SIZE, ttl=settings.COURSE_CACHE_TTL),
+    ttl=settings.COURSE_CACHE_TTL,
+    # 配置了只读副本时，失效后在读己之写窗口内不回填，避免把副本上的旧数据写回缓存
+    settle=settings.READ_YOUR_WRITES_WINDOW if settings.DATABASE_READ_REPLICA_URLS else 0.0,
+)
+
+def _dump(course: Course) -> Dict[str, Any]:
+    data = {key: getattr(course, key) for key in _COLUMNS}
+    for key in _DATETIME_COLUMNS:
+        if data[key] is not None:
+            data[key] = data[key].isoformat()
+    return data
+
+def _parse(data: Dict[str, Any]) -> Dict[str, Any]:
+    data = dict(data)
+    for key in _DATETIME_COLUMNS:
+        if data.get(key) is not None:
+            data[key] = datetime.fromisoformat(data[key])
+    return data
+
+def _load(data: Dict[str, Any]) -> Course:
+    # 每次返回新的游离对象，调用方修改不会影响缓存内容
+    return Course(**_parse(data))
+
+def _load_row(data: Dict[str, Any]) -> CourseRow:
+    return CourseRow(**_parse(data))
+
+def _detail_key(course_id: int) -> str:
+    return f"id:{course_id}"
+
+def _version_key(course_id: int) -> str:
+    return f"version:{course_id}"
+
+def _teacher_namespace(teacher_id: int) -> str:
+    return f"teacher:{teacher_id}"
+
+def _list_key(limit: int, after, filters: Dict[str, Any], descending: bool) -> str:
+    return "list:" + json.dumps([limit, after, filters, descending], sort_keys=True, default=str)
+
+class CachedCourseRepository(CourseRepository):
+    """
+    带读穿透缓存的课程仓库，包装实际的仓库实现。
+    缓存课程详情、版本号和按教师筛选的列表页；写操作在事务提交后精确失效：
+    详情和版本号按课程 id 删除，列表按教师递增代数。全局列表、计数和搜索不缓存。
+    """
+
+    def __init__(self, repository: CourseRepository, cache: ReadThroughCache = course_cache):
+        self.repository = repository
+        self.cache = cache
+
+    async def get_course_by_id(self, course_id: int):
+        async def load():
+            course = await self.repository.get_course_by_id(course_id)
+            return _dump(course) if course else None
+
+        data = await self.cache.get_or_load(_detail_key(course_id), load)
+        return _load(data) if data else None
+
+    async def get_course_workspace(self, course_id: int, with_content: Collection[str] = ()):
+        # 教学内容由教学内容模块写入，不在此失效，工作台不缓存
+        return await self.repository.get_course_workspace(course_id, with_content)
+
+    async def get_course_version(self, course_id: int) -> Optional[int]:
+        # 版本号单独缓存，未命中时只查版本号一列，不为条件请求加载整行
+        return await self.cache.get_or_load(_version_key(course_id),
+                                            lambda: self.repository.get_course_version(course_id))
+
+    async def create_course(self, course_data: Dict[str, Any]):
+        course = await self.repository.create_course(course_data)
+        await self._invalidate_after_commit(course_ids=(), teacher_ids=(course.teacher_id,))
+        return course
+
+    async def update_course(self, course_id: int, course_data: Dict[str, Any],
+                            expected_versions: Optional[List[int]] = None):
+        course = await self.repository.update_course(course_id, course_data, expected_versions)
+        await self._invalidate_after_commit(course_ids=(course_id,), teacher_ids=(course.teacher_id,))
+        return course
+
+    async def delete_course(self, course_id: int):
+        course = await self.repository.delete_course(course_id)
+        if course:
+            await self._invalidate_after_commit(course_ids=(course_id,), teacher_ids=(course.teacher_id,))
+        return course
+
+    async def delete_courses(self, course_ids: List[int]) -> List[Tuple[int, int]]:
+        deleted = await self.repository.delete_courses(course_ids)
+        if deleted:
+            await self._invalidate_after_commit(course_ids=[course_id for course_id, _ in deleted],
+                                                teacher_ids={teacher_id for _, teacher_id in deleted})
+        return deleted
+
+    def savepoint(self):
+        return self.repository.savepoint()
+
+    async def insert_courses(self, rows: List[Dict[str, Any]]) -> None:
+        await self.repository.insert_courses(rows)
+        await self._invalidate_after_commit(course_ids=(), teacher_ids={row["teacher_id"] for row in rows})
+
+    async def update_courses(self, rows: List[Dict[str, Any]]) -> Dict[int, int]:
+        existing = await self.repository.update_courses(rows)
+        if existing:
+            # 课程可能换了教师，新旧教师的列表都要失效
+            teacher_ids = set(existing.values()) | {row["teacher_id"] for row in rows if row["id"] in existing}
+            await self._invalidate_after_commit(course_ids=list(existing), teacher_ids=teacher_ids)
+        return existing
+
+    def stream_courses(self, filters: Optional[Dict[str, Any]] = None,
+                       batch_size: int = 500) -> AsyncIterator[Sequence]:
+        # 导出直接读库，不经过也不填充缓存
+        return self.repository.stream_courses(filters, batch_size)
+
+    async def list_courses(self, limit: int, after: Optional[Tuple[datetime, int]] = None,
+                           filters: Optional[Dict[str, Any]] = None, descending: bool = True) -> List:
+        teacher_id = (filters or {}).get("teacher_id")
+        if teacher_id is None:
+            return await self.repository.list_courses(limit, after=after, filters=filters, descending=descending)
+
+        async def load():
+            courses = await self.repository.list_courses(limit, after=after, filters=filters, descending=descending)
+            return [_dump(course) for course in courses]
+
+        data = await self.cache.get_or_load(_list_key(limit, after, filters, descending), load,
+                                            namespace=_teacher_namespace(teacher_id))
+        return [_load_row(item) for item in data]
+
+    async def estimate_course_count(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        return await self.repository.estimate_course_count(filters)
+
+    async def search_courses(self, query: str, limit: int,
+                             after: Optional[Tuple[float, int]] = None) -> List[Tuple[float, Any]]:
+        return await self.repository.search_courses(query, limit, after)
+
+    async def _invalidate_after_commit(self, course_ids, teacher_ids):
+        keys = [key for course_id in course_ids for key in (_detail_key(course_id), _version_key(course_id))]
+        namespaces = [_teacher_namespace(teacher_id) for teacher_id in teacher_ids]
+        await on_commit_async(lambda: self.cache.invalidate(keys, namespaces))
+
+def with_course_cache(repository: CourseRepository) -> CourseRepository:
+    """按配置为课程仓库加上读缓存"""
+    if settings.COURSE_CACHE_ENABLED:
+        return CachedCourseRepository(repository)
+    return repository
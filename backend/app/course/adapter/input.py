@@ -1,41 +1,146 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db, get_read_session_factory
+from app.core.dependencies import require_role
+from app.core.uow import UnitOfWorkRoute
 from app.course.application.schema import (
-    CourseCreate, CourseUpdate, CourseResponse, CourseListResponse
+    CourseCreate, CourseUpdate, CourseResponse, CourseListResponse, CourseFilter, CourseStatus,
+    CourseWorkspaceResponse, CourseBulkDeleteResponse, CourseImportResponse
 )
-from app.course.application.service import CourseService
+from app.course.application.service import CourseService, course_etag
 from app.course.adapter.repository import SQLAlchemyCourseRepository
-from app.core.exceptions import NotFoundException, ValidationException
+from app.course.adapter.cached_repository import with_course_cache
+from app.core.config import settings
+from app.core.helpers.etag import etag_matches, not_modified, set_etag
+from app.core.helpers.serialization import json_response
+from app.core.helpers.streaming import read_csv_records, read_ndjson_records
+from app.core.exceptions import NotFoundException, PreconditionFailedException, ValidationException
+from datetime import datetime
+from typing import Literal, Optional
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/courses", tags=["courses"])
+router = APIRouter(prefix="/courses", tags=["courses"], route_class=UnitOfWorkRoute)
 
 def get_course_repo(db: AsyncSession = Depends(get_db)):
-    return SQLAlchemyCourseRepository(db)
+    return with_course_cache(SQLAlchemyCourseRepository(db))
 
 def get_course_service(repo = Depends(get_course_repo)):
     return CourseService(repo)
 
-@router.get("/teacher/{teacher_id}", response_model=list[CourseResponse])
-async def get_teacher_courses(teacher_id: int, service = Depends(get_course_service)):
-    """获取教师的所有课程"""
+def get_course_read_repo(db: AsyncSession = Depends(get_read_db)):
+    return with_course_cache(SQLAlchemyCourseRepository(db))
+
+def get_course_read_service(repo = Depends(get_course_read_repo)):
+    return CourseService(repo)
+
+@router.get("/teacher/{teacher_id}", response_model=CourseListResponse)
+async def get_teacher_courses(
+    teacher_id: int,
+    status: Optional[CourseStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    order: Literal["desc", "asc"] = "desc",
+    limit: Optional[int] = Query(None, ge=1, le=settings.COURSE_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    service = Depends(get_course_read_service)
+):
+    """分页获取教师的课程，cursor 取上一页返回的 next_cursor"""
     try:
-        return await service.get_teacher_courses(teacher_id)
+        filters = CourseFilter(teacher_id=teacher_id, status=status, created_from=created_from, created_to=created_to)
+        return json_response(await service.list_courses(filters, limit=limit, cursor=cursor,
+                                                        include_total=include_total, order=order))
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取教师课程失败: {e}")
         raise HTTPException(status_code=500, detail="获取课程列表失败")
 
+@router.get("/search", response_model=CourseListResponse)
+async def search_courses(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: Optional[int] = Query(None, ge=1, le=settings.COURSE_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    service = Depends(get_course_read_service)
+):
+    """按关键词搜索课程标题和简介，按相关度排序；须在 /{course_id} 之前注册"""
+    try:
+        return json_response(await service.search_courses(q, limit=limit, cursor=cursor))
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"搜索课程失败: {e}")
+        raise HTTPException(status_code=500, detail="搜索课程失败")
+
+EXPORT_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+
+@router.post("/import", response_model=CourseImportResponse, dependencies=[Depends(require_role("admin"))])
+async def import_courses(
+    request: Request,
+    format: Optional[Literal["csv", "ndjson"]] = Query(None, description="为空时按 Content-Type 判断，默认 CSV"),
+    service = Depends(get_course_service)
+):
+    """
+    管理员以请求体上传 CSV（带表头）或 NDJSON 批量导入课程，边接收边解析、分批写入。
+    没有 id 的行新建，有 id 的行覆盖更新；出错的行在 errors 中按行号返回，不影响其他行
+    """
+    if format is None:
+        format = "ndjson" if "json" in request.headers.get("content-type", "") else "csv"
+    reader = read_ndjson_records if format == "ndjson" else read_csv_records
+    try:
+        return json_response(await service.import_courses(reader(request.stream())))
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"导入课程失败: {e}")
+        raise HTTPException(status_code=500, detail="导入课程失败")
+
+@router.get("/export", dependencies=[Depends(require_role("admin"))])
+async def export_courses(
+    format: Literal["csv", "ndjson"] = "csv",
+    teacher_id: Optional[int] = None,
+    status: Optional[CourseStatus] = None,
+    open_session = Depends(get_read_session_factory)
+):
+    """
+    管理员流式导出课程，可按教师和状态筛选；边从服务端游标读取边发送，导出的 CSV 可直接再导入。
+    读会话由响应体生成器打开，发送完毕（或客户端断开）后关闭，游标在整个响应期间有效
+    """
+    filters = CourseFilter(teacher_id=teacher_id, status=status)
+    
+    async def body():
+        async with open_session() as db:
+            service = CourseService(with_course_cache(SQLAlchemyCourseRepository(db)))
+            async for chunk in service.export_courses(filters, format):
+                yield chunk
+    
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="courses.{format}"'},
+    )
+
 @router.get("/{course_id}", response_model=CourseResponse)
-async def get_course_detail(course_id: int, service = Depends(get_course_service)):
-    """获取课程详情"""
+async def get_course_detail(
+    course_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    service = Depends(get_course_read_service)
+):
+    """获取课程详情；ETag 可用于更新时的 If-Match，If-None-Match 命中时只查版本号并返回 304"""
     try:
+        if if_none_match:
+            etag = await service.get_course_etag(course_id)
+            if etag and etag_matches(if_none_match, etag):
+                return not_modified(etag)
         course = await service.get_course_by_id(course_id)
         if not course:
-            raise HTTPException(status_code=404, detail="课程不存在")
+            raise NotFoundException("课程不存在")
+        set_etag(response, course_etag(course))
         return course
     except NotFoundException as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -43,6 +148,26 @@ async def get_course_detail(course_id: int, service = Depends(get_course_service
         logger.error(f"获取课程详情失败: {e}")
         raise HTTPException(status_code=500, detail="获取课程详情失败")
 
+@router.get("/{course_id}/workspace", response_model=CourseWorkspaceResponse)
+async def get_course_workspace(
+    course_id: int,
+    fields: Optional[str] = Query(None, description="需要正文的部分，逗号分隔：objective,syllabus,material"),
+    service = Depends(get_course_read_service)
+):
+    """打开课程所需的全部数据：课程、教学目标、大纲和讲义，一次请求、一次查询"""
+    try:
+        workspace = await service.get_course_workspace(course_id, fields)
+        if not workspace:
+            raise NotFoundException("课程不存在")
+        return workspace
+    except NotFoundException as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"获取课程工作台失败: {e}")
+        raise HTTPException(status_code=500, detail="获取课程工作台失败")
+
 @router.post("/", response_model=CourseResponse)
 async def create_course(course_data: CourseCreate, service = Depends(get_course_service)):
     """创建新课程"""
@@ -58,13 +183,19 @@ async def create_course(course_data: CourseCreate, service = Depends(get_course_
 async def update_course(
     course_id: int, 
     course_data: CourseUpdate, 
+    response: Response,
+    if_match: Optional[str] = Header(None),
     service = Depends(get_course_service)
 ):
-    """更新课程信息"""
+    """更新课程信息；携带 If-Match 时版本不一致返回 412"""
     try:
-        return await service.update_course(course_id, course_data)
+        course = await service.update_course(course_id, course_data, if_match=if_match)
+        set_etag(response, course_etag(course))
+        return course
     except NotFoundException as e:
         raise HTTPException(status_code=404, detail=str(e))
+    except PreconditionFailedException as e:
+        raise HTTPException(status_code=412, detail=str(e))
     except ValidationException as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -83,11 +214,39 @@ async def delete_course(course_id: int, service = Depends(get_course_service)):
         logger.error(f"删除课程失败: {e}")
         raise HTTPException(status_code=500, detail="删除课程失败")
 
-@router.get("/", response_model=list[CourseResponse])
-async def get_all_courses(service = Depends(get_course_service)):
-    """获取所有课程（管理员用）"""
+@router.delete("", response_model=CourseBulkDeleteResponse, dependencies=[Depends(require_role("admin"))])
+async def delete_courses(
+    ids: str = Query(..., description="逗号分隔的课程 id"),
+    service = Depends(get_course_service)
+):
+    """管理员批量删除课程及其教学内容，一条 DELETE 语句、一个事务"""
+    try:
+        return await service.delete_courses(ids)
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"批量删除课程失败: {e}")
+        raise HTTPException(status_code=500, detail="批量删除课程失败")
+
+@router.get("/", response_model=CourseListResponse)
+async def get_all_courses(
+    teacher_id: Optional[int] = None,
+    status: Optional[CourseStatus] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    order: Literal["desc", "asc"] = "desc",
+    limit: Optional[int] = Query(None, ge=1, le=settings.COURSE_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    service = Depends(get_course_read_service)
+):
+    """分页获取所有课程（管理员用），可按教师、状态和创建时间范围筛选"""
     try:
-        return await service.get_all_courses()
+        filters = CourseFilter(teacher_id=teacher_id, status=status, created_from=created_from, created_to=created_to)
+        return json_response(await service.list_courses(filters, limit=limit, cursor=cursor,
+                                                        include_total=include_total, order=order))
+    except ValidationException as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取所有课程失败: {e}")
         raise HTTPException(status_code=500, detail="获取课程列表失败") 
\ No newline at end of file
@@ -1,20 +1,44 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, insert, update, delete, func, text, true, tuple_, cast, case, or_, bindparam, Float
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import aliased, joinedload
+from app.core.exceptions import NotFoundException, PreconditionFailedException, ValidationException
+from app.core.config import settings
+from app.core.helpers.counters import add_counts, course_counts, discard_counts_on_error
+from app.core.uow import on_commit
+from app.course.adapter.search import (
+    TITLE_MATCH_BOOST, DESCRIPTION_MATCH_BOOST, course_search_index, snapshot
+)
 from app.course.domain.repository import CourseRepository
 from app.models.course import Course
-from typing import List, Optional, Dict, Any
+from app.models.course_objective import CourseObjective
+from app.models.course_syllabus import CourseSyllabus
+from app.models.course_material import CourseMaterial
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Collection, List, Optional, Dict, Any, Sequence, Tuple
+
+# 导入时整行覆盖的列；绑定参数加前缀，避免与 UPDATE 的列名冲突
+_IMPORT_COLUMNS = ("title", "description", "teacher_id", "status")
+_courses = Course.__table__
+_update_imported = (
+    update(_courses)
+    .where(_courses.c.id == bindparam("b_id"))
+    .values(**{name: bindparam(f"b_{name}") for name in _IMPORT_COLUMNS},
+            version=_courses.c.version + 1, updated_at=func.now())
+)
+
+# 工作台各部分对应的关系及模型；未要求正文时只加载这些模型的 id 和时间戳
+_WORKSPACE_PARTS = {
+    "objective": (Course.objective, CourseObjective),
+    "syllabus": (Course.syllabus, CourseSyllabus),
+    "material": (Course.material, CourseMaterial),
+}
 
 class SQLAlchemyCourseRepository(CourseRepository):
     def __init__(self, db: AsyncSession):
         self.db = db
     
-    async def get_courses_by_teacher(self, teacher_id: int) -> List[Course]:
-        """获取教师的所有课程"""
-        result = await self.db.execute(
-            select(Course).where(Course.teacher_id == teacher_id)
-        )
-        return result.scalars().all()
-    
     async def get_course_by_id(self, course_id: int) -> Optional[Course]:
         """根据ID获取课程"""
         result = await self.db.execute(
@@ -22,37 +46,250 @@ class SQLAlchemyCourseRepository(CourseRepository):
         )
         return result.scalar_one_or_none()
     
+    async def get_course_workspace(self, course_id: int, with_content: Collection[str] = ()) -> Optional[Course]:
+        """课程 LEFT JOIN 三部分教学内容，一条语句取回"""
+        options = []
+        for name, (relation, model) in _WORKSPACE_PARTS.items():
+            load = joinedload(relation)
+            if name not in with_content:
+                load = load.load_only(model.id, model.course_id, model.created_at, model.updated_at, raiseload=True)
+            options.append(load)
+        result = await self.db.execute(select(Course).where(Course.id == course_id).options(*options))
+        return result.unique().scalar_one_or_none()
+    
+    async def get_course_version(self, course_id: int) -> Optional[int]:
+        """只查询版本号，用于条件请求"""
+        return await self.db.scalar(select(Course.version).where(Course.id == course_id))
+    
     async def create_course(self, course_data: Dict[str, Any]) -> Course:
         """创建课程"""
         course = Course(**course_data)
         self.db.add(course)
-        await self.db.commit()
-        await self.db.refresh(course)
+        # eager_defaults：INSERT ... RETURNING 带回 id 和 created_at，无需 refresh
+        await self.db.flush()
+        await add_counts(self.db, course_counts(course.status))
+        self._sync_search_index(upserted=[course])
+        return course
+    
+    async def update_course(self, course_id: int, course_data: Dict[str, Any],
+                            expected_versions: Optional[List[int]] = None) -> Course:
+        """
+        PostgreSQL 上一条语句完成更新：
+        WITH target AS (SELECT id ...), updated AS (UPDATE ... WHERE version = ? RETURNING *)
+        SELECT target.id, target.status, updated.* FROM target LEFT JOIN updated
+        没有行说明课程不存在；有 target 而 updated 为空说明版本不符。
+        其他数据库（如 SQLite）不支持 CTE 中的 UPDATE，先查询更新前的状态，再执行 UPDATE ... RETURNING
+        """
+        stmt = update(Course).where(Course.id == course_id)
+        if expected_versions is not None:
+            stmt = stmt.where(Course.version.in_(expected_versions))
+        stmt = stmt.values(**course_data, version=Course.version + 1, updated_at=func.now())
+        if self.db.bind.dialect.name == "postgresql":
+            old_status, course = await self._update_in_cte(course_id, stmt)
+        else:
+            old_status, course = await self._update_after_select(course_id, stmt)
+        if course.status != old_status:
+            await add_counts(self.db, course_counts(old_status, -1), course_counts(course.status))
+        self._sync_search_index(upserted=[course])
         return course
     
-    async def update_course(self, course_id: int, course_data: Dict[str, Any]) -> Course:
-        """更新课程"""
-        await self.db.execute(
-            update(Course)
-            .where(Course.id == course_id)
-            .values(**course_data)
+    async def _update_in_cte(self, course_id: int, stmt) -> Tuple[str, Course]:
+        updated = stmt.returning(*Course.__table__.c).cte("updated")
+        # target 与 UPDATE 读取同一快照，status 为更新前的状态
+        target = select(Course.id, Course.status).where(Course.id == course_id).cte("target")
+        updated_course = aliased(Course, updated, adapt_on_names=True)
+        # 外层是 SELECT，do_orm_execute 识别不出其中的 UPDATE，需显式标记写入，提交后固定调用方读主库
+        self.db.info["wrote"] = True
+        result = await self.db.execute(
+            select(target.c.id, target.c.status, updated_course)
+            .select_from(target.outerjoin(updated, true()))
+            .execution_options(populate_existing=True)
         )
-        await self.db.commit()
-        
-        # 返回更新后的课程
+        row = result.one_or_none()
+        if row is None:
+            raise NotFoundException("课程不存在")
+        _, old_status, course = row
+        if course is None:
+            raise PreconditionFailedException("课程已被其他人修改，请刷新后重试")
+        return old_status, course
+    
+    async def _update_after_select(self, course_id: int, stmt) -> Tuple[str, Course]:
+        result = await self.db.execute(select(Course.status).where(Course.id == course_id))
+        row = result.one_or_none()
+        if row is None:
+            raise NotFoundException("课程不存在")
+        result = await self.db.execute(stmt.returning(Course).execution_options(populate_existing=True))
+        course = result.scalar_one_or_none()
+        if course is None:
+            raise PreconditionFailedException("课程已被其他人修改，请刷新后重试")
+        return row.status, course
+    
+    async def delete_course(self, course_id: int) -> Optional[Course]:
+        """DELETE ... RETURNING 一条语句完成存在性判断和删除，教学内容由 ON DELETE CASCADE 删除"""
         result = await self.db.execute(
-            select(Course).where(Course.id == course_id)
+            delete(Course).where(Course.id == course_id).returning(Course)
+        )
+        course = result.scalar_one_or_none()
+        if course is not None:
+            await add_counts(self.db, course_counts(course.status, -1))
+            self._sync_search_index(removed=[course.id])
+        return course
+    
+    async def delete_courses(self, course_ids: List[int]) -> List[Tuple[int, int]]:
+        """无论多少门课程都只执行一条 DELETE"""
+        result = await self.db.execute(
+            delete(Course).where(Course.id.in_(course_ids)).returning(Course.id, Course.teacher_id, Course.status)
+        )
+        rows = result.all()
+        await add_counts(self.db, *(course_counts(status, -1) for _, _, status in rows))
+        if rows:
+            self._sync_search_index(removed=[course_id for course_id, _, _ in rows])
+        return [(course_id, teacher_id) for course_id, teacher_id, _ in rows]
+    
+    @asynccontextmanager
+    async def savepoint(self):
+        """SAVEPOINT ... RELEASE，出错时 ROLLBACK TO SAVEPOINT，外层事务仍可继续使用"""
+        try:
+            with discard_counts_on_error():
+                async with self.db.begin_nested():
+                    yield
+        except DBAPIError as e:
+            raise ValidationException(f"数据库拒绝写入: {type(e.orig).__name__}") from e
+    
+    async def insert_courses(self, rows: List[Dict[str, Any]]) -> None:
+        """Core 风格的批量 INSERT，asyncpg 上按 executemany 一次发送整批参数"""
+        await self.db.execute(insert(_courses), rows)
+        await add_counts(self.db, *(course_counts(row.get("status") or "active") for row in rows))
+        self._sync_search_index(reset=True)
+    
+    async def update_courses(self, rows: List[Dict[str, Any]]) -> Dict[int, int]:
+        """
+        先 SELECT ... FOR UPDATE 锁定并找出存在的课程，再以 executemany 执行同一条 UPDATE，
+        整批共两次往返
+        """
+        result = await self.db.execute(
+            select(Course.id, Course.teacher_id, Course.status)
+            .where(Course.id.in_({row["id"] for row in rows}))
+            .with_for_update()
         )
-        return result.scalar_one()
+        existing, statuses = {}, {}
+        for course_id, teacher_id, status in result.all():
+            existing[course_id], statuses[course_id] = teacher_id, status
+        params = [
+            {"b_id": row["id"], **{f"b_{name}": row[name] for name in _IMPORT_COLUMNS}}
+            for row in rows if row["id"] in existing
+        ]
+        if params:
+            await self.db.execute(_update_imported, params)
+            changes = []
+            for row in params:
+                old_status, statuses[row["b_id"]] = statuses[row["b_id"]], row["b_status"]
+                if old_status != row["b_status"]:
+                    changes += [course_counts(old_status, -1), course_counts(row["b_status"])]
+            await add_counts(self.db, *changes)
+            self._sync_search_index(reset=True)
+        return existing
+    
+    async def stream_courses(self, filters: Optional[Dict[str, Any]] = None,
+                             batch_size: int = 500) -> AsyncIterator[Sequence]:
+        """
+        服务端游标：yield_per 让驱动每次只取 batch_size 行，内存占用与表大小无关。
+        取列而非 ORM 对象（即 stream 而非 stream_scalars），省去对象构建和身份映射
+        """
+        stmt = self._apply_filters(select(*_courses.columns), filters).order_by(Course.id)
+        result = await self.db.stream(stmt.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            yield rows
     
-    async def delete_course(self, course_id: int):
-        """删除课程"""
-        await self.db.execute(
-            delete(Course).where(Course.id == course_id)
+    def _apply_filters(self, stmt, filters: Optional[Dict[str, Any]]):
+        """等值条件在前、创建时间范围在后，与 (teacher_id, status, created_at, id) 等复合索引的列顺序一致"""
+        filters = filters or {}
+        if filters.get("teacher_id") is not None:
+            stmt = stmt.where(Course.teacher_id == filters["teacher_id"])
+        if filters.get("status") is not None:
+            stmt = stmt.where(Course.status == filters["status"])
+        if filters.get("created_from") is not None:
+            stmt = stmt.where(Course.created_at >= filters["created_from"])
+        if filters.get("created_to") is not None:
+            stmt = stmt.where(Course.created_at < filters["created_to"])
+        return stmt
+    
+    async def list_courses(self, limit: int, after: Optional[Tuple[datetime, int]] = None,
+                           filters: Optional[Dict[str, Any]] = None, descending: bool = True) -> List:
+        """
+        按 (created_at, id) 分页，行比较可直接利用复合索引定位，不随页数变慢；升序时反向扫描同一索引。
+        只读列表直接返回 Row，省去 ORM 对象的构建和身份映射
+        """
+        stmt = self._apply_filters(select(*Course.__table__.columns), filters)
+        key = tuple_(Course.created_at, Course.id)
+        if after is not None:
+            stmt = stmt.where(key < tuple_(*after) if descending else key > tuple_(*after))
+        if descending:
+            stmt = stmt.order_by(Course.created_at.desc(), Course.id.desc())
+        else:
+            stmt = stmt.order_by(Course.created_at.asc(), Course.id.asc())
+        result = await self.db.execute(stmt.limit(limit))
+        return result.all()
+    
+    async def estimate_course_count(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        """无筛选时读取统计信息中的行数估算；有筛选时计数，最多数到 COURSE_COUNT_CAP"""
+        if not filters:
+            reltuples = await self.db.scalar(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'courses'::regclass")
+            )
+            # 从未 ANALYZE 的表 reltuples 为 -1
+            if reltuples is not None and reltuples >= 0:
+                return int(reltuples)
+        
+        stmt = self._apply_filters(select(Course.id), filters)
+        capped = stmt.limit(settings.COURSE_COUNT_CAP).subquery()
+        return await self.db.scalar(select(func.count()).select_from(capped))
+    
+    async def search_courses(self, query: str, limit: int,
+                             after: Optional[Tuple[float, int]] = None) -> List[Tuple[float, Course]]:
+        """
+        按关键词搜索标题和简介，返回按 (分数, id) 倒序的 (分数, 课程)。
+        PostgreSQL 上由 pg_trgm 的 GIN 索引完成 ILIKE 和相似度 (%) 匹配，分数为标题相似度加上标题/简介包含关键词的加分；
+        其他数据库使用进程内三元组索引，排序与 SQL 相同
+        """
+        if self.db.bind.dialect.name != "postgresql":
+            return await course_search_index.search(self._load_search_courses, query, limit, after)
+        
+        escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        pattern = f"%{escaped}%"
+        in_title = Course.title.ilike(pattern, escape="\\")
+        in_description = Course.description.ilike(pattern, escape="\\")
+        # 分数表达式须与 app.course.adapter.search.search_score 保持一致
+        score = (
+            cast(func.similarity(Course.title, query), Float)
+            + case((in_title, TITLE_MATCH_BOOST), else_=0.0)
+            + case((in_description, DESCRIPTION_MATCH_BOOST), else_=0.0)
+        )
+        ranked = score.label("score")
+        stmt = select(ranked, Course).where(
+            or_(in_title, in_description, Course.title.op("%")(query))
         )
-        await self.db.commit()
+        if after is not None:
+            stmt = stmt.where(tuple_(score, Course.id) < tuple_(*after))
+        stmt = stmt.order_by(ranked.desc(), Course.id.desc()).limit(limit)
+        result = await self.db.execute(stmt)
+        return [(row.score, row.Course) for row in result]
     
-    async def get_all_courses(self) -> List[Course]:
-        """获取所有课程"""
-        result = await self.db.execute(select(Course))
-        return result.scalars().all() 
\ No newline at end of file
+    async def _load_search_courses(self) -> List[Course]:
+        """建立进程内搜索索引时整表读取一次"""
+        result = await self.db.execute(select(*_courses.columns))
+        return [snapshot(row) for row in result]
+    
+    def _sync_search_index(self, upserted: Sequence[Course] = (), removed: Sequence[int] = (), reset: bool = False):
+        """非 PostgreSQL 数据库上搜索使用进程内索引，本事务的课程写入在提交后同步到索引，回滚时丢弃"""
+        if self.db.bind.dialect.name == "postgresql":
+            return
+        courses = [snapshot(course) for course in upserted]
+        removed = list(removed)
+        
+        def apply():
+            if reset:
+                course_search_index.reset()
+            course_search_index.upsert(courses)
+            course_search_index.remove(removed)
+        on_commit(apply)
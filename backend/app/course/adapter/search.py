@@ -0,0 +1,227 @@
+import asyncio
+import heapq
+import struct
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from app.core.config import settings
+from app.models.course import Course
+
+# 与 pg_trgm 默认的 similarity_threshold 一致，标题相似度不低于该值时视为匹配（% 运算符）
+SIMILARITY_THRESHOLD = 0.3
+# 排名加分：标题/简介包含关键词
+TITLE_MATCH_BOOST = 1.0
+DESCRIPTION_MATCH_BOOST = 0.5
+
+def _words(text: str) -> List[str]:
+    """按 pg_trgm 的规则切词：连续的字母数字（含中文）为一个词，并转小写"""
+    words, current = [], []
+    for char in text.lower():
+        if char.isalnum():
+            current.append(char)
+        elif current:
+            words.append("".join(current))
+            current = []
+    if current:
+        words.append("".join(current))
+    return words
+
+def trigrams(text: Optional[str]) -> Set[str]:
+    """与 pg_trgm 的 show_trgm 相同：每个词前补两个空格、后补一个空格后取所有三元组"""
+    result = set()
+    for word in _words(text or ""):
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+def _float4(value: float) -> float:
+    # pg_trgm 以 real 计算相似度，按单精度取整才能与数据库结果逐位一致
+    return struct.unpack("f", struct.pack("f", value))[0]
+
+def _jaccard(left: Set[str], right: Set[str]) -> float:
+    if not left or not right:
+        return 0.0
+    common = len(left & right)
+    return _float4(common / (len(left) + len(right) - common))
+
+def similarity(a: Optional[str], b: Optional[str]) -> float:
+    """与 pg_trgm 的 similarity() 相同：共同三元组数 / 三元组并集大小"""
+    return _jaccard(trigrams(a), trigrams(b))
+
+def _score(title: str, description: str, title_trigrams: Set[str],
+           needle: str, query_trigrams: Set[str]) -> Optional[float]:
+    title_sim = _jaccard(title_trigrams, query_trigrams)
+    in_title = needle in title
+    in_description = needle in description
+    if not (in_title or in_description or title_sim >= SIMILARITY_THRESHOLD):
+        return None
+    return title_sim + (TITLE_MATCH_BOOST if in_title else 0.0) + (DESCRIPTION_MATCH_BOOST if in_description else 0.0)
+
+def search_score(course: Course, query: str) -> Optional[float]:
+    """
+    课程对关键词的排名分数，不匹配时返回 None。
+    与 SQLAlchemyCourseRepository.search_courses 的 SQL 表达式保持一致：
+    标题相似度 + 标题包含关键词加分 + 简介包含关键词加分。
+    """
+    return _score((course.title or "").lower(), (course.description or "").lower(),
+                  trigrams(course.title), query.lower(), trigrams(query))
+
+def _grams(text: str) -> Set[str]:
+    """不补空格的连续三字符片段，用于子串匹配的候选筛选"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class TrigramIndex:
+    """
+    纯 Python 的三元组倒排索引，没有 PostgreSQL（如 SQLite 开发库）时代替 pg_trgm GIN 索引。
+    与 GIN 索引一样先用三元组取候选，再逐条计算分数，结果和排序与数据库查询相同。
+    """
+
+    def __init__(self, courses: Iterable[Course] = ()):
+        # id -> (课程, 小写标题, 小写简介, 标题三元组)
+        self._entries: Dict[int, Tuple[Course, str, str, Set[str]]] = {}
+        self._word_postings: Dict[str, Set[int]] = {}
+        self._substring_postings: Dict[str, Set[int]] = {}
+        for course in courses:
+            self.add(course)
+
+    def _substring_keys(self, title: str, description: str) -> Set[str]:
+        return _grams(title) | _grams(description)
+
+    def add(self, course: Course):
+        self.remove(course.id)
+        title, description = (course.title or "").lower(), (course.description or "").lower()
+        title_trigrams = trigrams(course.title)
+        self._entries[course.id] = (course, title, description, title_trigrams)
+        for key in title_trigrams:
+            self._word_postings.setdefault(key, set()).add(course.id)
+        for key in self._substring_keys(title, description):
+            self._substring_postings.setdefault(key, set()).add(course.id)
+
+    def remove(self, course_id: int):
+        entry = self._entries.pop(course_id, None)
+        if entry is None:
+            return
+        _, title, description, title_trigrams = entry
+        for key in title_trigrams:
+            self._word_postings[key].discard(course_id)
+        for key in self._substring_keys(title, description):
+            self._substring_postings[key].discard(course_id)
+
+    def _candidates(self, needle: str, query_trigrams: Set[str]) -> Set[int]:
+        # 关键词不足三个字符时无法用片段筛选子串匹配，只能逐条检查
+        if len(needle) < 3:
+            return set(self._entries)
+        # 包含关键词必然包含其全部三字符片段
+        postings = sorted((self._substring_postings.get(key, set()) for key in _grams(needle)), key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+        # 相似度 = 共同数 / 并集 ≤ 共同数 / 关键词三元组数，达到阈值至少需要这么多共同三元组
+        overlap: Dict[int, int] = {}
+        for key in query_trigrams:
+            for course_id in self._word_postings.get(key, ()):
+                overlap[course_id] = overlap.get(course_id, 0) + 1
+        required = SIMILARITY_THRESHOLD * len(query_trigrams)
+        candidates.update(course_id for course_id, count in overlap.items() if count >= required)
+        return candidates
+
+    def search(self, query: str, limit: int,
+               after: Optional[Tuple[float, int]] = None) -> List[Tuple[float, Course]]:
+        """按 (分数, id) 倒序返回匹配的课程，after 为上一页最后一条的 (分数, id)"""
+        needle, query_trigrams = query.lower(), trigrams(query)
+        results = []
+        for course_id in self._candidates(needle, query_trigrams):
+            course, title, description, title_trigrams = self._entries[course_id]
+            score = _score(title, description, title_trigrams, needle, query_trigrams)
+            if score is None or (after is not None and (score, course_id) >= after):
+                continue
+            results.append((score, course_id, course))
+        return [(score, course) for score, _, course in heapq.nlargest(limit, results, key=lambda item: item[:2])]
+
+_COLUMNS = [column.key for column in Course.__table__.columns]
+
+def snapshot(course) -> Course:
+    """复制为游离的课程对象（也接受查询返回的行），索引内容不受会话和调用方修改的影响"""
+    return Course(**{key: getattr(course, key) for key in _COLUMNS})
+
+class CourseSearchIndex:
+    """
+    进程内的课程搜索索引，非 PostgreSQL 数据库上代替 pg_trgm。
+    首次搜索时整表加载建立一次，之后由本进程的课程写入在事务提交后增量更新，不随请求重建。
+    索引不在进程间共享：其他 worker 的写入要等 refresh_interval 秒后整表重建才可见（0 表示不定期重建）
+    """
+
+    def __init__(self, refresh_interval: float = 0.0, clock=time.monotonic):
+        self.refresh_interval = refresh_interval
+        self._clock = clock
+        self._index: Optional[TrigramIndex] = None
+        self._built_at = 0.0
+        self._building: Optional[asyncio.Future] = None
+        # 建立期间提交的增量，建好后补到新索引上；重置则使进行中的建立结果作废
+        self._replay: List[Callable[[TrigramIndex], None]] = []
+        self._generation = 0
+
+    def _expired(self) -> bool:
+        return self.refresh_interval > 0 and self._clock() - self._built_at >= self.refresh_interval
+
+    async def _current(self, load: Callable[[], Awaitable[Iterable[Course]]]) -> TrigramIndex:
+        if self._index is not None and not self._expired():
+            return self._index
+        if self._building is not None:
+            # 定期重建期间继续使用旧索引，首次建立时等待同一次加载
+            if self._index is not None:
+                return self._index
+            return await asyncio.shield(self._building)
+
+        future = asyncio.get_running_loop().create_future()
+        self._building, self._replay = future, []
+        generation = self._generation
+        try:
+            index = TrigramIndex(await load())
+            for apply in self._replay:
+                apply(index)
+        except BaseException as e:
+            future.set_exception(e)
+            # 没有等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            self._building, self._replay = None, []
+        if generation == self._generation:
+            self._index, self._built_at = index, self._clock()
+        future.set_result(index)
+        return index
+
+    async def search(self, load: Callable[[], Awaitable[Iterable[Course]]], query: str, limit: int,
+                     after: Optional[Tuple[float, int]] = None) -> List[Tuple[float, Course]]:
+        """按 (分数, id) 倒序返回匹配的课程；load 返回全部课程，只在索引尚未建立或到期重建时调用"""
+        index = await self._current(load)
+        # 每次返回新的游离对象，调用方修改不会影响索引内容
+        return [(score, snapshot(course)) for score, course in index.search(query, limit, after)]
+
+    def _apply(self, change: Callable[[TrigramIndex], None]):
+        if self._index is not None:
+            change(self._index)
+        if self._building is not None:
+            self._replay.append(change)
+
+    def upsert(self, courses: Iterable[Course]):
+        """新增或更新课程（须为 snapshot 复制的对象）"""
+        courses = list(courses)
+
+        def change(index: TrigramIndex):
+            for course in courses:
+                index.add(course)
+        self._apply(change)
+
+    def remove(self, course_ids: Iterable[int]):
+        course_ids = list(course_ids)
+
+        def change(index: TrigramIndex):
+            for course_id in course_ids:
+                index.remove(course_id)
+        self._apply(change)
+
+    def reset(self):
+        """批量导入等无法逐条同步的写入后丢弃索引，下次搜索时整表重建"""
+        self._index = None
+        self._generation += 1
+
+course_search_index = CourseSearchIndex(settings.COURSE_SEARCH_INDEX_REFRESH)
@@ -1,7 +1,9 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, field_validator
+from typing import Literal, Optional
 from datetime import datetime
 
+CourseStatus = Literal["active", "inactive", "draft"]
+
 class CourseBase(BaseModel):
     title: str
     description: Optional[str] = None
@@ -12,7 +14,7 @@ class CourseCreate(CourseBase):
 class CourseUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
-    status: Optional[str] = None
+    status: Optional[CourseStatus] = None
 
 class CourseResponse(CourseBase):
     id: int
@@ -20,10 +22,73 @@ class CourseResponse(CourseBase):
     status: str
     created_at: datetime
     updated_at: Optional[datetime] = None
+    version: int = 1  # 更新时可通过 If-Match: "{id}-{version}" 防止覆盖他人修改
 
     class Config:
         from_attributes = True
 
+class CourseBulkDeleteResponse(BaseModel):
+    deleted: list[int]
+    missing: list[int]  # 不存在（或已被删除）的课程 id
+
+class CourseImportRow(BaseModel):
+    """导入文件中的一行课程：没有 id 的新建，有 id 的整行覆盖更新；其余列（如导出的时间戳）忽略"""
+    id: Optional[int] = None
+    title: str
+    description: Optional[str] = None
+    teacher_id: int
+    status: CourseStatus = "active"
+
+    @field_validator("title")
+    @classmethod
+    def title_not_blank(cls, value: str) -> str:
+        if not value.strip():
+            raise ValueError("课程名称不能为空")
+        return value
+
+class CourseImportError(BaseModel):
+    line: int  # 记录在上传文件中的起始行号
+    error: str
+
+class CourseImportResponse(BaseModel):
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: list[CourseImportError] = []  # 最多返回 COURSE_IMPORT_MAX_ERRORS 条，failed 为全部失败行数
+
+class CourseFilter(BaseModel):
+    """课程列表筛选条件，创建时间范围为左闭右开"""
+    teacher_id: Optional[int] = None
+    status: Optional[CourseStatus] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
 class CourseListResponse(BaseModel):
     courses: list[CourseResponse]
-    total: int 
\ No newline at end of file
+    total: Optional[int] = None  # 估算值，仅在 include_total=true 时返回
+    next_cursor: Optional[str] = None  # 为空表示没有下一页
+
+# 课程工作台可选加载正文的部分
+WORKSPACE_SECTIONS = ("objective", "syllabus", "material")
+
+class WorkspaceSection(BaseModel):
+    """工作台中的一部分教学内容；未通过 fields 请求时只有 id 和时间戳，正文为 None"""
+    id: int
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class WorkspaceObjective(WorkspaceSection):
+    course_content: Optional[str] = None
+    teaching_target: Optional[str] = None
+
+class WorkspaceDocument(WorkspaceSection):
+    content: Optional[str] = None
+
+class CourseWorkspaceResponse(CourseResponse):
+    """课程及其教学目标、大纲和讲义，尚未创建的部分为 None"""
+    objective: Optional[WorkspaceObjective] = None
+    syllabus: Optional[WorkspaceDocument] = None
+    material: Optional[WorkspaceDocument] = None
@@ -1,19 +1,90 @@
 from app.course.domain.repository import CourseRepository
-from app.course.application.schema import CourseCreate, CourseUpdate, CourseResponse
+from app.course.application.schema import (
+    CourseCreate, CourseUpdate, CourseResponse, CourseListResponse, CourseFilter,
+    CourseWorkspaceResponse, WorkspaceObjective, WorkspaceDocument, WORKSPACE_SECTIONS, CourseBulkDeleteResponse,
+    CourseImportRow, CourseImportError, CourseImportResponse
+)
+from app.core.config import settings
 from app.core.exceptions import NotFoundException, ValidationException
+from app.core.helpers.pagination import encode_cursor, decode_cursor
+from app.core.helpers.etag import make_etag, parse_etag_list, versions_for
+from app.core.helpers.serialization import validate_list
+from app.core.helpers.streaming import Record, encode_csv, encode_ndjson
+from app.models.course import Course
+from datetime import datetime
+from pydantic import ValidationError
 import logging
-from typing import Optional
+from typing import AsyncIterator, List, Optional, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
+# 导出的列，顺序与 courses 表一致
+EXPORT_COLUMNS = [column.key for column in Course.__table__.columns]
+
 class CourseService:
     def __init__(self, repo: CourseRepository):
         self.repo = repo
     
-    async def get_teacher_courses(self, teacher_id: int) -> list[CourseResponse]:
-        """获取教师的所有课程"""
-        courses = await self.repo.get_courses_by_teacher(teacher_id)
-        return [CourseResponse.from_orm(course) for course in courses]
+    async def list_courses(self, filters: Optional[CourseFilter] = None, limit: Optional[int] = None,
+                           cursor: Optional[str] = None, include_total: bool = False,
+                           order: str = "desc") -> CourseListResponse:
+        """按筛选条件游标分页获取课程，默认按创建时间倒序"""
+        limit = min(max(1, limit or settings.COURSE_PAGE_SIZE), settings.COURSE_MAX_PAGE_SIZE)
+        after = self._parse_cursor(cursor) if cursor else None
+        conditions = filters.model_dump(exclude_none=True) if filters else {}
+        if conditions.get("created_from") and conditions.get("created_to") \
+                and conditions["created_from"] >= conditions["created_to"]:
+            raise ValidationException("创建时间范围无效")
+        
+        # 多取一条用于判断是否还有下一页
+        courses = await self.repo.list_courses(limit + 1, after=after, filters=conditions,
+                                               descending=order != "asc")
+        has_more = len(courses) > limit
+        courses = courses[:limit]
+        next_cursor = encode_cursor(courses[-1].created_at, courses[-1].id) if has_more else None
+        
+        total = await self.repo.estimate_course_count(filters=conditions) if include_total else None
+        # 课程只校验一次，外层不再重复校验
+        return CourseListResponse.model_construct(
+            courses=validate_list(CourseResponse, courses),
+            total=total,
+            next_cursor=next_cursor
+        )
+    
+    async def search_courses(self, query: str, limit: Optional[int] = None,
+                             cursor: Optional[str] = None) -> CourseListResponse:
+        """按关键词搜索课程，结果按相关度排序并游标分页"""
+        query = (query or "").strip()
+        if not query:
+            raise ValidationException("搜索关键词不能为空")
+        limit = min(max(1, limit or settings.COURSE_PAGE_SIZE), settings.COURSE_MAX_PAGE_SIZE)
+        after = self._parse_search_cursor(cursor) if cursor else None
+        
+        results = await self.repo.search_courses(query, limit + 1, after=after)
+        has_more = len(results) > limit
+        results = results[:limit]
+        next_cursor = encode_cursor(results[-1][0], results[-1][1].id) if has_more else None
+        return CourseListResponse.model_construct(
+            courses=validate_list(CourseResponse, [course for _, course in results]),
+            total=None,
+            next_cursor=next_cursor
+        )
+    
+    def _parse_search_cursor(self, cursor: str) -> Tuple[float, int]:
+        values = decode_cursor(cursor)
+        try:
+            score, course_id = values
+            return float(score), int(course_id)
+        except (ValueError, TypeError):
+            raise ValidationException("无效的分页游标")
+    
+    def _parse_cursor(self, cursor: str) -> Tuple[datetime, int]:
+        values = decode_cursor(cursor)
+        try:
+            created_at, course_id = values
+            return datetime.fromisoformat(created_at), int(course_id)
+        except (ValueError, TypeError):
+            raise ValidationException("无效的分页游标")
     
     async def get_course_by_id(self, course_id: int) -> Optional[CourseResponse]:
         """根据ID获取课程"""
@@ -22,6 +93,39 @@ class CourseService:
             return None
         return CourseResponse.from_orm(course)
     
+    async def get_course_workspace(self, course_id: int,
+                                   fields: Optional[str] = None) -> Optional[CourseWorkspaceResponse]:
+        """
+        获取课程工作台：课程及其教学目标、大纲和讲义，一次查询取回。
+        fields 为逗号分隔的部分名，只有列出的部分返回正文，其余只返回 id 和时间戳
+        """
+        with_content = self._parse_workspace_fields(fields)
+        course = await self.repo.get_course_workspace(course_id, with_content)
+        if not course:
+            return None
+        sections = {}
+        for name, schema in (("objective", WorkspaceObjective), ("syllabus", WorkspaceDocument),
+                             ("material", WorkspaceDocument)):
+            part = getattr(course, name)
+            if part is None or name in with_content:
+                sections[name] = schema.from_orm(part) if part is not None else None
+            else:
+                # 正文列未加载，不能交给 from_orm 读取
+                sections[name] = schema(id=part.id, created_at=part.created_at, updated_at=part.updated_at)
+        return CourseWorkspaceResponse(**CourseResponse.from_orm(course).dict(), **sections)
+    
+    def _parse_workspace_fields(self, fields: Optional[str]) -> Set[str]:
+        names = {name.strip() for name in (fields or "").split(",") if name.strip()}
+        unknown = names - set(WORKSPACE_SECTIONS)
+        if unknown:
+            raise ValidationException(f"不支持的字段: {', '.join(sorted(unknown))}")
+        return names
+    
+    async def get_course_etag(self, course_id: int) -> Optional[str]:
+        """只查版本号生成 ETag，课程不存在返回 None"""
+        version = await self.repo.get_course_version(course_id)
+        return make_etag(course_id, version) if version is not None else None
+    
     async def create_course(self, course_data: CourseCreate) -> CourseResponse:
         """创建新课程"""
         if not course_data.title or course_data.title.strip() == "":
@@ -30,28 +134,111 @@ class CourseService:
         course = await self.repo.create_course(course_data.dict())
         return CourseResponse.from_orm(course)
     
-    async def update_course(self, course_id: int, course_data: CourseUpdate) -> CourseResponse:
-        """更新课程信息"""
-        course = await self.repo.get_course_by_id(course_id)
-        if not course:
-            raise NotFoundException("课程不存在")
-        
+    async def update_course(self, course_id: int, course_data: CourseUpdate,
+                            if_match: Optional[str] = None) -> CourseResponse:
+        """更新课程信息，携带 If-Match 时只在版本一致时更新"""
         update_data = course_data.dict(exclude_unset=True)
         if "title" in update_data and (not update_data["title"] or update_data["title"].strip() == ""):
             raise ValidationException("课程名称不能为空")
         
-        updated_course = await self.repo.update_course(course_id, update_data)
+        # 未携带或为 "*" 时不校验版本（课程不存在仍返回 404）
+        tags = parse_etag_list(if_match)
+        expected_versions = None if tags is None or "*" in tags else versions_for(tags, course_id)
+        updated_course = await self.repo.update_course(course_id, update_data, expected_versions)
         return CourseResponse.from_orm(updated_course)
     
     async def delete_course(self, course_id: int):
-        """删除课程"""
-        course = await self.repo.get_course_by_id(course_id)
+        """删除课程及其教学目标、大纲和讲义"""
+        course = await self.repo.delete_course(course_id)
         if not course:
             raise NotFoundException("课程不存在")
+    
+    async def delete_courses(self, ids: str) -> CourseBulkDeleteResponse:
+        """批量删除课程，ids 为逗号分隔的课程 id；不存在的 id 在 missing 中返回"""
+        try:
+            course_ids = list(dict.fromkeys(int(item) for item in ids.split(",") if item.strip()))
+        except ValueError:
+            raise ValidationException("课程 id 须为整数")
+        if not course_ids:
+            raise ValidationException("未指定要删除的课程")
+        if len(course_ids) > settings.COURSE_BULK_DELETE_MAX:
+            raise ValidationException(f"一次最多删除 {settings.COURSE_BULK_DELETE_MAX} 门课程")
         
-        await self.repo.delete_course(course_id)
+        deleted = {course_id for course_id, _ in await self.repo.delete_courses(course_ids)}
+        return CourseBulkDeleteResponse(
+            deleted=[course_id for course_id in course_ids if course_id in deleted],
+            missing=[course_id for course_id in course_ids if course_id not in deleted],
+        )
     
-    async def get_all_courses(self) -> list[CourseResponse]:
-        """获取所有课程（管理员用）"""
-        courses = await self.repo.get_all_courses()
-        return [CourseResponse.from_orm(course) for course in courses] 
\ No newline at end of file
+    async def import_courses(self, records: AsyncIterator[Record]) -> CourseImportResponse:
+        """
+        逐条校验上传的课程并按 COURSE_BULK_BATCH_SIZE 分批写入，每批在一个保存点内批量执行。
+        某批被数据库拒绝时回滚该批并逐行重试，定位出错的行；出错的行记入 errors，其余行照常导入
+        """
+        result = CourseImportResponse()
+        batch: List[Tuple[int, CourseImportRow]] = []
+        async for line, data, error in records:
+            if error is None:
+                try:
+                    batch.append((line, CourseImportRow.model_validate(data)))
+                except ValidationError as e:
+                    error = _describe_validation_error(e)
+            if error is not None:
+                self._import_failed(result, line, error)
+            if len(batch) >= settings.COURSE_BULK_BATCH_SIZE:
+                await self._import_batch(batch, result)
+                batch = []
+        if batch:
+            await self._import_batch(batch, result)
+        return result
+    
+    async def _import_batch(self, batch: List[Tuple[int, CourseImportRow]], result: CourseImportResponse):
+        try:
+            async with self.repo.savepoint():
+                created, updated, missing = await self._write_import_batch(batch)
+        except ValidationException as e:
+            if len(batch) == 1:
+                self._import_failed(result, batch[0][0], str(e))
+                return
+            for item in batch:
+                await self._import_batch([item], result)
+            return
+        result.created += created
+        result.updated += updated
+        for line in missing:
+            self._import_failed(result, line, "课程不存在")
+    
+    async def _write_import_batch(self, batch: List[Tuple[int, CourseImportRow]]) -> Tuple[int, int, List[int]]:
+        """写入一批，返回 (新建数, 更新数, 不存在的课程所在行号)"""
+        creates = [row.model_dump(exclude={"id"}) for _, row in batch if row.id is None]
+        updates = [(line, row) for line, row in batch if row.id is not None]
+        if creates:
+            await self.repo.insert_courses(creates)
+        existing = await self.repo.update_courses([row.model_dump() for _, row in updates]) if updates else {}
+        missing = [line for line, row in updates if row.id not in existing]
+        return len(creates), len(updates) - len(missing), missing
+    
+    def _import_failed(self, result: CourseImportResponse, line: int, error: str):
+        result.failed += 1
+        if len(result.errors) < settings.COURSE_IMPORT_MAX_ERRORS:
+            result.errors.append(CourseImportError(line=line, error=error))
+    
+    async def export_courses(self, filters: Optional[CourseFilter] = None,
+                             format: str = "csv") -> AsyncIterator[str]:
+        """按 id 顺序流式导出课程，每从游标取一批就编码输出一段；CSV 的首行为表头，可直接再导入"""
+        conditions = filters.model_dump(exclude_none=True) if filters else {}
+        if format == "csv":
+            yield encode_csv([EXPORT_COLUMNS])
+        async for rows in self.repo.stream_courses(conditions, settings.COURSE_BULK_BATCH_SIZE):
+            yield encode_csv(rows) if format == "csv" else encode_ndjson(EXPORT_COLUMNS, rows)
+
+def _describe_validation_error(error: ValidationError) -> str:
+    details = error.errors()
+    first = details[0]
+    field = ".".join(str(part) for part in first["loc"])
+    message = f"{field}: {first['msg']}" if field else first["msg"]
+    return message if len(details) == 1 else f"{message}（另有 {len(details) - 1} 处错误）"
+
+def course_etag(course: CourseResponse) -> str:
+    """课程的 ETag，版本号随每次更新递增"""
+    return make_etag(course.id, course.version)
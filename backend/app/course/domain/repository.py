@@ -1,17 +1,26 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Dict, Any
+from datetime import datetime
+from typing import Any, AsyncContextManager, AsyncIterator, Collection, Dict, List, Optional, Sequence, Tuple
 
 class CourseRepository(ABC):
     """课程管理仓库接口"""
     
     @abstractmethod
-    async def get_courses_by_teacher(self, teacher_id: int) -> List:
-        """获取教师的所有课程"""
+    async def get_course_by_id(self, course_id: int):
+        """根据ID获取课程"""
         pass
     
     @abstractmethod
-    async def get_course_by_id(self, course_id: int):
-        """根据ID获取课程"""
+    async def get_course_workspace(self, course_id: int, with_content: Collection[str] = ()):
+        """
+        一次查询获取课程及其教学目标、大纲和讲义（objective、syllabus、material 属性）。
+        with_content 中列出的部分加载正文等大字段，其余只加载 id 和时间戳
+        """
+        pass
+    
+    @abstractmethod
+    async def get_course_version(self, course_id: int) -> Optional[int]:
+        """只查询课程版本号，课程不存在返回 None"""
         pass
     
     @abstractmethod
@@ -20,16 +29,67 @@ class CourseRepository(ABC):
         pass
     
     @abstractmethod
-    async def update_course(self, course_id: int, course_data: Dict[str, Any]):
-        """更新课程"""
+    async def update_course(self, course_id: int, course_data: Dict[str, Any],
+                            expected_versions: Optional[List[int]] = None):
+        """
+        更新课程并返回更新后的课程。expected_versions 不为 None 时仅在当前版本属于其中时更新；
+        课程不存在抛出 NotFoundException，版本不符抛出 PreconditionFailedException
+        """
         pass
     
     @abstractmethod
     async def delete_course(self, course_id: int):
-        """删除课程"""
+        """删除课程（教学内容由外键级联删除），返回被删除的课程，不存在返回 None"""
         pass
     
     @abstractmethod
-    async def get_all_courses(self) -> List:
-        """获取所有课程"""
-        pass 
\ No newline at end of file
+    async def delete_courses(self, course_ids: List[int]) -> List[Tuple[int, int]]:
+        """批量删除课程，返回实际删除的 (id, teacher_id)"""
+        pass
+    
+    @abstractmethod
+    def savepoint(self) -> AsyncContextManager[None]:
+        """
+        在当前事务内开启保存点，块内出错时只回滚块内的写入；
+        数据库拒绝写入（如外键、约束冲突）时抛出 ValidationException
+        """
+        pass
+    
+    @abstractmethod
+    async def insert_courses(self, rows: List[Dict[str, Any]]) -> None:
+        """批量新建课程，一批只往返一次"""
+        pass
+    
+    @abstractmethod
+    async def update_courses(self, rows: List[Dict[str, Any]]) -> Dict[int, int]:
+        """
+        按 rows 中的 id 批量覆盖课程并递增版本号，返回存在的课程 {id: 更新前的 teacher_id}，
+        不存在的 id 不更新也不在返回值中
+        """
+        pass
+    
+    @abstractmethod
+    def stream_courses(self, filters: Optional[Dict[str, Any]] = None,
+                       batch_size: int = 500) -> AsyncIterator[Sequence]:
+        """按 id 顺序流式读取符合筛选条件的课程行，每次产出至多 batch_size 行，不把全表载入内存"""
+        pass
+    
+    @abstractmethod
+    async def list_courses(self, limit: int, after: Optional[Tuple[datetime, int]] = None,
+                           filters: Optional[Dict[str, Any]] = None, descending: bool = True) -> List:
+        """
+        按 (created_at, id) 排序分页获取课程行（可按列名取属性的只读行），after 为上一页最后一条的排序键。
+        filters 可含 teacher_id、status（等值）和 created_from、created_to（创建时间范围，左闭右开）
+        """
+        pass
+    
+    @abstractmethod
+    async def estimate_course_count(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        """估算符合筛选条件的课程总数"""
+        pass
+    
+    @abstractmethod
+    async def search_courses(self, query: str, limit: int,
+                             after: Optional[Tuple[float, int]] = None) -> List[Tuple[float, Any]]:
+        """按关键词搜索课程，返回按 (分数, id) 倒序的 (分数, 课程)，after 为上一页最后一条的 (分数, id)"""
+        pass
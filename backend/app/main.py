@@ -5,8 +5,24 @@ from app.admin.adapter.input import router as admin_router
 from app.teacher.adapter.input import router as teacher_router
 from app.auth.adapter.input import router as auth_router
 from app.course.adapter.input import router as course_router
+from app.api.health import router as health_router
+from app.core.admission import AdmissionControlMiddleware, admission_controller, parse_priorities
+from app.core.config import settings
+from app.core.helpers.serialization import FastJSONResponse
+from app.core.lifespan import lifespan
 
-app = FastAPI(title="Teaching Assistance Backend", version="1.0.0")
+app = FastAPI(title="Teaching Assistance Backend", version="1.0.0", lifespan=lifespan,
+              default_response_class=FastJSONResponse)
+
+# 准入控制：需先于 CORS 注册，使 503 响应同样带有 CORS 头
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        controller=admission_controller,
+        priorities=parse_priorities(settings.ADMISSION_PRIORITIES),
+        default_priority=settings.ADMISSION_DEFAULT_PRIORITY,
+        exempt_paths=settings.ADMISSION_EXEMPT_PATHS,
+    )
 
 # 配置 CORS
 app.add_middleware(
@@ -23,6 +39,7 @@ app.include_router(user_router)
 app.include_router(admin_router)
 app.include_router(teacher_router)
 app.include_router(course_router)
+app.include_router(health_router)
 
 @app.get("/")
 def read_root():
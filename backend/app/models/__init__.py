@@ -1,10 +1,25 @@
+from sqlalchemy import event
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
 
+@event.listens_for(Base, "init", propagate=True)
+def _init_defaults(target, args, kwargs):
+    """
+    新建对象时显式置空 updated_at，否则 eager_defaults 会在 INSERT 后再 SELECT 一次该列；
+    版本号从 1 开始，构造后即可用于生成 ETag
+    """
+    if "updated_at" in target.__mapper__.columns:
+        kwargs.setdefault("updated_at", None)
+    if "version" in target.__mapper__.columns:
+        kwargs.setdefault("version", 1)
+
 # 导入所有模型，确保 Alembic 能够检测到
 from .user import User
 from .course import Course
 from .course_objective import CourseObjective
 from .course_syllabus import CourseSyllabus
-from .course_material import CourseMaterial 
+from .course_material import CourseMaterial
+from .revoked_token import RevokedToken
+from .refresh_token import RefreshToken
+from .entity_counter import EntityCounter 
@@ -1,9 +1,22 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, DDL, event
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.models import Base
 
 class Course(Base):
     __tablename__ = "courses"
+    __mapper_args__ = {"eager_defaults": True}  # INSERT/UPDATE 通过 RETURNING 带回服务端默认值
+    __table_args__ = (
+        # 按 (created_at, id) 游标分页；等值筛选列在前，创建时间范围和排序使用后续列
+        Index("ix_courses_created_at_id", "created_at", "id"),
+        Index("ix_courses_teacher_id_created_at_id", "teacher_id", "created_at", "id"),
+        Index("ix_courses_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_courses_teacher_id_status_created_at_id", "teacher_id", "status", "created_at", "id"),
+        # 关键词搜索：pg_trgm 三元组 GIN 索引，支持 ILIKE '%词%' 和相似度 (%) 匹配
+        Index("ix_courses_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index("ix_courses_description_trgm", "description", postgresql_using="gin",
+              postgresql_ops={"description": "gin_trgm_ops"}),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False, index=True)
@@ -11,4 +24,16 @@ class Course(Base):
     teacher_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     status = Column(String(50), default="active")  # active, inactive, draft
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    version = Column(Integer, nullable=False, default=1, server_default="1")  # 每次更新加一，用于乐观并发控制和 ETag
+    
+    # 每门课程各一份教学目标、大纲和讲义；lazy="raise" 禁止隐式懒加载，需显式 joinedload
+    objective = relationship("CourseObjective", uselist=False, lazy="raise", viewonly=True)
+    syllabus = relationship("CourseSyllabus", uselist=False, lazy="raise", viewonly=True)
+    material = relationship("CourseMaterial", uselist=False, lazy="raise", viewonly=True)
+
+# gin_trgm_ops 由 pg_trgm 扩展提供；create_all 建表前先创建扩展，否则上面的 GIN 索引建不出来（迁移中同样先建扩展）
+event.listen(
+    Course.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
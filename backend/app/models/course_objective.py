@@ -4,9 +4,10 @@ from app.models import Base
 
 class CourseObjective(Base):
     __tablename__ = "course_objectives"
+    __mapper_args__ = {"eager_defaults": True}  # INSERT/UPDATE 通过 RETURNING 带回服务端默认值
     
     id = Column(Integer, primary_key=True, index=True)
-    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False, index=True)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False, index=True)  # 删除课程时由数据库级联删除
     course_content = Column(Text)
     teaching_target = Column(Text)
     content = Column(Text, nullable=True)
@@ -4,9 +4,10 @@ from app.models import Base
 
 class CourseSyllabus(Base):
     __tablename__ = "course_syllabi"
+    __mapper_args__ = {"eager_defaults": True}  # INSERT/UPDATE 通过 RETURNING 带回服务端默认值
     
     id = Column(Integer, primary_key=True, index=True)
-    course_id = Column(Integer, ForeignKey("courses.id"), nullable=False, index=True)
+    course_id = Column(Integer, ForeignKey("courses.id", ondelete="CASCADE"), nullable=False, index=True)  # 删除课程时由数据库级联删除
     content = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
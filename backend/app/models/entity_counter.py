@@ -0,0 +1,13 @@
+from sqlalchemy import BigInteger, Column, SmallInteger, String
+from . import Base
+
+class EntityCounter(Base):
+    """
+    实体计数器：写事务提交前累加增量，读取时按 name 求和。
+    每个计数器分成若干槽位（slot），并发写入随机落在不同的行上，减少热点行锁等待
+    """
+    __tablename__ = "entity_counters"
+    
+    name = Column(String(100), primary_key=True)  # users、users.role.teacher、courses.status.active 等
+    slot = Column(SmallInteger, primary_key=True, default=0)
+    value = Column(BigInteger, nullable=False, default=0)
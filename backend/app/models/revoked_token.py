@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+from app.models import Base
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+    
+    jti = Column(String(64), primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
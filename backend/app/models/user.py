@@ -4,6 +4,7 @@ from . import Base
 
 class User(Base):
     __tablename__ = "users"
+    __mapper_args__ = {"eager_defaults": True}  # INSERT/UPDATE 通过 RETURNING 带回服务端默认值
     
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(50), unique=True, nullable=False, index=True)
@@ -12,4 +13,9 @@ class User(Base):
     role = Column(String(20), default="teacher")  # teacher, admin
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    @property
+    def status(self) -> str:
+        """账号状态，与用户列表查询中的 status 列取值一致"""
+        return "inactive" if self.is_active is False else "active"
@@ -1,20 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.uow import UnitOfWorkRoute
 from app.teacher.application.schema import (
     CourseObjectiveRequest, CourseObjectiveResponse,
     CourseSyllabusRequest, CourseSyllabusResponse,
     CourseMaterialRequest, CourseMaterialResponse,
     GenerateRequest
 )
-from app.teacher.application.service import TeacherService
+from app.teacher.application.service import TeacherService, content_etag
 from app.teacher.adapter.repository import SQLAlchemyTeacherRepository
+from app.core.helpers.etag import etag_matches, not_modified, set_etag
+from typing import Optional
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/teacher", tags=["teacher"])
+router = APIRouter(prefix="/teacher", tags=["teacher"], route_class=UnitOfWorkRoute)
 
 def get_teacher_repo(db: AsyncSession = Depends(get_db)):
     return SQLAlchemyTeacherRepository(db)
@@ -22,11 +25,28 @@ def get_teacher_repo(db: AsyncSession = Depends(get_db)):
 def get_teacher_service(repo = Depends(get_teacher_repo)):
     return TeacherService(repo)
 
+def get_teacher_read_repo(db: AsyncSession = Depends(get_read_db)):
+    return SQLAlchemyTeacherRepository(db)
+
+def get_teacher_read_service(repo = Depends(get_teacher_read_repo)):
+    return TeacherService(repo)
+
 # 课程教学目标相关接口
 @router.get("/objective/{course_id}", response_model=CourseObjectiveResponse)
-async def get_course_objective(course_id: int, service = Depends(get_teacher_service)):
+async def get_course_objective(
+    course_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    service = Depends(get_teacher_read_service)
+):
     try:
-        return await service.get_course_objective(course_id)
+        if if_none_match:
+            etag = await service.get_course_objective_etag(course_id)
+            if etag and etag_matches(if_none_match, etag):
+                return not_modified(etag)
+        content = await service.get_course_objective(course_id)
+        set_etag(response, content_etag(content))
+        return content
     except Exception as e:
         logger.error(f"获取课程教学目标失败: {e}")
         raise HTTPException(status_code=500, detail="获取课程教学目标失败")
@@ -49,9 +69,20 @@ async def save_course_objective(course_id: int, request: CourseObjectiveRequest,
 
 # 课程大纲相关接口
 @router.get("/syllabus/{course_id}")
-async def get_course_syllabus(course_id: int, service = Depends(get_teacher_service)):
+async def get_course_syllabus(
+    course_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    service = Depends(get_teacher_read_service)
+):
     try:
-        return await service.get_course_syllabus(course_id)
+        if if_none_match:
+            etag = await service.get_course_syllabus_etag(course_id)
+            if etag and etag_matches(if_none_match, etag):
+                return not_modified(etag)
+        content = await service.get_course_syllabus(course_id)
+        set_etag(response, content_etag(content))
+        return content
     except Exception as e:
         logger.error(f"获取课程大纲失败: {e}")
         raise HTTPException(status_code=500, detail="获取课程大纲失败")
@@ -74,9 +105,20 @@ async def save_course_syllabus(course_id: int, request: CourseSyllabusRequest, s
 
 # 课程讲义相关接口
 @router.get("/material/{course_id}")
-async def get_course_material(course_id: int, service = Depends(get_teacher_service)):
+async def get_course_material(
+    course_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    service = Depends(get_teacher_read_service)
+):
     try:
-        return await service.get_course_material(course_id)
+        if if_none_match:
+            etag = await service.get_course_material_etag(course_id)
+            if etag and etag_matches(if_none_match, etag):
+                return not_modified(etag)
+        content = await service.get_course_material(course_id)
+        set_etag(response, content_etag(content))
+        return content
     except Exception as e:
         logger.error(f"获取课程讲义失败: {e}")
         raise HTTPException(status_code=500, detail="获取课程讲义失败")
@@ -4,6 +4,7 @@ from app.models.course_syllabus import CourseSyllabus
 from app.models.course_material import CourseMaterial
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import func
 
 class SQLAlchemyTeacherRepository(TeacherRepository):
     def __init__(self, db: AsyncSession):
@@ -18,14 +19,12 @@ class SQLAlchemyTeacherRepository(TeacherRepository):
         if existing:
             existing.course_content = course_content
             existing.teaching_target = teaching_target
-            await self.db.commit()
-            await self.db.refresh(existing)
+            await self.db.flush()
             return existing
         else:
             objective = CourseObjective(course_id=course_id, course_content=course_content, teaching_target=teaching_target)
             self.db.add(objective)
-            await self.db.commit()
-            await self.db.refresh(objective)
+            await self.db.flush()
             return objective
     
     async def get_course_syllabus(self, course_id: int):
@@ -39,15 +38,13 @@ class SQLAlchemyTeacherRepository(TeacherRepository):
         existing = await self.get_course_syllabus(course_id)
         if existing:
             existing.content = content
-            await self.db.commit()
-            await self.db.refresh(existing)
+            await self.db.flush()
             print(f"[DEBUG] updated syllabus: id={existing.id}, content={existing.content}")
             return existing
         else:
             syllabus = CourseSyllabus(course_id=course_id, content=content)
             self.db.add(syllabus)
-            await self.db.commit()
-            await self.db.refresh(syllabus)
+            await self.db.flush()
             print(f"[DEBUG] created syllabus: id={syllabus.id}, content={syllabus.content}")
             return syllabus
     
@@ -62,13 +59,20 @@ class SQLAlchemyTeacherRepository(TeacherRepository):
         existing = await self.get_course_material(course_id)
         if existing:
             existing.content = content
-            await self.db.commit()
-            await self.db.refresh(existing)
+            await self.db.flush()
             return existing
         else:
             # 创建新的
             material = CourseMaterial(course_id=course_id, content=content)
             self.db.add(material)
-            await self.db.commit()
-            await self.db.refresh(material)
-            return material 
+            await self.db.flush()
+            return material
+    
+    async def get_content_stamp(self, model, course_id: int):
+        # 不加载 content 等大字段，供条件请求判断是否未修改
+        result = await self.db.execute(
+            select(model.id, func.coalesce(model.updated_at, model.created_at))
+            .where(model.course_id == course_id)
+        )
+        return result.first()
+
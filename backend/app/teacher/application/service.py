@@ -1,11 +1,36 @@
 from app.teacher.domain.repository import TeacherRepository
 from app.teacher.application.schema import CourseObjectiveRequest, CourseSyllabusRequest, CourseMaterialRequest, GenerateRequest
 from app.core.exceptions import NotFoundException
+from app.core.helpers.etag import timestamp_etag
+from app.models.course_objective import CourseObjective
+from app.models.course_syllabus import CourseSyllabus
+from app.models.course_material import CourseMaterial
+
+def content_etag(content):
+    """教学内容的 ETag，由 id 和最后修改时间生成；内容不存在时返回 None"""
+    get = content.get if isinstance(content, dict) else lambda key: getattr(content, key, None)
+    modified_at = get("updated_at") or get("created_at")
+    if get("id") is None or modified_at is None:
+        return None
+    return timestamp_etag(get("id"), modified_at)
 
 class TeacherService:
     def __init__(self, repo: TeacherRepository):
         self.repo = repo
     
+    async def _content_etag(self, model, course_id: int):
+        stamp = await self.repo.get_content_stamp(model, course_id)
+        return timestamp_etag(*stamp) if stamp else None
+    
+    async def get_course_objective_etag(self, course_id: int):
+        return await self._content_etag(CourseObjective, course_id)
+    
+    async def get_course_syllabus_etag(self, course_id: int):
+        return await self._content_etag(CourseSyllabus, course_id)
+    
+    async def get_course_material_etag(self, course_id: int):
+        return await self._content_etag(CourseMaterial, course_id)
+    
     async def get_course_objective(self, course_id: int):
         obj = await self.repo.get_course_objective(course_id)
         if obj:
@@ -26,4 +26,9 @@ class TeacherRepository(ABC):
     
     @abstractmethod
     async def save_course_material(self, course_id: int, content: str):
-        pass 
+        pass
+    
+    @abstractmethod
+    async def get_content_stamp(self, model, course_id: int):
+        """只查询教学内容（目标/大纲/讲义）的 id 和最后修改时间，不存在返回 None"""
+        pass
@@ -1,26 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.uow import UnitOfWorkRoute
 from app.user.application.schema import UserRead, UserCreate
 from app.user.application.service import get_users, create_user
 from app.user.adapter.repository import SQLAlchemyUserRepository
 from app.user.application.exception import UserNotFoundException
+from app.core.helpers.serialization import json_response
 import logging
 
 # 设置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=UnitOfWorkRoute)
 
 def get_user_repo(db: AsyncSession = Depends(get_db)):
     return SQLAlchemyUserRepository(db)
 
+def get_user_read_repo(db: AsyncSession = Depends(get_read_db)):
+    return SQLAlchemyUserRepository(db)
+
 @router.get("/", response_model=list[UserRead])
-async def list_users(repo = Depends(get_user_repo)):
+async def list_users(repo = Depends(get_user_read_repo)):
     try:
         logger.info("Attempting to get users")
-        return await get_users(repo)
+        return json_response(await get_users(repo))
     except UserNotFoundException as e:
         logger.warning(f"UserNotFoundException: {e}")
         raise HTTPException(status_code=404, detail=str(e))
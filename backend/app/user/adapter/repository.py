@@ -1,5 +1,6 @@
 from app.user.domain.repository import UserRepository
 from app.models.user import User
+from app.core.helpers.counters import add_counts, user_counts
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
@@ -8,11 +9,11 @@ class SQLAlchemyUserRepository(UserRepository):
         self.db = db
 
     async def get_all(self):
-        result = await self.db.execute(select(User))
-        return result.scalars().all()
+        result = await self.db.execute(select(User.id, User.username, User.email).order_by(User.id))
+        return result.all()
 
     async def create(self, user: User):
         self.db.add(user)
-        await self.db.commit()
-        await self.db.refresh(user)
-        return user 
+        await self.db.flush()
+        await add_counts(self.db, user_counts(user.role))
+        return user
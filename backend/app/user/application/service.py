@@ -1,13 +1,14 @@
 from app.models.user import User
 from app.user.domain.repository import UserRepository
-from app.user.application.schema import UserCreate
+from app.user.application.schema import UserCreate, UserRead
+from app.core.helpers.serialization import validate_list
 from app.user.application.exception import UserNotFoundException
 
 async def get_users(repo: UserRepository):
     users = await repo.get_all()
     if not users:
         raise UserNotFoundException("No users found")
-    return users
+    return validate_list(UserRead, users)
 
 async def create_user(repo: UserRepository, user_create: UserCreate):
     user = User(username=user_create.username, email=user_create.email)
@@ -0,0 +1,82 @@
+"""
+/auth/me 延迟基准：并发登录时的 p99
+
+登录会触发 bcrypt 校验。哈希计算若在事件循环上同步执行，
+/auth/me 的尾延迟会随登录并发数明显上升；移入执行器后应基本保持基线水平。
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+async def login(client: httpx.AsyncClient, args) -> str:
+    response = await client.post("/auth/login", json={
+        "username": args.username,
+        "email": args.email,
+        "password": args.password,
+    })
+    response.raise_for_status()
+    return response.json()["token"]
+
+async def login_loop(client: httpx.AsyncClient, args, stop: asyncio.Event, counter: list):
+    while not stop.is_set():
+        await login(client, args)
+        counter[0] += 1
+
+async def probe_me(client: httpx.AsyncClient, token: str, duration: float, interval: float):
+    latencies = []
+    headers = {"Authorization": f"Bearer {token}"}
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.get("/auth/me", headers=headers)
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+def report(title: str, latencies, logins: int = 0):
+    print(f"== {title}")
+    print(f"   样本数: {len(latencies)}  并发期间登录次数: {logins}")
+    print(f"   p50: {percentile(latencies, 0.50):.1f} ms  "
+          f"p95: {percentile(latencies, 0.95):.1f} ms  "
+          f"p99: {percentile(latencies, 0.99):.1f} ms  "
+          f"mean: {statistics.mean(latencies) if latencies else 0:.1f} ms")
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.concurrency + 4)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        token = await login(client, args)
+
+        baseline = await probe_me(client, token, args.duration, args.interval)
+        report("基线（无登录负载）", baseline)
+
+        stop = asyncio.Event()
+        counter = [0]
+        workers = [asyncio.create_task(login_loop(client, args, stop, counter)) for _ in range(args.concurrency)]
+        try:
+            loaded = await probe_me(client, token, args.duration, args.interval)
+        finally:
+            stop.set()
+            await asyncio.gather(*workers, return_exceptions=True)
+        report(f"并发登录 x{args.concurrency}", loaded, counter[0])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/auth/me 在并发登录下的延迟基准")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=16, help="并发登录协程数")
+    parser.add_argument("--duration", type=float, default=10.0, help="每轮测量时长（秒）")
+    parser.add_argument("--interval", type=float, default=0.01, help="/auth/me 探测间隔（秒）")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,93 @@
+"""
+课程列表分页方式对比：OFFSET 与 (created_at, id) 游标
+
+直接连接 DATABASE_URL 指向的数据库：
+- 为指定教师批量插入 --rows 门课程（标题以 bench_page_ 开头，结束后删除，--keep 保留）
+- 分别用 OFFSET 和游标读取第 1、10、100、1000... 页，输出每页耗时
+- 对比 count(*) 与 pg_class.reltuples 估算的耗时
+
+需先执行 alembic upgrade head 创建分页索引，--teacher-id 需为已存在的用户。
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+
+OFFSET_SQL = text(
+    "SELECT * FROM courses WHERE teacher_id = :teacher_id "
+    "ORDER BY created_at DESC, id DESC LIMIT :limit OFFSET :offset"
+)
+KEYSET_SQL = text(
+    "SELECT * FROM courses WHERE teacher_id = :teacher_id AND (created_at, id) < (:created_at, :id) "
+    "ORDER BY created_at DESC, id DESC LIMIT :limit"
+)
+# 定位第 N 页起点，只用于准备游标，不计入耗时
+BOUNDARY_SQL = text(
+    "SELECT created_at, id FROM courses WHERE teacher_id = :teacher_id "
+    "ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET :offset"
+)
+
+async def seed(conn, teacher_id: int, rows: int):
+    await conn.execute(text(
+        "INSERT INTO courses (title, teacher_id, status, created_at) "
+        "SELECT 'bench_page_' || n, :teacher_id, 'active', now() - n * interval '1 second' "
+        "FROM generate_series(1, :rows) AS n"
+    ), {"teacher_id": teacher_id, "rows": rows})
+    await conn.execute(text("ANALYZE courses"))
+
+async def timed(conn, statement, params, repeat: int) -> float:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        (await conn.execute(statement, params)).fetchall()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations) * 1000
+
+async def main(args):
+    engine = create_async_engine(settings.DATABASE_URL)
+    async with engine.connect() as conn:
+        await seed(conn, args.teacher_id, args.rows)
+        await conn.commit()
+        try:
+            print(f"{'页码':>8} {'OFFSET(ms)':>12} {'游标(ms)':>10}")
+            page = 1
+            while (page - 1) * args.page_size < args.rows:
+                offset = (page - 1) * args.page_size
+                params = {"teacher_id": args.teacher_id, "limit": args.page_size}
+                offset_ms = await timed(conn, OFFSET_SQL, {**params, "offset": offset}, args.repeat)
+                if page == 1:
+                    keyset_ms = offset_ms
+                else:
+                    boundary = (await conn.execute(
+                        BOUNDARY_SQL, {"teacher_id": args.teacher_id, "offset": offset - 1}
+                    )).one()
+                    keyset_ms = await timed(
+                        conn, KEYSET_SQL, {**params, "created_at": boundary.created_at, "id": boundary.id}, args.repeat
+                    )
+                print(f"{page:>8} {offset_ms:>12.2f} {keyset_ms:>10.2f}")
+                page *= 10
+
+            count_ms = await timed(conn, text("SELECT count(*) FROM courses"), {}, args.repeat)
+            estimate_ms = await timed(
+                conn, text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'courses'::regclass"), {}, args.repeat
+            )
+            print(f"count(*): {count_ms:.2f}ms  reltuples 估算: {estimate_ms:.2f}ms")
+        finally:
+            if not args.keep:
+                await conn.execute(text("DELETE FROM courses WHERE title LIKE 'bench\\_page\\_%'"))
+                await conn.commit()
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="课程列表 OFFSET 与游标分页对比")
+    parser.add_argument("--teacher-id", type=int, required=True)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help="保留插入的测试数据")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,82 @@
+"""
+课程关键词搜索延迟基准（10 万门课程）
+
+- 数据库：直接连接 DATABASE_URL，为指定教师批量插入 --rows 门课程（标题以 bench_search_ 开头，
+  结束后删除，--keep 保留），通过 SQLAlchemyCourseRepository.search_courses 测量 pg_trgm 索引查询的
+  p50/p95/p99，并与 --target-ms（默认 p95 ≤ 50ms）比较
+
+需先执行 alembic upgrade head 创建扩展和 GIN 索引，--teacher-id 需为已存在的用户。
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.config import settings
+from app.course.adapter.repository import SQLAlchemyCourseRepository
+from app.models.course import Course
+
+SUBJECTS = ["数据结构", "算法", "数据库", "操作系统", "计算机网络", "编译原理", "机器学习", "线性代数",
+            "Python", "Java", "Data Mining", "Operating Systems", "Software Engineering", "Statistics"]
+LEVELS = ["导论", "进阶", "实验", "专题", "Introduction", "Advanced", "Lab"]
+QUERIES = ["数据结构", "算法", "机器学习进阶", "python", "operating", "Sofware Enginering", "网络实验", "zzz"]
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+def generate_rows(rows: int, teacher_id: int, seed: int = 7):
+    rng = random.Random(seed)
+    return [
+        {
+            "title": f"bench_search_{i} {rng.choice(SUBJECTS)}{rng.choice(LEVELS)}",
+            "description": f"{rng.choice(SUBJECTS)} {rng.choice(SUBJECTS)} 课程",
+            "teacher_id": teacher_id,
+            "status": "active",
+        }
+        for i in range(rows)
+    ]
+
+def report(name: str, durations, target_ms=None):
+    p50, p95, p99 = (percentile(durations, q) * 1000 for q in (0.5, 0.95, 0.99))
+    line = f"{name:<12} p50={p50:7.2f}ms  p95={p95:7.2f}ms  p99={p99:7.2f}ms"
+    if target_ms is not None:
+        line += f"  ({'达标' if p95 <= target_ms else '未达标'}，目标 p95 ≤ {target_ms}ms)"
+    print(line)
+
+async def bench_database(args, rows):
+    engine = create_async_engine(settings.DATABASE_URL)
+    async with AsyncSession(engine) as session:
+        for start in range(0, len(rows), 5000):
+            await session.execute(insert(Course), rows[start:start + 5000])
+        await session.commit()
+        await session.execute(text("ANALYZE courses"))
+        try:
+            repo = SQLAlchemyCourseRepository(session)
+            durations = []
+            for _ in range(args.repeat):
+                for query in QUERIES:
+                    start = time.perf_counter()
+                    await repo.search_courses(query, args.page_size + 1)
+                    durations.append(time.perf_counter() - start)
+            report("PostgreSQL", durations, args.target_ms)
+        finally:
+            if not args.keep:
+                await session.execute(text("DELETE FROM courses WHERE title LIKE 'bench\\_search\\_%'"))
+                await session.commit()
+    await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="课程关键词搜索延迟基准")
+    parser.add_argument("--teacher-id", type=int, default=1)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--target-ms", type=float, default=50.0)
+    parser.add_argument("--keep", action="store_true", help="保留插入的测试数据")
+    args = parser.parse_args()
+
+    asyncio.run(bench_database(args, generate_rows(args.rows, args.teacher_id)))
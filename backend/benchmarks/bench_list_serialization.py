@@ -0,0 +1,91 @@
+"""
+列表接口序列化开销对比（默认 1 万行）
+
+在内存 SQLite 中插入 --rows 门课程和用户，分别取回 ORM 对象和 Row，测量从查询结果到 JSON 响应体的每行耗时：
+- 改造前：逐行 Model.from_orm，再由 FastAPI 按 response_model 校验、jsonable_encoder、json.dumps
+- 改造后：缓存的 TypeAdapter(List[Model]) 一次校验，再由 orjson 渲染（app.core.helpers.serialization）
+
+不需要启动后端服务，也不连接 DATABASE_URL；只统计序列化，不含查询本身。
+"""
+import argparse
+import asyncio
+import time
+import warnings
+from datetime import datetime, timezone
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import case, create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.admin.application.schema import UserResponse
+from app.core.helpers.serialization import json_response, orjson, validate_list
+from app.course.application.schema import CourseResponse
+from app.models.course import Course
+from app.models.user import User
+
+def seed(session: Session, rows: int):
+    now = datetime.now(timezone.utc)
+    session.execute(insert(User), [
+        {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "password": "x",
+         "role": "teacher", "is_active": i % 10 != 0, "created_at": now}
+        for i in range(1, rows + 1)
+    ])
+    session.execute(insert(Course), [
+        {"id": i, "title": f"课程 {i}", "description": "数据结构与算法基础" * 3, "teacher_id": i,
+         "status": "active", "created_at": now, "version": 1}
+        for i in range(1, rows + 1)
+    ])
+    session.commit()
+
+def before(model, objects) -> bytes:
+    # 与改造前的路由相同：服务层 from_orm，FastAPI 再按 response_model=list[Model] 处理
+    field = create_response_field(name="Response", type_=list[model])
+    items = [model.from_orm(obj) for obj in objects]
+    content = asyncio.run(serialize_response(field=field, response_content=items))
+    return JSONResponse(content).body
+
+def after(model, rows) -> bytes:
+    return json_response(validate_list(model, rows)).body
+
+def per_row_us(func, model, source, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(model, source)
+        best = min(best, time.perf_counter() - start)
+    return best / len(source) * 1e6
+
+def main(args):
+    warnings.simplefilter("ignore")  # from_orm 的弃用警告
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    Course.__table__.create(engine)
+    with Session(engine) as session:
+        seed(session, args.rows)
+        status = case((User.is_active.is_(False), "inactive"), else_="active").label("status")
+        sources = {
+            "课程": (CourseResponse,
+                   session.scalars(select(Course)).all(),
+                   session.execute(select(*Course.__table__.columns)).all()),
+            "用户": (UserResponse,
+                   session.scalars(select(User)).all(),
+                   session.execute(select(User.id, User.username, User.email, User.role, status,
+                                          User.created_at)).all()),
+        }
+
+    print(f"行数 {args.rows}，JSON 渲染：{'orjson' if orjson else '标准库 json（未安装 orjson）'}")
+    print(f"{'列表':<6}{'改造前(µs/行)':>16}{'改造后 ORM(µs/行)':>20}{'改造后 Row(µs/行)':>20}{'提升':>8}")
+    for name, (model, objects, rows) in sources.items():
+        old = per_row_us(before, model, objects, args.repeat)
+        new_orm = per_row_us(after, model, objects, args.repeat)
+        new_rows = per_row_us(after, model, rows, args.repeat)
+        print(f"{name:<6}{old:>16.2f}{new_orm:>20.2f}{new_rows:>20.2f}{old / new_rows:>7.1f}x")
+    engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="列表接口序列化开销对比")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,96 @@
+"""
+刷新令牌对 bcrypt 开销的影响
+
+模拟若干活跃用户在一个教学会话内反复续期访问令牌：
+- relogin 模式：每次访问令牌过期都重新登录（每次一次 bcrypt 校验）
+- refresh 模式：登录一次，之后通过 /auth/refresh 续期（不做 bcrypt）
+
+bcrypt CPU 按「登录次数 × 本机单次校验耗时」估算，同时给出两种模式的实际请求耗时。
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+from passlib.context import CryptContext
+
+def measure_bcrypt_verify(samples: int = 5) -> float:
+    """测量本机单次 bcrypt 校验耗时（秒）"""
+    context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    hashed = context.hash("benchmark-password")
+    durations = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.verify("benchmark-password", hashed)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+async def ensure_user(client: httpx.AsyncClient, index: int, password: str):
+    user = {
+        "username": f"bench_refresh_{index}",
+        "email": f"bench_refresh_{index}@example.com",
+        "password": password,
+    }
+    await client.post("/auth/register", json=user)
+    return user
+
+async def login(client: httpx.AsyncClient, user):
+    response = await client.post("/auth/login", json=user)
+    response.raise_for_status()
+    return response.json()
+
+async def run_user(client: httpx.AsyncClient, user, renewals: int, mode: str, stats: dict):
+    start = time.perf_counter()
+    session = await login(client, user)
+    stats["logins"] += 1
+    refresh_token = session.get("refreshToken")
+
+    for _ in range(renewals):
+        if mode == "refresh" and refresh_token:
+            response = await client.post("/auth/refresh", json={"refreshToken": refresh_token})
+            response.raise_for_status()
+            refresh_token = response.json()["refreshToken"]
+            stats["refreshes"] += 1
+        else:
+            await login(client, user)
+            stats["logins"] += 1
+    stats["durations"].append(time.perf_counter() - start)
+
+async def run_mode(client: httpx.AsyncClient, users, renewals: int, mode: str):
+    stats = {"logins": 0, "refreshes": 0, "durations": []}
+    await asyncio.gather(*(run_user(client, user, renewals, mode, stats) for user in users))
+    return stats
+
+def report(mode: str, stats: dict, users: int, verify_cost: float):
+    bcrypt_cpu = stats["logins"] * verify_cost
+    print(f"== {mode}")
+    print(f"   登录次数: {stats['logins']}  刷新次数: {stats['refreshes']}")
+    print(f"   每用户 bcrypt 校验: {stats['logins'] / users:.1f} 次，"
+          f"估算 bcrypt CPU: {bcrypt_cpu / users * 1000:.0f} ms/用户")
+    print(f"   每用户续期总耗时: {statistics.mean(stats['durations']) * 1000:.0f} ms")
+    return bcrypt_cpu
+
+async def main(args):
+    verify_cost = measure_bcrypt_verify()
+    print(f"单次 bcrypt 校验耗时: {verify_cost * 1000:.0f} ms")
+    # 会话时长 / 访问令牌有效期 = 续期次数
+    renewals = max(0, int(args.session_hours * 60 // args.access_minutes) - 1)
+    print(f"用户数: {args.users}  会话时长: {args.session_hours} 小时  每用户续期次数: {renewals}")
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=120) as client:
+        users = [await ensure_user(client, i, args.password) for i in range(args.users)]
+        relogin_cpu = report("relogin", await run_mode(client, users, renewals, "relogin"), args.users, verify_cost)
+        refresh_cpu = report("refresh", await run_mode(client, users, renewals, "refresh"), args.users, verify_cost)
+
+    if relogin_cpu:
+        print(f"bcrypt CPU 降低: {(1 - refresh_cpu / relogin_cpu) * 100:.1f}%")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="刷新令牌对 bcrypt 开销的影响")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=20, help="活跃用户数")
+    parser.add_argument("--session-hours", type=float, default=4.0, help="单个教学会话时长")
+    parser.add_argument("--access-minutes", type=float, default=30.0, help="访问令牌有效期（分钟）")
+    parser.add_argument("--password", default="benchmark-password")
+    asyncio.run(main(parser.parse_args()))
@@ -2,9 +2,10 @@ import pytest
 import asyncio
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from fastapi import Request
 from fastapi.testclient import TestClient
 from app.main import app
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
 from app.core.config import settings
 
 # 测试数据库配置
@@ -44,6 +45,7 @@ def client(test_db):
             test_db.close()
     
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
@@ -61,4 +63,48 @@ def sample_user_data():
         "email": "test@example.com",
         "password": "testpassword123",
         "role": "teacher"
-    } 
+    }
+
+@pytest.fixture
+def recording_db(tmp_path):
+    """
+    文件 SQLite 上建好全部表的请求级会话（替换 get_db，只读请求的 get_read_db 也使用同一个库），按顺序记录每条语句的类型及提交、回滚，
+    用于断言写接口的数据库往返次数。seed(*objects) 预先写入数据，engine 为同一数据库的同步引擎，用于核对结果
+    """
+    from types import SimpleNamespace
+    from sqlalchemy import event, pool
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from app.core.uow import UnitOfWork
+    from app.models import Base
+    
+    path = tmp_path / "test.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(sync_engine)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=pool.NullPool)
+    round_trips = []
+    event.listen(engine.sync_engine, "before_cursor_execute",
+                 lambda conn, cursor, sql, *args: round_trips.append(sql.split(None, 1)[0].upper()))
+    event.listen(engine.sync_engine, "commit", lambda conn: round_trips.append("COMMIT"))
+    event.listen(engine.sync_engine, "rollback", lambda conn: round_trips.append("ROLLBACK"))
+    
+    def seed(*objects):
+        with sessionmaker(bind=sync_engine)() as session:
+            session.add_all(objects)
+            session.commit()
+    
+    async def override_get_db(request: Request):
+        async with async_sessionmaker(engine)() as session:
+            request.state.uow = UnitOfWork(session).bind()
+            yield session
+    
+    async def override_get_read_db(request: Request):
+        async with async_sessionmaker(engine)() as session:
+            yield session
+    
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_read_db
+    yield SimpleNamespace(round_trips=round_trips, seed=seed, engine=sync_engine)
+    app.dependency_overrides.clear()
+    asyncio.run(engine.dispose())
+    sync_engine.dispose()
+
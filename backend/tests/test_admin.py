@@ -1,5 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
+from app.main import app
 
 class TestAdmin:
     """管理员功能测试类"""
@@ -88,3 +89,147 @@ class TestAdmin:
         # 使用普通用户token访问管理员接口
         response = client.get("/admin/users", headers=auth_headers)
         assert response.status_code == 403  # 应该返回权限不足错误 
+
+class TestDashboardStats:
+    """仪表板统计测试类（一条聚合查询、计数器读取、短时缓存）"""
+    
+    def run(self, scenario, counters: bool = False):
+        """在 SQLite 中建好 3 个用户和 3 门课程后执行 scenario(session, statements)"""
+        import asyncio
+        from sqlalchemy import event
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        from app.core.helpers.counters import reconcile_counts
+        from app.models.course import Course
+        from app.models.entity_counter import EntityCounter
+        from app.models.user import User
+        
+        async def run():
+            engine = create_async_engine("sqlite+aiosqlite://")
+            async with engine.begin() as conn:
+                for model in (User, Course, EntityCounter):
+                    await conn.run_sync(model.__table__.create)
+            async with async_sessionmaker(engine)() as session:
+                session.add_all([User(username=f"u{i}", email=f"u{i}@example.com", password="x", role=role)
+                                 for i, role in enumerate(["admin", "teacher", "teacher"])])
+                session.add_all([Course(title=f"课程{i}", teacher_id=2, status=status)
+                                 for i, status in enumerate(["active", "active", "draft"])])
+                await session.commit()
+                if counters:
+                    await reconcile_counts(session)
+                    await session.commit()
+            statements = []
+            event.listen(engine.sync_engine, "before_cursor_execute",
+                         lambda conn, cursor, sql, *args: statements.append(sql))
+            async with async_sessionmaker(engine)() as session:
+                result = await scenario(session, statements)
+            await engine.dispose()
+            return result, statements
+        
+        return asyncio.run(run())
+    
+    def test_single_aggregate_query(self):
+        """测试未开启计数器时一条 COUNT(*) FILTER 语句得到全部统计"""
+        from app.admin.adapter.repository import SQLAlchemyAdminRepository
+        
+        async def scenario(session, statements):
+            return await SQLAlchemyAdminRepository(session).get_dashboard_stats()
+        
+        stats, statements = self.run(scenario)
+        assert len(statements) == 1 and "FILTER (WHERE" in statements[0]
+        assert stats["userStats"] == {"totalUsers": 3, "teacherCount": 2, "adminCount": 1}
+        assert stats["courseStats"]["totalCourses"] == 3 and stats["courseStats"]["activeCount"] == 2
+    
+    def test_counters_follow_writes(self, monkeypatch):
+        """测试开启计数器后只读计数器表，且用户的新建、改角色、删除都计入"""
+        from app.admin.adapter.repository import SQLAlchemyAdminRepository
+        from app.core.config import settings
+        from app.core.uow import UnitOfWork
+        from app.models.user import User
+        
+        monkeypatch.setattr(settings, "ENTITY_COUNTERS_ENABLED", True)
+        
+        async def scenario(session, statements):
+            repo = SQLAlchemyAdminRepository(session)
+            uow = UnitOfWork(session).bind()
+            await repo.create_user(User(username="new", email="new@example.com", password="x", role="admin"))
+            teacher = await repo.get_user_by_id(2)
+            teacher.role = "admin"
+            await repo.update_user(teacher)
+            await repo.delete_user(3)
+            await uow.commit()
+            statements.clear()
+            return await repo.get_dashboard_stats()
+        
+        stats, statements = self.run(scenario, counters=True)
+        assert len(statements) == 1 and "FROM entity_counters" in statements[0]
+        assert stats["userStats"] == {"totalUsers": 3, "teacherCount": 0, "adminCount": 3}
+        assert stats["courseStats"]["totalCourses"] == 3
+    
+    def test_cached_briefly(self, monkeypatch):
+        """测试 DASHBOARD_CACHE_TTL 内重复请求和并发请求都只统计一次"""
+        import asyncio
+        from app.admin.application.service import AdminService, dashboard_cache
+        
+        class CountingRepository:
+            calls = 0
+            
+            async def get_dashboard_stats(self):
+                self.calls += 1
+                await asyncio.sleep(0)
+                return {"userStats": {}, "courseStats": {}}
+        
+        repo = CountingRepository()
+        
+        async def run():
+            await dashboard_cache.clear()
+            service = AdminService(repo)
+            await asyncio.gather(*(service.get_dashboard_stats() for _ in range(5)))
+            await service.get_dashboard_stats()
+        
+        asyncio.run(run())
+        assert repo.calls == 1
+
+class TestAdminRoundTrips:
+    """管理员用户写接口的数据库往返次数测试类（每请求一次提交、不 refresh）"""
+    
+    @pytest.fixture
+    def db(self, recording_db):
+        from app.models.user import User
+        
+        recording_db.seed(User(id=1, username="teacher", email="teacher@example.com", password="x", role="teacher"))
+        return recording_db
+    
+    def test_add_user(self, db):
+        """测试新增用户：一条 INSERT ... RETURNING 和一次提交"""
+        response = TestClient(app).post("/admin/user/add", json={
+            "username": "new", "email": "new@example.com", "password": "secret", "role": "teacher"
+        })
+        assert response.status_code == 200
+        assert response.json()["created_at"] is not None
+        assert db.round_trips == ["INSERT", "COMMIT"]
+    
+    @pytest.mark.parametrize("path, body", [
+        ("/admin/user/1/updateName", {"username": "renamed"}),
+        ("/admin/user/1/updateEmail", {"email": "renamed@example.com"}),
+    ])
+    def test_update_user(self, db, path, body):
+        """测试修改用户名/邮箱：查询 + UPDATE ... RETURNING 和一次提交，不存在时 404 并回滚"""
+        client = TestClient(app)
+        response = client.put(path, json=body)
+        assert response.status_code == 200
+        assert db.round_trips == ["SELECT", "UPDATE", "COMMIT"]
+        
+        db.round_trips.clear()
+        assert client.put(path.replace("/1/", "/9/"), json=body).status_code == 404
+        assert db.round_trips == ["SELECT", "ROLLBACK"]
+    
+    def test_delete_user(self, db):
+        """测试删除用户：一条 DELETE ... RETURNING 和一次提交，不存在时 404 并回滚"""
+        client = TestClient(app)
+        assert client.delete("/admin/delete/1").status_code == 200
+        assert db.round_trips == ["DELETE", "COMMIT"]
+        
+        db.round_trips.clear()
+        assert client.delete("/admin/delete/1").status_code == 404
+        assert db.round_trips == ["DELETE", "ROLLBACK"]
+
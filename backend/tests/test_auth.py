@@ -1,6 +1,21 @@
+import asyncio
 import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
 from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
 from app.main import app
+from app.auth.adapter.input import get_auth_service
+from app.auth.adapter.repository import SQLAlchemyAuthRepository
+from app.auth.application.exception import DuplicateUserException
+from app.auth.application.schema import RegisterRequest
+from app.auth.application.service import AuthService
+from app.core.exceptions import UnauthorizedException
+from app.core.helpers.identity_cache import taken_identity_cache, release, mark_taken, is_username_taken
+from app.core.helpers.password import pwd_context
+from app.core.helpers.principal import principal_cache, invalidate_user_principals
+from app.core.helpers.rate_limit import login_limiter, InMemoryBucketBackend
+from app.core.helpers.token import create_access_token, hash_refresh_token
 
 class TestAuth:
     """认证功能测试类"""
@@ -84,3 +99,327 @@ class TestAuth:
         response = client.post("/auth/login", json=login_data)
         assert response.status_code == 401
         assert "用户名、邮箱或密码错误" in response.json()["detail"] 
+
+
+class TestCurrentUserCache:
+    """当前用户缓存测试类"""
+    
+    class FakeAuthRepository:
+        """只记录查询次数的内存仓库"""
+        def __init__(self, user):
+            self.user = user
+            self.lookups = 0
+        
+        async def get_user_by_id(self, user_id: int):
+            self.lookups += 1
+            return self.user if self.user and self.user.id == user_id else None
+    
+    @pytest.fixture
+    def user(self):
+        """示例用户"""
+        return SimpleNamespace(id=42, username="testuser", email="test@example.com", role="teacher")
+    
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        principal_cache.clear()
+        yield
+        principal_cache.clear()
+    
+    def test_cached_after_first_lookup(self, user):
+        """测试同一令牌只查询一次数据库"""
+        repo = self.FakeAuthRepository(user)
+        service = AuthService(repo)
+        token = create_access_token({"sub": str(user.id), "role": user.role})
+        
+        first = asyncio.run(service.get_current_user(token))
+        second = asyncio.run(service.get_current_user(token))
+        assert first.id == second.id == user.id
+        assert repo.lookups == 1
+    
+    def test_invalidate_on_user_change(self, user):
+        """测试用户被修改后缓存失效"""
+        repo = self.FakeAuthRepository(user)
+        service = AuthService(repo)
+        token = create_access_token({"sub": str(user.id), "role": user.role})
+        
+        asyncio.run(service.get_current_user(token))
+        invalidate_user_principals(user.id)
+        asyncio.run(service.get_current_user(token))
+        assert repo.lookups == 2
+    
+    def test_invalid_token_not_cached(self):
+        """测试无效令牌不会被缓存"""
+        service = AuthService(self.FakeAuthRepository(None))
+        with pytest.raises(UnauthorizedException):
+            asyncio.run(service.get_current_user("invalid-token"))
+        assert len(principal_cache) == 0
+
+    
+    def test_logout_revokes_token(self, user):
+        """测试登出后令牌失效"""
+        service = AuthService(self.FakeAuthRepository(user))
+        token = create_access_token({"sub": str(user.id), "role": user.role})
+        
+        asyncio.run(service.get_current_user(token))
+        asyncio.run(service.logout(token))
+        with pytest.raises(UnauthorizedException):
+            asyncio.run(service.get_current_user(token))
+
+
+class TestRefreshToken:
+    """刷新令牌测试类"""
+    
+    class FakeRefreshRepository:
+        """保存刷新令牌的内存仓库"""
+        def __init__(self, user):
+            self.user = user
+            self.tokens = {}
+        
+        async def get_user_by_email(self, email: str):
+            return self.user if self.user.email == email else None
+        
+        async def create_refresh_token(self, token_data):
+            token = SimpleNamespace(rotated_at=None, revoked_at=None, **token_data)
+            self.tokens[token.token_hash] = token
+            return token
+        
+        async def get_refresh_token_with_user(self, token_hash: str):
+            token = self.tokens.get(token_hash)
+            return (token, self.user) if token else None
+        
+        async def rotate_refresh_token(self, old_token, new_token_data):
+            old_token.rotated_at = datetime.now(timezone.utc)
+            return await self.create_refresh_token(new_token_data)
+        
+        async def revoke_refresh_family(self, family_id: str):
+            for token in self.tokens.values():
+                if token.family_id == family_id and token.revoked_at is None:
+                    token.revoked_at = datetime.now(timezone.utc)
+    
+    @pytest.fixture
+    def repo(self):
+        user = SimpleNamespace(
+            id=42, username="testuser", email="test@example.com", role="teacher", is_active=True,
+            password=pwd_context.hash("testpassword123")
+        )
+        return self.FakeRefreshRepository(user)
+    
+    def test_login_returns_refresh_token(self, repo):
+        """测试登录同时返回刷新令牌"""
+        service = AuthService(repo)
+        response = asyncio.run(service.login("testuser", "test@example.com", "testpassword123"))
+        assert response.refreshToken
+        assert len(repo.tokens) == 1
+    
+    def test_refresh_rotates_token(self, repo):
+        """测试刷新后旧令牌被轮换，新令牌可继续使用"""
+        service = AuthService(repo)
+        first = asyncio.run(service._issue_refresh_token(repo.user.id))
+        second = asyncio.run(service.refresh(first))
+        assert second.token and second.refreshToken != first
+        third = asyncio.run(service.refresh(second.refreshToken))
+        assert third.refreshToken not in (first, second.refreshToken)
+    
+    def test_reuse_revokes_family(self, repo):
+        """测试重复使用已轮换的令牌会吊销整个令牌族"""
+        service = AuthService(repo)
+        first = asyncio.run(service._issue_refresh_token(repo.user.id))
+        second = asyncio.run(service.refresh(first))
+        
+        with pytest.raises(UnauthorizedException):
+            asyncio.run(service.refresh(first))
+        with pytest.raises(UnauthorizedException):
+            asyncio.run(service.refresh(second.refreshToken))
+    
+    def test_reuse_revoke_survives_401(self, recording_db):
+        """测试重复使用已轮换的令牌：请求以 401 失败，吊销令牌族的 UPDATE 仍经工作单元提交"""
+        from sqlalchemy import text
+        from app.models.refresh_token import RefreshToken
+        from app.models.user import User
+        
+        now = datetime.now(timezone.utc)
+        recording_db.seed(User(id=42, username="testuser", email="test@example.com", password="x", role="teacher"))
+        recording_db.seed(*(
+            RefreshToken(user_id=42, token_hash=hash_refresh_token(token), family_id="family", rotated_at=rotated,
+                         expires_at=now + timedelta(days=1), session_expires_at=now + timedelta(days=7))
+            for token, rotated in (("first", now), ("second", None))
+        ))
+        
+        response = TestClient(app).post("/auth/refresh", json={"refreshToken": "first"})
+        assert response.status_code == 401
+        assert recording_db.round_trips == ["SELECT", "UPDATE", "COMMIT"]
+        with recording_db.engine.connect() as conn:
+            assert conn.execute(text("SELECT count(*) FROM refresh_tokens WHERE revoked_at IS NULL")).scalar() == 0
+        assert TestClient(app).post("/auth/refresh", json={"refreshToken": "second"}).status_code == 401
+    
+    def test_unknown_refresh_token(self, repo):
+        """测试未知的刷新令牌"""
+        with pytest.raises(UnauthorizedException):
+            asyncio.run(AuthService(repo).refresh("unknown"))
+
+
+class TestRegisterRepository:
+    """注册仓库测试类"""
+    
+    class FakeResult:
+        def __init__(self, rows):
+            self.rows = rows
+        
+        def scalar_one_or_none(self):
+            return self.rows[0] if self.rows else None
+        
+        def scalars(self):
+            return SimpleNamespace(all=lambda: self.rows)
+    
+    class FakeSession:
+        """按顺序返回预设结果并记录语句的会话"""
+        def __init__(self, *results):
+            self.results = list(results)
+            self.statements = []
+            self.commits = 0
+            self.rollbacks = 0
+        
+        async def execute(self, statement):
+            self.statements.append(statement)
+            return TestRegisterRepository.FakeResult(self.results.pop(0))
+        
+        async def commit(self):
+            self.commits += 1
+        
+        async def rollback(self):
+            self.rollbacks += 1
+    
+    @pytest.fixture
+    def user_data(self, sample_user_data):
+        return dict(sample_user_data, password="hashed")
+    
+    def test_create_user_single_statement(self, user_data):
+        """测试注册只执行一条 INSERT ... ON CONFLICT DO NOTHING RETURNING"""
+        created = SimpleNamespace(id=1, **user_data)
+        session = self.FakeSession([created])
+        user = asyncio.run(SQLAlchemyAuthRepository(session).create_user(user_data))
+        
+        assert user is created
+        assert len(session.statements) == 1
+        sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT DO NOTHING RETURNING" in sql
+        assert session.commits == 0  # 由请求的工作单元统一提交
+    
+    @pytest.mark.parametrize("taken, field", [
+        (["testuser"], "username"),
+        (["otheruser"], "email"),
+    ])
+    def test_create_user_conflict(self, user_data, taken, field):
+        """测试冲突时报告具体的唯一约束"""
+        session = self.FakeSession([], taken)
+        with pytest.raises(DuplicateUserException) as exc_info:
+            asyncio.run(SQLAlchemyAuthRepository(session).create_user(user_data))
+        
+        assert exc_info.value.field == field
+        assert session.commits == 0 and len(session.statements) == 2
+
+
+class TestAvailability:
+    """用户名/邮箱可用性检查测试类"""
+    
+    class FakeAvailabilityRepository:
+        """记录批量查询参数的内存仓库"""
+        def __init__(self, usernames, emails):
+            self.usernames = set(usernames)
+            self.emails = set(emails)
+            self.queries = []
+        
+        async def get_taken_identities(self, usernames, emails):
+            self.queries.append((list(usernames), list(emails)))
+            return self.usernames & set(usernames), self.emails & set(emails)
+        
+        async def create_user(self, user_data):
+            self.queries.append(("insert", user_data["username"]))
+            self.usernames.add(user_data["username"])
+            self.emails.add(user_data["email"])
+    
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        taken_identity_cache.clear()
+        yield
+        taken_identity_cache.clear()
+    
+    def test_batch_single_query(self):
+        """测试多个候选值只查询一次"""
+        repo = self.FakeAvailabilityRepository(["alice"], ["bob@example.com"])
+        result = asyncio.run(AuthService(repo).check_availability(
+            ["alice", "carol", "alice"], ["bob@example.com", "dave@example.com"]
+        ))
+        assert result.usernames == {"alice": False, "carol": True}
+        assert result.emails == {"bob@example.com": False, "dave@example.com": True}
+        assert len(repo.queries) == 1
+    
+    def test_stale_cache_confirmed_by_database(self):
+        """测试缓存中已占用的名字仍查询数据库，其他进程已释放时返回可用并清除缓存"""
+        repo = self.FakeAvailabilityRepository([], [])
+        mark_taken(username="alice")
+        result = asyncio.run(AuthService(repo).check_availability(["alice"], []))
+        assert result.usernames == {"alice": True}
+        assert repo.queries == [(["alice"], [])]
+        assert is_username_taken("alice") is False
+    
+    def test_release_after_delete(self):
+        """测试释放后重新以数据库为准"""
+        repo = self.FakeAvailabilityRepository(["alice"], [])
+        service = AuthService(repo)
+        asyncio.run(service.check_availability(["alice"], []))
+        repo.usernames.clear()
+        release(username="alice")
+        assert asyncio.run(service.check_username_available("alice")) is True
+    
+    def test_register_confirms_cached_hint(self, monkeypatch):
+        """测试注册时缓存提示已占用：数据库确认后拒绝且不计算哈希，缓存过时则正常注册"""
+        repo = self.FakeAvailabilityRepository(["alice"], [])
+        service = AuthService(repo)
+        hashed = []
+        async def fake_hash(password):
+            hashed.append(password)
+            return "hashed"
+        monkeypatch.setattr(service, "_get_password_hash", fake_hash)
+        
+        mark_taken(username="alice")
+        with pytest.raises(DuplicateUserException) as exc_info:
+            asyncio.run(service.register(RegisterRequest(username="alice", email="alice@example.com", password="pw")))
+        assert exc_info.value.field == "username"
+        assert hashed == []
+        
+        mark_taken(username="bob")
+        asyncio.run(service.register(RegisterRequest(username="bob", email="bob@example.com", password="pw")))
+        assert repo.queries[-2:] == [(["bob"], ["bob@example.com"]), ("insert", "bob")]
+        assert hashed == ["pw"]
+
+
+class TestLoginThrottling:
+    """登录限流测试类"""
+    
+    class FakeLoginService:
+        """只记录调用次数的登录服务"""
+        def __init__(self):
+            self.calls = 0
+        
+        async def login(self, username, email, password):
+            self.calls += 1
+            raise UnauthorizedException("用户名、邮箱或密码错误")
+    
+    def test_throttled_before_service(self, monkeypatch):
+        """测试超限请求在进入服务（数据库、bcrypt）之前被拒绝"""
+        monkeypatch.setattr(login_limiter, "backend", InMemoryBucketBackend())
+        service = self.FakeLoginService()
+        app.dependency_overrides[get_auth_service] = lambda: service
+        try:
+            with TestClient(app) as test_client:
+                login_data = {"username": "testuser", "email": "throttle@example.com", "password": "wrong"}
+                statuses = [test_client.post("/auth/login", json=login_data).status_code for _ in range(7)]
+                response = test_client.post("/auth/login", json=login_data)
+        finally:
+            app.dependency_overrides.clear()
+        
+        assert statuses[:5] == [401] * 5
+        assert response.status_code == 429
+        assert "retry-after" in response.headers
+        assert service.calls == 5
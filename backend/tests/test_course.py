@@ -1,5 +1,26 @@
+import asyncio
 import pytest
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
 from fastapi.testclient import TestClient
+from app.main import app
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import asyncpg
+from app.course.adapter.input import get_course_read_repo
+from app.course.adapter.cached_repository import CachedCourseRepository, course_cache
+from app.course.adapter.repository import SQLAlchemyCourseRepository
+from app.course.adapter.search import CourseSearchIndex, TrigramIndex, course_search_index, search_score, similarity, trigrams
+from app.core.exceptions import NotFoundException
+from app.core.helpers.local_redis import LocalRedis
+from app.core.helpers.read_cache import LocalCacheBackend, ReadThroughCache, RedisCacheBackend
+from app.core.uow import UnitOfWork
+from app.models import Base
+from app.models.course import Course
+from app.models.course_material import CourseMaterial
+from app.models.course_objective import CourseObjective
+from app.models.course_syllabus import CourseSyllabus
+from app.models.user import User
 
 class TestCourse:
     """课程功能测试类"""
@@ -34,7 +55,7 @@ class TestCourse:
         response = client.get("/courses/", headers=auth_headers)
         assert response.status_code == 200
         data = response.json()
-        assert isinstance(data, list)
+        assert isinstance(data["courses"], list)
     
     def test_get_course_by_id(self, client: TestClient, sample_course_data, auth_headers):
         """测试根据ID获取课程"""
@@ -83,4 +104,1123 @@ class TestCourse:
         
         # 验证课程已被删除
         get_response = client.get(f"/courses/{course_id}", headers=auth_headers)
-        assert get_response.status_code == 404 
+        assert get_response.status_code == 404
+
+
+class TestCourseRoundTrips:
+    """课程写接口的数据库往返次数测试类（工作单元：每个请求一次提交，不再 refresh）"""
+    
+    @pytest.fixture
+    def db(self, recording_db):
+        recording_db.seed(User(id=1, username="t", email="t@example.com", password="x", role="teacher"))
+        recording_db.seed(Course(id=1, title="已有课程", teacher_id=1, status="active"))
+        asyncio.run(course_cache.clear())
+        return recording_db
+    
+    def title(self, db, course_id):
+        with db.engine.connect() as conn:
+            return conn.execute(text("SELECT title FROM courses WHERE id = :id"), {"id": course_id}).scalar()
+    
+    def test_create_course(self, db):
+        """测试创建课程：一次 INSERT ... RETURNING 和一次提交"""
+        response = TestClient(app).post("/courses/", json={"title": "新课程", "teacher_id": 1})
+        assert response.status_code == 200
+        assert response.json()["id"] == 2
+        assert db.round_trips == ["INSERT", "COMMIT"]
+    
+    def test_update_course(self, db):
+        """
+        测试更新课程：SQLite 上先查询更新前的状态再 UPDATE ... RETURNING，一次提交；
+        PostgreSQL 上合并为一条语句，见 test_update_statement
+        """
+        response = TestClient(app).put("/courses/1", json={"title": "改名"})
+        assert response.status_code == 200
+        assert response.json()["title"] == "改名"
+        assert response.json()["version"] == 2
+        assert response.headers["etag"] == '"1-2"'
+        assert db.round_trips == ["SELECT", "UPDATE", "COMMIT"]
+        assert self.title(db, 1) == "改名"
+    
+    def test_update_with_if_match(self, db):
+        """测试 If-Match 版本一致时更新，过期版本返回 412 且回滚"""
+        client = TestClient(app)
+        response = client.put("/courses/1", json={"title": "改名"}, headers={"If-Match": '"1-1"'})
+        assert response.status_code == 200
+        db.round_trips.clear()
+        
+        response = client.put("/courses/1", json={"title": "再改"}, headers={"If-Match": '"1-1"'})
+        assert response.status_code == 412
+        assert self.title(db, 1) == "改名"
+        assert db.round_trips == ["SELECT", "UPDATE", "ROLLBACK"]
+    
+    @pytest.mark.parametrize("if_match, status", [
+        ("*", 200),
+        ('"1-5", "1-1"', 200),
+        ('W/"1-1"', 412),
+        ('"2-1"', 412),
+        ("garbage", 412),
+    ])
+    def test_if_match_variants(self, db, if_match, status):
+        """测试 If-Match 的各种取值：* 不校验版本，弱标签和其他课程的标签不匹配"""
+        response = TestClient(app).put("/courses/1", json={"title": "改名"}, headers={"If-Match": if_match})
+        assert response.status_code == status
+    
+    def test_update_invalid_status(self, db):
+        """测试更新时状态只能取 active/inactive/draft，其他值 422，不执行任何语句"""
+        response = TestClient(app).put("/courses/1", json={"status": "deleted"})
+        assert response.status_code == 422
+        assert db.round_trips == []
+    
+    def test_update_statement(self):
+        """测试更新语句：存在性与版本判定在同一条 WITH ... UPDATE ... RETURNING 中"""
+        captured = TestCoursePagination.CapturingSession()
+        captured.bind = SimpleNamespace(dialect=asyncpg.dialect())
+        
+        async def run():
+            try:
+                await SQLAlchemyCourseRepository(captured).update_course(1, {"title": "改名"}, [3])
+            except NotFoundException:
+                pass
+        
+        asyncio.run(run())
+        sql = str(captured.statements[0].compile(dialect=asyncpg.dialect()))
+        assert sql.startswith("WITH target AS")
+        assert "UPDATE courses SET" in sql and "version=(courses.version + " in sql
+        assert "courses.version IN" in sql and "RETURNING" in sql
+        assert "FROM target LEFT OUTER JOIN updated ON true" in sql
+    
+    def test_delete_course(self, db):
+        """测试删除课程：一条 DELETE ... RETURNING 和一次提交，课程不存在时 404 并回滚"""
+        client = TestClient(app)
+        response = client.delete("/courses/1")
+        assert response.status_code == 200
+        assert db.round_trips == ["DELETE", "COMMIT"]
+        
+        db.round_trips.clear()
+        assert client.delete("/courses/1").status_code == 404
+        assert db.round_trips == ["DELETE", "ROLLBACK"]
+    
+    @pytest.mark.parametrize("role, status", [("admin", 200), ("teacher", 403)])
+    def test_bulk_delete(self, db, role, status):
+        """测试管理员批量删除：任意数量的 id 都只执行一条 DELETE，非管理员 403"""
+        from app.core.dependencies import get_current_user
+        
+        db.seed(*(Course(id=course_id, title=f"课程{course_id}", teacher_id=1) for course_id in range(2, 301)))
+        app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(role=role)
+        ids = ",".join(str(i) for i in range(1, 301)) + ",1,999"
+        response = TestClient(app).delete("/courses", params={"ids": ids})
+        assert response.status_code == status
+        with db.engine.connect() as conn:
+            remaining = conn.execute(text("SELECT count(*) FROM courses")).scalar()
+        if status == 200:
+            assert response.json()["deleted"] == list(range(1, 301))
+            assert response.json()["missing"] == [999]
+            assert db.round_trips == ["DELETE", "COMMIT"]
+            assert remaining == 0
+        else:
+            assert db.round_trips == [] and remaining == 300
+    
+    @pytest.mark.parametrize("ids", ["", "1,a", ",".join(str(i) for i in range(1, 1002))])
+    def test_bulk_delete_invalid_ids(self, db, ids):
+        """测试批量删除参数校验：空、非整数、超过上限"""
+        from app.core.dependencies import get_current_user
+        
+        app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(role="admin")
+        assert TestClient(app).delete("/courses", params={"ids": ids}).status_code == 400
+        assert db.round_trips == []
+    
+    def test_delete_cascades_to_content(self):
+        """测试删除课程时数据库级联删除教学目标、大纲和讲义（SQLite 开启外键约束）"""
+        from sqlalchemy import event, func, select
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        
+        async def run():
+            engine = create_async_engine("sqlite+aiosqlite://")
+            event.listen(engine.sync_engine, "connect", lambda conn, record: conn.execute("PRAGMA foreign_keys=ON"))
+            async with engine.begin() as conn:
+                for model in (User, Course, CourseObjective, CourseSyllabus, CourseMaterial):
+                    await conn.run_sync(model.__table__.create)
+            async with async_sessionmaker(engine)() as session:
+                session.add(User(id=1, username="t", email="t@example.com", password="x"))
+                await session.flush()
+                session.add_all([Course(id=1, title="a", teacher_id=1), Course(id=2, title="b", teacher_id=1)])
+                await session.flush()
+                for course_id in (1, 2):
+                    session.add_all([CourseObjective(course_id=course_id), CourseSyllabus(course_id=course_id, content="大纲"),
+                                     CourseMaterial(course_id=course_id, content="讲义")])
+                await session.commit()
+                
+                repo = SQLAlchemyCourseRepository(session)
+                assert (await repo.delete_course(1)).title == "a"
+                assert await repo.delete_courses([2, 3]) == [(2, 1)]
+                await session.commit()
+                counts = [await session.scalar(select(func.count()).select_from(model))
+                          for model in (CourseObjective, CourseSyllabus, CourseMaterial)]
+            await engine.dispose()
+            return counts
+        
+        assert asyncio.run(run()) == [0, 0, 0]
+    
+    def test_failed_request_rolled_back(self, db):
+        """测试请求失败时回滚且不提交"""
+        response = TestClient(app).put("/courses/2", json={"title": "改名"}, headers={"If-Match": '"2-1"'})
+        assert response.status_code == 404
+        assert db.round_trips == ["SELECT", "ROLLBACK"]
+
+class TestCourseConditionalGet:
+    """课程详情条件请求测试类"""
+    
+    class FakeCourseRepository:
+        def __init__(self, course):
+            self.course = course
+            self.calls = []
+        
+        async def get_course_version(self, course_id):
+            self.calls.append("version")
+            return self.course.version if self.course and self.course.id == course_id else None
+        
+        async def get_course_by_id(self, course_id):
+            self.calls.append("full")
+            return self.course if self.course and self.course.id == course_id else None
+    
+    @pytest.fixture
+    def repo(self):
+        course = Course(id=1, title="课程", teacher_id=1, status="active",
+                        created_at=datetime.now(timezone.utc), version=3)
+        repo = self.FakeCourseRepository(course)
+        app.dependency_overrides[get_course_read_repo] = lambda: repo
+        yield repo
+        app.dependency_overrides.clear()
+    
+    def test_etag_and_304(self, repo):
+        """测试返回 ETag；If-None-Match 命中时只查版本号并返回空响应体的 304"""
+        client = TestClient(app)
+        response = client.get("/courses/1")
+        assert response.status_code == 200
+        assert response.headers["etag"] == '"1-3"'
+        assert response.headers["cache-control"] == "private, no-cache"
+        
+        repo.calls.clear()
+        response = client.get("/courses/1", headers={"If-None-Match": 'W/"1-3"'})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == '"1-3"'
+        assert repo.calls == ["version"]
+    
+    def test_modified_returns_full(self, repo):
+        """测试版本已变化时返回完整内容和新 ETag"""
+        response = TestClient(app).get("/courses/1", headers={"If-None-Match": '"1-2"'})
+        assert response.status_code == 200
+        assert response.headers["etag"] == '"1-3"'
+        assert repo.calls == ["version", "full"]
+    
+    def test_missing_course(self, repo):
+        """测试课程不存在时 If-None-Match 不命中，返回 404"""
+        response = TestClient(app).get("/courses/9", headers={"If-None-Match": "*"})
+        assert response.status_code == 404
+
+class TestCoursePagination:
+    """课程列表游标分页与筛选测试类"""
+    
+    class FakeCourseRepository:
+        """按 (created_at, id) 做键集分页和筛选的仓储替身"""
+        def __init__(self, courses):
+            self.courses = courses
+            self.calls = []
+        
+        def _matches(self, course, filters):
+            return (
+                filters.get("teacher_id") in (None, course.teacher_id)
+                and filters.get("status") in (None, course.status)
+                and ("created_from" not in filters or course.created_at >= filters["created_from"])
+                and ("created_to" not in filters or course.created_at < filters["created_to"])
+            )
+        
+        async def list_courses(self, limit, after=None, filters=None, descending=True):
+            self.calls.append((limit, after, filters, descending))
+            rows = sorted(self.courses, key=lambda c: (c.created_at, c.id), reverse=descending)
+            rows = [c for c in rows if self._matches(c, filters or {})]
+            if after is not None:
+                rows = [c for c in rows if ((c.created_at, c.id) < after if descending else (c.created_at, c.id) > after)]
+            return rows[:limit]
+        
+        async def estimate_course_count(self, filters=None):
+            return len([c for c in self.courses if self._matches(c, filters or {})])
+    
+    class EmptyResult(list):
+        """空查询结果，同时支持迭代行、scalars().all() 和 one_or_none()"""
+        def scalars(self):
+            return self
+        
+        def all(self):
+            return list(self)
+        
+        def one_or_none(self):
+            return None
+    
+    class CapturingSession:
+        """记录仓储生成的查询语句"""
+        def __init__(self):
+            self.statements = []
+            self.info = {}
+        
+        async def execute(self, statement):
+            self.statements.append(statement)
+            return TestCoursePagination.EmptyResult()
+    
+    @pytest.fixture
+    def repo(self):
+        # 前 3 门课程创建时间相同，检验 id 作为次序的决胜字段；奇数 id 属于教师 1，课程 6 为草稿
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        courses = [
+            Course(id=i, title=f"课程{i}", teacher_id=1 if i % 2 else 2, status="draft" if i == 6 else "active",
+                   created_at=base + timedelta(minutes=max(i, 3)))
+            for i in range(1, 8)
+        ]
+        repo = self.FakeCourseRepository(courses)
+        app.dependency_overrides[get_course_read_repo] = lambda: repo
+        yield repo
+        app.dependency_overrides.clear()
+    
+    def _collect_ids(self, path, **params):
+        client = TestClient(app)
+        ids, cursor = [], None
+        while True:
+            response = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})})
+            assert response.status_code == 200
+            data = response.json()
+            ids += [course["id"] for course in data["courses"]]
+            cursor = data["next_cursor"]
+            if not cursor:
+                return ids
+    
+    def test_pages_follow_cursor(self, repo):
+        """测试沿 next_cursor 翻页不重不漏，最后一页没有游标"""
+        assert self._collect_ids("/courses/", limit=3) == [7, 6, 5, 4, 3, 2, 1]
+        assert all(call[0] == 4 for call in repo.calls)
+    
+    def test_ascending_order(self, repo):
+        """测试升序翻页"""
+        assert self._collect_ids("/courses/", limit=3, order="asc") == [1, 2, 3, 4, 5, 6, 7]
+    
+    def test_teacher_filter_and_total(self, repo):
+        """测试按教师过滤并按需返回总数"""
+        data = TestClient(app).get("/courses/teacher/1", params={"include_total": True}).json()
+        assert [course["id"] for course in data["courses"]] == [7, 5, 3, 1]
+        assert data["total"] == 4
+        assert data["next_cursor"] is None
+    
+    def test_status_and_date_filters(self, repo):
+        """测试按状态、教师和创建时间范围筛选"""
+        assert self._collect_ids("/courses/", status="draft") == [6]
+        assert self._collect_ids("/courses/teacher/2", status="active", limit=1) == [4, 2]
+        assert self._collect_ids(
+            "/courses/", teacher_id=1, created_from="2024-01-01T00:04:00+00:00", created_to="2024-01-01T00:07:00+00:00"
+        ) == [5]
+    
+    def test_invalid_filters(self, repo):
+        """测试非法状态、排序和时间范围被拒绝"""
+        client = TestClient(app)
+        assert client.get("/courses/", params={"status": "deleted"}).status_code == 422
+        assert client.get("/courses/", params={"order": "random"}).status_code == 422
+        response = client.get("/courses/", params={
+            "created_from": "2024-02-01T00:00:00+00:00", "created_to": "2024-01-01T00:00:00+00:00"
+        })
+        assert response.status_code == 400
+    
+    def test_total_omitted_by_default(self, repo):
+        """测试默认不计算总数"""
+        assert TestClient(app).get("/courses/").json()["total"] is None
+    
+    def test_invalid_cursor(self, repo):
+        """测试非法游标返回 400"""
+        response = TestClient(app).get("/courses/", params={"cursor": "not-a-cursor"})
+        assert response.status_code == 400
+    
+    def test_limit_bounds(self, repo):
+        """测试超出上限的 limit 被拒绝"""
+        response = TestClient(app).get("/courses/", params={"limit": 10000})
+        assert response.status_code == 422
+    
+    def test_keyset_query(self):
+        """测试生成的 SQL 使用行比较和与索引一致的排序"""
+        session = self.CapturingSession()
+        repo = SQLAlchemyCourseRepository(session)
+        after = (datetime(2024, 1, 1, tzinfo=timezone.utc), 5)
+        asyncio.run(repo.list_courses(10, after=after, filters={"teacher_id": 1, "status": "active"}))
+        asyncio.run(repo.list_courses(10, after=after, descending=False))
+        desc_sql, asc_sql = (str(stmt.compile(dialect=postgresql.dialect())) for stmt in session.statements)
+        assert "(courses.created_at, courses.id) < (" in desc_sql
+        assert "ORDER BY courses.created_at DESC, courses.id DESC" in desc_sql
+        assert "(courses.created_at, courses.id) > (" in asc_sql
+        assert "ORDER BY courses.created_at ASC, courses.id ASC" in asc_sql
+        assert "OFFSET" not in desc_sql + asc_sql
+
+class TestCourseListIndexes:
+    """课程列表查询计划测试类（需要 PostgreSQL，连接不上时跳过）"""
+    
+    FILTER_CASES = [
+        {},
+        {"teacher_id": 1},
+        {"status": "active"},
+        {"teacher_id": 1, "status": "draft"},
+        {"created_from": datetime(2024, 1, 1, tzinfo=timezone.utc)},
+        {"teacher_id": 1, "created_from": datetime(2024, 1, 1, tzinfo=timezone.utc),
+         "created_to": datetime(2024, 2, 1, tzinfo=timezone.utc)},
+        {"status": "inactive", "created_to": datetime(2024, 2, 1, tzinfo=timezone.utc)},
+    ]
+    
+    @pytest.fixture
+    def pg(self, test_engine):
+        try:
+            connection = test_engine.connect()
+        except Exception as e:
+            pytest.skip(f"无法连接测试数据库: {e}")
+        transaction = connection.begin()
+        # 在事务内建表，结束时回滚；禁用顺序扫描后，若规划器仍选择 Seq Scan 说明没有可用索引
+        Base.metadata.create_all(connection)
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        yield connection
+        transaction.rollback()
+        connection.close()
+    
+    @pytest.mark.parametrize("filters", FILTER_CASES)
+    @pytest.mark.parametrize("descending", [True, False])
+    def test_listing_uses_index(self, pg, filters, descending):
+        """测试各筛选组合的首页与翻页查询都不做顺序扫描"""
+        session = TestCoursePagination.CapturingSession()
+        repo = SQLAlchemyCourseRepository(session)
+        after = (datetime(2024, 1, 15, tzinfo=timezone.utc), 100)
+        asyncio.run(repo.list_courses(21, filters=filters, descending=descending))
+        asyncio.run(repo.list_courses(21, after=after, filters=filters, descending=descending))
+        for statement in session.statements:
+            sql = statement.compile(dialect=asyncpg.dialect(), compile_kwargs={"literal_binds": True})
+            plan = "\n".join(row[0] for row in pg.exec_driver_sql(f"EXPLAIN {sql}"))
+            assert "Seq Scan" not in plan, plan
+    
+    def test_search_uses_trigram_index(self, pg):
+        """测试关键词搜索走三元组 GIN 索引"""
+        session = TestCoursePagination.CapturingSession()
+        session.bind = pg.engine
+        asyncio.run(SQLAlchemyCourseRepository(session).search_courses("数据结构", 21))
+        sql = session.statements[0].compile(dialect=asyncpg.dialect(), compile_kwargs={"literal_binds": True})
+        plan = "\n".join(row[0] for row in pg.exec_driver_sql(f"EXPLAIN {sql}"))
+        assert "Seq Scan" not in plan, plan
+        assert "ix_courses_title_trgm" in plan
+
+class TestCourseSearch:
+    """课程关键词搜索测试类"""
+    
+    TITLES = [
+        ("数据结构与算法", "线性表、树和图"),
+        ("数据库系统原理", "关系模型与 SQL"),
+        ("Data Structures", "lists, trees and graphs"),
+        ("Database Systems", None),
+        ("操作系统", "进程与内存管理，涉及数据结构"),
+        ("Python 程序设计", "面向初学者的编程课程"),
+        ("算法设计与分析", "分治、动态规划"),
+        ("计算机网络", "100% 覆盖 TCP_IP"),
+    ]
+    QUERIES = ["数据", "数据结构", "data", "Databse", "算法", "sql", "tcp_ip", "100%", "系统", "xyz", "编"]
+    
+    def make_courses(self):
+        base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        return [
+            Course(id=i + 1, title=title, description=description, teacher_id=1, status="active",
+                   created_at=base + timedelta(minutes=i))
+            for i, (title, description) in enumerate(self.TITLES)
+        ]
+    
+    def test_create_all_creates_extension(self):
+        """测试 create_all 在建 GIN 三元组索引之前先创建 pg_trgm 扩展，其他数据库不执行"""
+        from sqlalchemy import create_mock_engine
+        
+        def ddl(url):
+            statements = []
+            engine = create_mock_engine(
+                url, lambda sql, *args, **kwargs: statements.append(str(sql.compile(dialect=engine.dialect)).strip())
+            )
+            Course.__table__.create(engine)
+            return statements
+        
+        statements = ddl("postgresql://")
+        extension = statements.index("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        trgm_index = next(i for i, sql in enumerate(statements) if "gin_trgm_ops" in sql)
+        assert extension < trgm_index
+        assert not any("pg_trgm" in sql for sql in ddl("sqlite://"))
+    
+    @pytest.fixture
+    def fresh_index(self):
+        course_search_index.reset()
+        yield course_search_index
+        course_search_index.reset()
+    
+    def test_trigrams_match_pg_trgm(self):
+        """测试三元组与相似度和 pg_trgm 文档示例一致"""
+        assert trigrams("cat") == {"  c", " ca", "cat", "at "}
+        assert similarity("word", "two words") == pytest.approx(0.36363637, abs=1e-8)
+        assert similarity("Word", "WORD") == 1.0
+        assert similarity("", "word") == 0.0
+    
+    def test_index_matches_full_scan(self):
+        """测试倒排索引的候选筛选不漏结果：与逐条打分的结果完全相同"""
+        courses = self.make_courses()
+        index = TrigramIndex(courses)
+        for query in self.QUERIES:
+            expected = sorted(
+                ((search_score(c, query), c) for c in courses if search_score(c, query) is not None),
+                key=lambda item: (item[0], item[1].id), reverse=True
+            )
+            assert [c.id for _, c in index.search(query, 100)] == [c.id for _, c in expected], query
+    
+    def test_ranking(self):
+        """测试标题命中排在简介命中之前，拼写错误可按相似度匹配"""
+        index = TrigramIndex(self.make_courses())
+        assert [c.id for _, c in index.search("数据结构", 10)] == [1, 5]
+        assert [c.id for _, c in index.search("Databse", 10)][0] == 4
+        assert [c.id for _, c in index.search("_", 10)] == [8]
+    
+    def test_index_updates(self):
+        """测试索引增删"""
+        courses = self.make_courses()
+        index = TrigramIndex(courses)
+        index.remove(1)
+        assert [c.id for _, c in index.search("数据结构", 10)] == [5]
+        courses[0].title = "高级数据结构"
+        index.add(courses[0])
+        assert [c.id for _, c in index.search("数据结构", 10)] == [1, 5]
+    
+    def test_ranking_matches_sql(self, test_engine):
+        """测试进程内索引与 PostgreSQL 上的 SQL 打分一致：逐个关键词比较 (分数, id) 序列（需要 PostgreSQL）"""
+        from sqlalchemy import insert
+        
+        try:
+            connection = test_engine.connect()
+        except Exception as e:
+            pytest.skip(f"无法连接测试数据库: {e}")
+        transaction = connection.begin()
+        try:
+            Base.metadata.create_all(connection)
+            connection.execute(insert(User).values(id=1, username="t", email="t@example.com", password="x"))
+            courses = self.make_courses()
+            connection.execute(insert(Course), [
+                {"id": c.id, "title": c.title, "description": c.description, "teacher_id": 1, "status": "active"}
+                for c in courses
+            ])
+            index = TrigramIndex(courses)
+            for query in self.QUERIES:
+                session = TestCoursePagination.CapturingSession()
+                session.bind = connection.engine
+                asyncio.run(SQLAlchemyCourseRepository(session).search_courses(query, 100))
+                rows = connection.execute(session.statements[0]).all()
+                assert [(row.score, row.id) for row in rows] == \
+                    [(score, c.id) for score, c in index.search(query, 100)], query
+        finally:
+            transaction.rollback()
+            connection.close()
+    
+    def test_fallback_index_built_once(self, recording_db, fresh_index):
+        """
+        测试非 PostgreSQL 数据库上的搜索：首次搜索整表读取一次建立索引，之后不再读库；
+        课程新增、修改、删除提交后即可搜到，失败回滚的写入不进入索引
+        """
+        recording_db.seed(User(id=1, username="t", email="t@example.com", password="x", role="teacher"))
+        recording_db.seed(*self.make_courses())
+        client = TestClient(app)
+        
+        def search(query):
+            response = client.get("/courses/search", params={"q": query})
+            assert response.status_code == 200
+            return [course["id"] for course in response.json()["courses"]]
+        
+        assert search("数据结构") == [1, 5]
+        assert recording_db.round_trips.count("SELECT") == 1
+        recording_db.round_trips.clear()
+        assert search("算法") == [7, 1]
+        assert "SELECT" not in recording_db.round_trips
+        
+        assert client.post("/courses/", json={"title": "高级数据结构", "teacher_id": 1}).status_code == 200
+        assert client.put("/courses/5", json={"title": "操作系统", "description": "进程管理"}).status_code == 200
+        assert client.put("/courses/7", json={"title": "数据结构习题"}, headers={"If-Match": '"7-9"'}).status_code == 412
+        assert client.delete("/courses/1").status_code == 200
+        recording_db.round_trips.clear()
+        assert search("数据结构") == [9]
+        assert search("算法") == [7]
+        assert "SELECT" not in recording_db.round_trips
+    
+    def test_fallback_index_concurrent_build(self):
+        """测试并发的首次搜索只加载一次；建立期间提交的写入补到新索引上，重置使进行中的结果作废"""
+        courses = self.make_courses()
+        
+        async def run():
+            index = CourseSearchIndex()
+            loads = []
+            release = asyncio.Event()
+            
+            async def load():
+                loads.append(1)
+                await release.wait()
+                return [course for course in courses if course.id != 2]
+            
+            searches = [asyncio.ensure_future(index.search(load, "数据库", 10)) for _ in range(3)]
+            await asyncio.sleep(0)
+            index.upsert([courses[1]])
+            release.set()
+            results = await asyncio.gather(*searches)
+            
+            reloads = []
+            
+            async def reload():
+                reloads.append(1)
+                return courses
+            
+            index.reset()
+            await index.search(reload, "数据库", 10)
+            await index.search(reload, "数据库", 10)
+            return len(loads), [[c.id for _, c in result] for result in results], len(reloads)
+        
+        loads, results, reloads = asyncio.run(run())
+        assert loads == 1
+        assert results == [[2]] * 3
+        assert reloads == 1
+    
+    def test_fallback_index_refreshed_periodically(self):
+        """测试到达重建间隔后整表重建，看到其他进程的写入；重建期间继续使用旧索引"""
+        now = [0.0]
+        index = CourseSearchIndex(refresh_interval=60, clock=lambda: now[0])
+        courses = self.make_courses()
+        
+        async def load_first():
+            return courses[:1]
+        
+        async def load_all():
+            return courses
+        
+        assert [c.id for _, c in asyncio.run(index.search(load_first, "数据", 10))] == [1]
+        assert [c.id for _, c in asyncio.run(index.search(load_all, "数据", 10))] == [1]
+        now[0] = 61
+        assert [c.id for _, c in asyncio.run(index.search(load_all, "数据", 10))] == [2, 1, 5]
+    
+    def test_search_route(self):
+        """测试 /courses/search 不被 /courses/{course_id} 截获，空关键词与非法游标被拒绝"""
+        courses = self.make_courses()
+        results = [(1.5, courses[6]), (1.2, courses[0])]
+        repo = SimpleNamespace(search_courses=lambda query, limit, after=None: _resolved(results[:limit]))
+        app.dependency_overrides[get_course_read_repo] = lambda: repo
+        try:
+            client = TestClient(app)
+            response = client.get("/courses/search", params={"q": "算法"})
+            assert response.status_code == 200
+            assert [course["id"] for course in response.json()["courses"]] == [7, 1]
+            assert client.get("/courses/search", params={"q": ""}).status_code == 422
+            assert client.get("/courses/search", params={"q": "   "}).status_code == 400
+            assert client.get("/courses/search", params={"q": "算法", "cursor": "bad"}).status_code == 400
+        finally:
+            app.dependency_overrides.clear()
+    
+    def test_search_query(self):
+        """测试 PostgreSQL 上的搜索 SQL：三元组运算符、转义后的 ILIKE、按分数排序"""
+        session = TestCoursePagination.CapturingSession()
+        session.bind = SimpleNamespace(dialect=asyncpg.dialect())
+        asyncio.run(SQLAlchemyCourseRepository(session).search_courses("100%_", 10, after=(1.5, 3)))
+        statement = session.statements[0].compile(dialect=asyncpg.dialect())
+        sql = str(statement)
+        assert "courses.title % $" in sql
+        assert "ILIKE $" in sql and "ESCAPE" in sql
+        assert "ORDER BY score DESC, courses.id DESC" in sql
+        assert "OFFSET" not in sql
+        # 通配符按字面匹配
+        assert "%100\\%\\_%" in statement.params.values()
+
+class TestCourseWorkspace:
+    """课程工作台测试类（一次查询取回课程与教学内容，fields 控制是否加载正文）"""
+    
+    def load(self, fields):
+        from sqlalchemy import event
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        from app.course.application.service import CourseService
+        
+        async def run():
+            engine = create_async_engine("sqlite+aiosqlite://")
+            async with engine.begin() as conn:
+                for model in (Course, CourseObjective, CourseSyllabus, CourseMaterial):
+                    await conn.run_sync(model.__table__.create)
+            created = datetime(2024, 3, 1, 8, 0, tzinfo=timezone.utc)
+            async with async_sessionmaker(engine)() as session:
+                session.add_all([
+                    Course(id=1, title="数据结构", teacher_id=1, status="active", created_at=created),
+                    CourseObjective(id=3, course_id=1, course_content="线性表", teaching_target="掌握", created_at=created),
+                    CourseMaterial(id=5, course_id=1, content="讲义" * 1000, created_at=created),
+                ])
+                await session.commit()
+            statements = []
+            event.listen(engine.sync_engine, "before_cursor_execute",
+                         lambda conn, cursor, sql, *args: statements.append(sql))
+            async with async_sessionmaker(engine)() as session:
+                workspace = await CourseService(SQLAlchemyCourseRepository(session)).get_course_workspace(1, fields)
+            await engine.dispose()
+            return workspace, statements
+        
+        return asyncio.run(run())
+    
+    def test_single_query_without_content(self):
+        """测试默认只取教学内容的 id 和时间戳，正文列不出现在查询中"""
+        workspace, statements = self.load(None)
+        assert len(statements) == 1
+        assert "LEFT OUTER JOIN course_materials" in statements[0]
+        assert "course_materials_1.content" not in statements[0]
+        assert workspace.title == "数据结构"
+        assert (workspace.material.id, workspace.material.content) == (5, None)
+        assert workspace.objective.course_content is None
+        assert workspace.syllabus is None
+    
+    def test_fields_select_content(self):
+        """测试 fields 中列出的部分才加载正文"""
+        workspace, statements = self.load("material, objective")
+        assert len(statements) == 1
+        assert workspace.material.content == "讲义" * 1000
+        assert workspace.objective.teaching_target == "掌握"
+    
+    def test_workspace_route(self):
+        """测试工作台接口：课程不存在 404，不支持的字段 400"""
+        from app.course.adapter.input import get_course_read_repo
+        
+        async def get_course_workspace(course_id, with_content=()):
+            return None
+        
+        app.dependency_overrides[get_course_read_repo] = lambda: SimpleNamespace(get_course_workspace=get_course_workspace)
+        try:
+            client = TestClient(app)
+            assert client.get("/courses/1/workspace").status_code == 404
+            assert client.get("/courses/1/workspace", params={"fields": "material,grades"}).status_code == 400
+        finally:
+            app.dependency_overrides.clear()
+
+class TestCourseCache:
+    """课程读缓存测试类（读穿透、提交后失效、防击穿、命中率）"""
+    
+    class CountingRepository:
+        """记录读库次数的仓库替身，gate 不为空时读取会等待它被设置"""
+        def __init__(self, courses):
+            self.courses = {course.id: course for course in courses}
+            self.reads = 0
+            self.version_reads = 0
+            self.gate = None
+        
+        async def _read(self):
+            self.reads += 1
+            if self.gate is not None:
+                await self.gate.wait()
+        
+        async def get_course_by_id(self, course_id):
+            await self._read()
+            return self.courses.get(course_id)
+        
+        async def get_course_version(self, course_id):
+            self.version_reads += 1
+            course = self.courses.get(course_id)
+            return course.version if course else None
+        
+        async def list_courses(self, limit, after=None, filters=None, descending=True):
+            await self._read()
+            teacher_id = (filters or {}).get("teacher_id")
+            return [c for c in self.courses.values() if teacher_id is None or c.teacher_id == teacher_id][:limit]
+        
+        async def create_course(self, course_data):
+            course = Course(id=max(self.courses) + 1, version=1, **course_data)
+            self.courses[course.id] = course
+            return course
+        
+        async def update_course(self, course_id, course_data, expected_versions=None):
+            course = self.courses[course_id]
+            for key, value in course_data.items():
+                setattr(course, key, value)
+            course.version += 1
+            return course
+        
+        async def delete_course(self, course_id):
+            return self.courses.pop(course_id, None)
+    
+    def make_repo(self, backend=None):
+        now = datetime(2024, 3, 1, 8, 0, tzinfo=timezone.utc)
+        inner = self.CountingRepository([
+            Course(id=1, title="数据结构", teacher_id=1, status="active", created_at=now, version=1),
+            Course(id=2, title="算法", teacher_id=1, status="active", created_at=now, version=1),
+            Course(id=3, title="操作系统", teacher_id=2, status="active", created_at=now, version=1),
+        ])
+        cache = ReadThroughCache(f"test_course_{id(inner)}", backend or LocalCacheBackend("test_course"), ttl=60)
+        return inner, CachedCourseRepository(inner, cache)
+    
+    @pytest.mark.parametrize("backend", [None, RedisCacheBackend(LocalRedis())])
+    def test_read_through_and_update(self, backend):
+        """测试详情读穿透：第二次读取不访问数据库、返回独立对象，更新后重新加载"""
+        inner, repo = self.make_repo(backend)
+        
+        async def run():
+            first = await repo.get_course_by_id(1)
+            second = await repo.get_course_by_id(1)
+            assert inner.reads == 1
+            assert first is not second and second.title == "数据结构"
+            assert second.created_at == datetime(2024, 3, 1, 8, 0, tzinfo=timezone.utc)
+            
+            await repo.update_course(1, {"title": "高级数据结构"})
+            course = await repo.get_course_by_id(1)
+            assert (course.title, course.version, inner.reads) == ("高级数据结构", 2, 2)
+            
+            # 不存在的课程不缓存
+            assert await repo.get_course_by_id(99) is None
+            assert await repo.get_course_by_id(99) is None
+            assert inner.reads == 4
+        
+        asyncio.run(run())
+        stats = repo.cache.stats()
+        assert (stats["hits"], stats["misses"]) == (1, 4)
+        assert stats["hit_ratio"] == pytest.approx(1 / 5)
+    
+    def test_version_cached_separately(self):
+        """测试版本号单独缓存：未命中时只查版本号不加载整行，更新后失效"""
+        inner, repo = self.make_repo()
+        
+        async def run():
+            assert await repo.get_course_version(1) == 1
+            assert await repo.get_course_version(1) == 1
+            assert (inner.reads, inner.version_reads) == (0, 1)
+            
+            await repo.update_course(1, {"title": "高级数据结构"})
+            assert await repo.get_course_version(1) == 2
+            assert (inner.reads, inner.version_reads) == (0, 2)
+            assert await repo.get_course_version(99) is None
+        
+        asyncio.run(run())
+    
+    @pytest.mark.parametrize("env, enabled", [
+        ({}, False),
+        ({"COURSE_CACHE_ENABLED": ""}, False),
+        ({"COURSE_CACHE_BACKEND": "redis"}, True),
+        ({"COURSE_CACHE_BACKEND": "memory", "COURSE_CACHE_ENABLED": "True"}, True),
+        ({"COURSE_CACHE_BACKEND": "redis", "COURSE_CACHE_ENABLED": "False"}, False),
+    ])
+    def test_enabled_by_default_only_for_redis(self, env, enabled):
+        """测试未显式开启时，课程缓存只在 redis 后端下开启（进程内缓存无法跨 worker 失效）"""
+        import os
+        import subprocess
+        import sys
+        
+        environ = {key: value for key, value in os.environ.items() if not key.startswith("COURSE_CACHE_")}
+        output = subprocess.run(
+            [sys.executable, "-c", "from app.core.config import settings; print(settings.COURSE_CACHE_ENABLED)"],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))), env={**environ, **env},
+            capture_output=True, text=True, check=True,
+        ).stdout
+        assert output.strip() == str(enabled)
+    
+    def test_teacher_lists_invalidated_precisely(self):
+        """测试教师课程列表：创建、删除只失效所属教师的列表，全局列表不缓存"""
+        inner, repo = self.make_repo()
+        
+        async def run():
+            for teacher_id in (1, 2):
+                await repo.list_courses(10, filters={"teacher_id": teacher_id})
+                await repo.list_courses(10, filters={"teacher_id": teacher_id})
+            assert inner.reads == 2
+            
+            await repo.create_course({"title": "编译原理", "teacher_id": 1, "status": "active"})
+            assert len(await repo.list_courses(10, filters={"teacher_id": 1})) == 3
+            await repo.list_courses(10, filters={"teacher_id": 2})
+            assert inner.reads == 3
+            
+            await repo.delete_course(3)
+            assert await repo.list_courses(10, filters={"teacher_id": 2}) == []
+            assert inner.reads == 4
+            
+            await repo.list_courses(10)
+            await repo.list_courses(10)
+            assert inner.reads == 6
+        
+        asyncio.run(run())
+    
+    def test_concurrent_misses_coalesced(self):
+        """测试防击穿：并发未命中同一键时只读一次数据库"""
+        inner, repo = self.make_repo()
+        
+        async def run():
+            inner.gate = asyncio.Event()
+            tasks = [asyncio.create_task(repo.get_course_by_id(1)) for _ in range(20)]
+            await asyncio.sleep(0)
+            inner.gate.set()
+            courses = await asyncio.gather(*tasks)
+            assert {course.title for course in courses} == {"数据结构"}
+        
+        asyncio.run(run())
+        assert inner.reads == 1
+        assert repo.cache.stats()["coalesced"] == 19
+    
+    def test_stale_load_not_stored(self):
+        """测试加载期间发生失效时不回填加载到的旧值"""
+        inner, repo = self.make_repo()
+        
+        async def run():
+            inner.gate = asyncio.Event()
+            pending = asyncio.create_task(repo.get_course_by_id(1))
+            await asyncio.sleep(0)
+            await repo.update_course(1, {"title": "高级数据结构"})
+            inner.gate.set()
+            await pending
+            inner.gate = None
+            assert (await repo.get_course_by_id(1)).title == "高级数据结构"
+        
+        asyncio.run(run())
+        assert inner.reads == 2
+    
+    @pytest.mark.parametrize("committed", [True, False])
+    def test_invalidated_on_commit_only(self, committed):
+        """测试工作单元中写操作的失效推迟到提交后，回滚时不失效"""
+        inner, repo = self.make_repo()
+        
+        async def run():
+            await repo.get_course_by_id(1)
+            uow = UnitOfWork(SimpleNamespace(commit=_resolved, rollback=_resolved)).bind()
+            await repo.update_course(1, {"title": "高级数据结构"})
+            await repo.get_course_by_id(1)
+            assert inner.reads == 1
+            await (uow.commit() if committed else uow.rollback())
+            await repo.get_course_by_id(1)
+        
+        asyncio.run(run())
+        assert inner.reads == (2 if committed else 1)
+
+async def _resolved(value=None):
+    return value
+
+class TestCourseImportExport:
+    """课程批量导入导出测试类（流式解析、分批写入、逐行报错、服务端游标导出）"""
+    
+    CSV = (
+        "﻿id,title,description,teacher_id,status\r\n"
+        ",新课程,,1,draft\r\n"
+        '1,改名的课程,"第一行\r\n第二行，含""引号""",2,active\r\n'
+        "99,不存在的课程,,1,active\r\n"
+        ",外键不存在,,7,active\r\n"
+        ",状态错误,,1,archived\r\n"
+        ",  ,,1,active\r\n"
+        ",教师非整数,,abc,active\r\n"
+        ",列数不对,1\r\n"
+    ).encode()
+    
+    @staticmethod
+    async def chunks(data: bytes, size: int):
+        for start in range(0, len(data), size):
+            yield data[start:start + size]
+    
+    def collect(self, reader, data: bytes, size: int):
+        async def run():
+            return [record async for record in reader(self.chunks(data, size))]
+        return asyncio.run(run())
+    
+    def run_with_db(self, scenario):
+        """在开启外键约束的 SQLite 中建好用户 1、2 和课程 1 后执行 scenario(session, statements)"""
+        from sqlalchemy import event
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        
+        async def run():
+            engine = create_async_engine("sqlite+aiosqlite://")
+            event.listen(engine.sync_engine, "connect", lambda conn, record: conn.execute("PRAGMA foreign_keys=ON"))
+            async with engine.begin() as conn:
+                for model in (User, Course):
+                    await conn.run_sync(model.__table__.create)
+            async with async_sessionmaker(engine)() as session:
+                session.add_all([User(id=i, username=f"t{i}", email=f"t{i}@example.com", password="x") for i in (1, 2)])
+                await session.flush()
+                session.add(Course(id=1, title="原课程", teacher_id=1))
+                await session.commit()
+            statements = []
+            event.listen(engine.sync_engine, "before_cursor_execute",
+                         lambda conn, cursor, sql, *args: statements.append(sql))
+            async with async_sessionmaker(engine)() as session:
+                result = await scenario(session, statements)
+            await engine.dispose()
+            return result
+        
+        return asyncio.run(run())
+    
+    @pytest.mark.parametrize("size", [1, 3, 7, 1 << 16])
+    def test_csv_parsed_across_chunks(self, size):
+        """测试任意切块（含截断的多字节字符）都得到同样的记录，引号内换行保留在同一条记录中"""
+        from app.core.helpers.streaming import read_csv_records
+        
+        records = self.collect(read_csv_records, self.CSV, size)
+        assert [line for line, _, _ in records] == [2, 3, 5, 6, 7, 8, 9, 10]
+        assert records[0][1] == {"id": None, "title": "新课程", "description": None, "teacher_id": "1", "status": "draft"}
+        assert records[1][1]["description"] == '第一行\r\n第二行，含"引号"'
+        assert records[-1][1] is None and "列数" in records[-1][2]
+    
+    def test_ndjson_errors_reported_per_line(self):
+        """测试 NDJSON 中的坏行按行号报错，不影响其他行"""
+        from app.core.helpers.streaming import read_ndjson_records
+        
+        data = '{"title": "一", "teacher_id": 1}\n\n{"title": \n[1, 2]\n{"title": "二", "teacher_id": 2}'.encode()
+        records = self.collect(read_ndjson_records, data, 5)
+        assert [(line, error) for line, _, error in records] == [
+            (1, None), (3, "JSON 格式错误"), (4, "每行须为一个 JSON 对象"), (5, None)
+        ]
+        assert records[-1][1] == {"title": "二", "teacher_id": 2}
+    
+    def test_oversized_line_rejected(self, monkeypatch):
+        """测试没有换行的超长上传被拒绝，而不是无限缓冲"""
+        from app.core.exceptions import ValidationException
+        from app.core.helpers import streaming
+        
+        monkeypatch.setattr(streaming, "MAX_RECORD_CHARS", 100)
+        with pytest.raises(ValidationException):
+            self.collect(streaming.read_ndjson_records, b"x" * 1000, 64)
+    
+    def test_import_batches_with_row_errors(self, monkeypatch):
+        """测试分批导入：新建、更新并递增版本，出错的行按行号报告，同批的其他行照常写入"""
+        from sqlalchemy import select
+        from app.core.config import settings
+        from app.core.helpers.streaming import read_csv_records
+        from app.course.application.service import CourseService
+        
+        monkeypatch.setattr(settings, "COURSE_BULK_BATCH_SIZE", 2)
+        
+        async def scenario(session, statements):
+            service = CourseService(SQLAlchemyCourseRepository(session))
+            result = await service.import_courses(read_csv_records(self.chunks(self.CSV, 64)))
+            await session.commit()
+            courses = (await session.execute(select(Course.title, Course.teacher_id, Course.version)
+                                             .order_by(Course.id))).all()
+            return result, courses
+        
+        result, courses = self.run_with_db(scenario)
+        assert (result.created, result.updated, result.failed) == (1, 1, 6)
+        errors = {error.line: error.error for error in result.errors}
+        assert errors[5] == "课程不存在"
+        assert errors[6].startswith("数据库拒绝写入")
+        assert errors[7].startswith("status") and errors[8].startswith("title") and errors[9].startswith("teacher_id")
+        assert "列数" in errors[10]
+        assert [tuple(course) for course in courses] == [("改名的课程", 2, 2), ("新课程", 1, 1)]
+    
+    def test_import_round_trips_per_batch(self, monkeypatch):
+        """测试每批只执行一条 INSERT，往返次数与行数无关"""
+        import json
+        from app.core.config import settings
+        from app.core.helpers.streaming import read_ndjson_records
+        from app.course.application.service import CourseService
+        
+        monkeypatch.setattr(settings, "COURSE_BULK_BATCH_SIZE", 500)
+        data = "".join(json.dumps({"title": f"课程{i}", "teacher_id": i % 2 + 1}) + "\n" for i in range(1200)).encode()
+        
+        async def scenario(session, statements):
+            service = CourseService(SQLAlchemyCourseRepository(session))
+            result = await service.import_courses(read_ndjson_records(self.chunks(data, 4096)))
+            return result, [sql for sql in statements if sql.startswith("INSERT")]
+        
+        result, inserts = self.run_with_db(scenario)
+        assert (result.created, result.failed) == (1200, 0)
+        assert len(inserts) == 3
+    
+    def test_export_streams_in_batches(self, monkeypatch):
+        """测试导出按批产出，CSV 可以原样再导入"""
+        import json
+        from app.core.config import settings
+        from app.core.helpers.streaming import read_csv_records
+        from app.course.application.schema import CourseFilter
+        from app.course.application.service import CourseService
+        
+        monkeypatch.setattr(settings, "COURSE_BULK_BATCH_SIZE", 2)
+        
+        async def scenario(session, statements):
+            session.add_all([Course(id=i, title=f"课程{i}", description="多行\n简介", teacher_id=2) for i in range(2, 6)])
+            await session.commit()
+            service = CourseService(SQLAlchemyCourseRepository(session))
+            csv_chunks = [chunk async for chunk in service.export_courses(CourseFilter(teacher_id=2))]
+            ndjson = "".join([chunk async for chunk in service.export_courses(None, "ndjson")])
+            reimported = await service.import_courses(read_csv_records(self.chunks("".join(csv_chunks).encode(), 10)))
+            return csv_chunks, ndjson, reimported
+        
+        csv_chunks, ndjson, reimported = self.run_with_db(scenario)
+        # 表头 + 每批 2 行的 2 批
+        assert len(csv_chunks) == 3
+        assert csv_chunks[0].startswith("id,title,description,teacher_id,status,created_at")
+        assert [json.loads(line)["id"] for line in ndjson.splitlines()] == [1, 2, 3, 4, 5]
+        assert (reimported.updated, reimported.failed) == (4, 0)
+    
+    @pytest.fixture
+    def export_db(self, tmp_path):
+        """
+        文件 SQLite 上的导出会话工厂（替换 get_read_session_factory），预先写入教师 7 的一门课程；
+        记录会话的打开、关闭以及连接的取出、归还
+        """
+        from contextlib import asynccontextmanager
+        from sqlalchemy import create_engine, event, insert, pool
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+        from app.core.database import get_read_session_factory
+        
+        path = tmp_path / "export.db"
+        sync_engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(sync_engine)
+        with sync_engine.begin() as conn:
+            conn.execute(insert(User).values(id=7, username="t", email="t@example.com", password="x"))
+            conn.execute(insert(Course).values(id=1, title="数据结构", teacher_id=7, status="active",
+                                               created_at=datetime(2024, 3, 1, tzinfo=timezone.utc)))
+        sync_engine.dispose()
+        
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=pool.NullPool)
+        events = []
+        event.listen(engine.sync_engine, "checkout", lambda *args: events.append("checkout"))
+        event.listen(engine.sync_engine, "checkin", lambda *args: events.append("checkin"))
+        sessions = async_sessionmaker(engine)
+        
+        @asynccontextmanager
+        async def open_session():
+            async with sessions() as session:
+                events.append("open")
+                yield session
+            events.append("close")
+        
+        app.dependency_overrides[get_read_session_factory] = lambda: open_session
+        yield SimpleNamespace(events=events)
+        app.dependency_overrides.clear()
+    
+    def test_routes(self, export_db):
+        """测试导入按 Content-Type 选择格式、导出流式返回附件，非管理员 403"""
+        from app.core.dependencies import get_current_user
+        from app.course.adapter.input import get_course_service
+        from app.course.application.schema import CourseImportResponse
+        
+        async def import_courses(records):
+            lines = [line async for line, _, error in records if error is None]
+            return CourseImportResponse(created=len(lines))
+        
+        role = SimpleNamespace(role="admin")
+        app.dependency_overrides[get_current_user] = lambda: role
+        app.dependency_overrides[get_course_service] = lambda: SimpleNamespace(import_courses=import_courses)
+        client = TestClient(app)
+        ndjson = '{"title": "一", "teacher_id": 1}\n{"title": "二", "teacher_id": 1}\n'
+        response = client.post("/courses/import", content=ndjson, headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 200 and response.json()["created"] == 2
+        # 按 CSV 解析时 NDJSON 只有表头和一行数据
+        response = client.post("/courses/import", content=ndjson, headers={"Content-Type": "text/csv"})
+        assert response.json()["created"] == 1
+        
+        response = client.get("/courses/export", params={"teacher_id": 7})
+        assert response.status_code == 200
+        assert response.headers["content-disposition"] == 'attachment; filename="courses.csv"'
+        assert response.text.splitlines()[1] == "1,数据结构,,7,active,2024-03-01T00:00:00,,1"
+        assert client.get("/courses/export", params={"teacher_id": 8}).text.count("\n") == 1
+        
+        role.role = "teacher"
+        assert client.get("/courses/export").status_code == 403
+        assert client.post("/courses/import", content=ndjson).status_code == 403
+    
+    def test_export_session_released(self, export_db):
+        """测试导出的读会话由响应体生成器打开，响应体全部发送后关闭并归还连接，不在依赖清理后继续使用"""
+        from app.core.dependencies import get_current_user
+        
+        app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(role="admin")
+        with TestClient(app) as client:
+            with client.stream("GET", "/courses/export", params={"format": "ndjson"}) as response:
+                lines = [line for line in response.iter_lines() if line]
+                assert export_db.events == ["open", "checkout", "checkin", "close"]
+        assert len(lines) == 1 and '"title":"数据结构"' in lines[0].replace(" ", "")
+        assert export_db.events.count("checkout") == export_db.events.count("checkin") == 1
@@ -0,0 +1,112 @@
+import pytest
+from datetime import datetime, timezone
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models.course import Course
+from app.models.course_objective import CourseObjective
+from app.models.course_material import CourseMaterial
+from app.models.course_syllabus import CourseSyllabus
+from app.models.user import User
+from app.teacher.adapter.input import get_teacher_read_repo
+
+class TestTeachingContentConditionalGet:
+    """教学内容（大纲、讲义等）条件请求测试类"""
+    
+    class FakeTeacherRepository:
+        """记录调用的仓储替身：get_content_stamp 只返回 id 和修改时间"""
+        def __init__(self, rows):
+            self.rows = rows
+            self.calls = []
+        
+        async def get_content_stamp(self, model, course_id):
+            self.calls.append(("stamp", model.__name__))
+            row = self.rows.get(model)
+            return (row.id, row.updated_at or row.created_at) if row else None
+        
+        async def get_course_material(self, course_id):
+            self.calls.append(("full", "CourseMaterial"))
+            return self.rows.get(CourseMaterial)
+        
+        async def get_course_syllabus(self, course_id):
+            self.calls.append(("full", "CourseSyllabus"))
+            return self.rows.get(CourseSyllabus)
+    
+    @pytest.fixture
+    def repo(self):
+        created = datetime(2024, 3, 1, 8, 0, tzinfo=timezone.utc)
+        material = CourseMaterial(id=5, course_id=1, content="讲义" * 50000, created_at=created,
+                                  updated_at=datetime(2024, 3, 2, 9, 30, 0, 123456, tzinfo=timezone.utc))
+        syllabus = CourseSyllabus(id=6, course_id=1, content="大纲", created_at=created)
+        repo = self.FakeTeacherRepository({CourseMaterial: material, CourseSyllabus: syllabus})
+        app.dependency_overrides[get_teacher_read_repo] = lambda: repo
+        yield repo
+        app.dependency_overrides.clear()
+    
+    def test_material_304_without_content(self, repo):
+        """测试讲义 ETag 由 id 和 updated_at 生成，命中时不加载 content"""
+        client = TestClient(app)
+        response = client.get("/teacher/material/1")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert etag == '"5-1709371800123456"'
+        
+        repo.calls.clear()
+        response = client.get("/teacher/material/1", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert repo.calls == [("stamp", "CourseMaterial")]
+    
+    def test_stale_etag_returns_full(self, repo):
+        """测试内容修改后旧 ETag 不命中"""
+        response = TestClient(app).get("/teacher/material/1", headers={"If-None-Match": '"5-1"'})
+        assert response.status_code == 200
+        assert response.json()["content"].startswith("讲义")
+    
+    def test_never_updated_uses_created_at(self, repo):
+        """测试从未更新的内容以 created_at 生成 ETag"""
+        response = TestClient(app).get("/teacher/syllabus/1")
+        assert response.headers["etag"] == '"6-1709280000000000"'
+    
+    def test_missing_content_has_no_etag(self, repo):
+        """测试内容不存在时返回空内容且不带 ETag"""
+        repo.rows.clear()
+        response = TestClient(app).get("/teacher/material/1", headers={"If-None-Match": "*"})
+        assert response.status_code == 200
+        assert response.json() == {"content": ""}
+        assert "etag" not in response.headers
+
+class TestTeachingContentRoundTrips:
+    """教学内容保存接口的数据库往返次数测试类（每请求一次提交、不 refresh）"""
+    
+    @pytest.fixture
+    def db(self, recording_db):
+        recording_db.seed(User(id=1, username="t", email="t@example.com", password="x", role="teacher"))
+        recording_db.seed(Course(id=1, title="数据结构", teacher_id=1))
+        return recording_db
+    
+    @pytest.mark.parametrize("path, body", [
+        ("/teacher/objective/1/save", {"course_content": "线性表", "teaching_target": "掌握"}),
+        ("/teacher/syllabus/1/save", {"content": "第一章"}),
+        ("/teacher/material/1/save", {"content": "讲义"}),
+    ])
+    def test_save_creates_then_updates(self, db, path, body):
+        """测试首次保存为查询 + INSERT ... RETURNING，再次保存为查询 + UPDATE ... RETURNING，各一次提交"""
+        client = TestClient(app)
+        response = client.post(path, json=body)
+        assert response.status_code == 200
+        assert response.json()["created_at"] is not None
+        assert db.round_trips == ["SELECT", "INSERT", "COMMIT"]
+        
+        db.round_trips.clear()
+        response = client.post(path, json={key: f"{value}（修订）" for key, value in body.items()})
+        assert response.status_code == 200
+        assert response.json()["updated_at"] is not None
+        assert db.round_trips == ["SELECT", "UPDATE", "COMMIT"]
+    
+    def test_failed_save_rolled_back(self, db):
+        """测试保存失败时回滚且不提交"""
+        db.seed(CourseObjective(course_id=1, course_content="a"), CourseObjective(course_id=1, course_content="b"))
+        response = TestClient(app).post("/teacher/objective/1/save", json={"course_content": "c", "teaching_target": "d"})
+        assert response.status_code == 500
+        assert db.round_trips == ["SELECT", "ROLLBACK"]
+
@@ -5,17 +5,34 @@ import { API_BASE_URL } from './config';
 
 /**
  * 获取教师所有课程（真实后端API）
+ * 后端为游标分页，沿 next_cursor 逐页读取后合并；筛选由后端完成
  */
-export const getTeacherCourses = async () => {
+export const getTeacherCourses = async (filters: {
+  status?: 'active' | 'inactive' | 'draft';
+  created_from?: string;
+  created_to?: string;
+  order?: 'desc' | 'asc';
+} = {}) => {
   const token = getToken();
   const teacherId = getUserId();
   try {
-    const response = await axios.get(`${API_BASE_URL}/courses/teacher/${teacherId}`, {
-      headers: {
-        'Authorization': `Bearer ${token}`
-      }
-    });
-    return response.data;
+    const courses: any[] = [];
+    let cursor: string | null = null;
+    do {
+      const response: any = await axios.get(`${API_BASE_URL}/courses/teacher/${teacherId}`, {
+        headers: {
+          'Authorization': `Bearer ${token}`
+        },
+        params: {
+          ...filters,
+          limit: 100,
+          ...(cursor ? { cursor } : {})
+        }
+      });
+      courses.push(...response.data.courses);
+      cursor = response.data.next_cursor;
+    } while (cursor);
+    return courses;
   } catch (error) {
     console.error('获取课程列表失败:', error);
     throw error;
@@ -30,6 +47,49 @@ export const getTeacherCourses = async () => {
   // }
 };
 
+/**
+ * 按关键词搜索课程标题和简介，结果按相关度排序
+ * 返回 { courses, next_cursor }，翻页时传入上一页的 next_cursor
+ */
+export const searchCourses = async (keyword: string, cursor?: string) => {
+  const token = getToken();
+  try {
+    const response = await axios.get(`${API_BASE_URL}/courses/search`, {
+      headers: {
+        'Authorization': `Bearer ${token}`
+      },
+      params: {
+        q: keyword,
+        ...(cursor ? { cursor } : {})
+      }
+    });
+    return response.data;
+  } catch (error) {
+    console.error('搜索课程失败:', error);
+    throw error;
+  }
+};
+
+/**
+ * 获取课程工作台：课程及其教学目标、大纲和讲义，一次请求取回。
+ * fields 列出需要正文的部分（objective、syllabus、material），未列出的只返回 id 和时间戳，尚未创建的为 null
+ */
+export const getCourseWorkspace = async (courseId: number, fields: string[] = []) => {
+  const token = getToken();
+  try {
+    const response = await axios.get(`${API_BASE_URL}/courses/${courseId}/workspace`, {
+      params: fields.length ? { fields: fields.join(',') } : {},
+      headers: {
+        'Authorization': `Bearer ${token}`
+      }
+    });
+    return response.data;
+  } catch (error) {
+    console.error('获取课程工作台失败:', error);
+    throw error;
+  }
+};
+
 /**
  * 获取课程详情
  */
@@ -95,8 +155,9 @@ export const createCourse = async (courseName: string) => {
 
 /**
  * 更新课程名称
+ * 传入 version 时携带 If-Match，课程已被他人修改则返回 412
  */
-export const updateCourseName = async (courseId: number, courseName: string) => {
+export const updateCourseName = async (courseId: number, courseName: string, version?: number) => {
   const token = getToken();
   try {
     if (!courseName || courseName.trim() === '') {
@@ -106,7 +167,8 @@ export const updateCourseName = async (courseId: number, courseName: string) =>
       title: courseName
     }, {
       headers: {
-        'Authorization': `Bearer ${token}`
+        'Authorization': `Bearer ${token}`,
+        ...(version !== undefined ? { 'If-Match': `"${courseId}-${version}"` } : {})
       }
     });
     return response.data;